@@ -44,7 +44,7 @@ async function AnalysisPage({ params }: { params: Promise<{ id: string }> }) {
                 </CardDescription>
 
             </Card>
-            {data.status === 'pending' && (
+            {(data.status === 'pending' || data.status === 'in_progress') && (
                 <Thinking id={data._id} />
             )}
             {data.status == 'completed' && <PdfViewer url={`${process.env.NEXT_PUBLIC_API_URL}/reports/${data.report_path}`} />}
@@ -8,9 +8,23 @@ import { Button } from './ui/button';
 import { Card } from './ui/card';
 import { useRouter } from 'next/navigation';
 
+// Typed events from the research stream; every event carries seq and ts
+type StreamEvent = { seq: number; ts: number } & (
+    | { type: 'token'; text: string; node: string }
+    | { type: 'tool_start'; call_id: string; name: string; args: unknown }
+    | { type: 'tool_end'; call_id: string; name: string; seconds: number | null; chars: number }
+    | { type: 'tool_result'; call_id: string; name: string; content: string }
+    | { type: 'stage'; stage: string; detail: string }
+    | { type: 'progress'; percent: number }
+    | { type: 'artifact'; kind: string; path: string }
+    | { type: 'error'; error: string; message: string }
+);
+
 function Thinking({ id }: { id: string }) {
 
     const [text, setText] = useState('');
+    const [stage, setStage] = useState('');
+    const [progress, setProgress] = useState(0);
     const [isError, setIsError] = useState(false);
     const [running, setRunning] = useState(false);
     const [expand, setExpand] = useState(false);
@@ -30,35 +44,85 @@ function Thinking({ id }: { id: string }) {
         setRunning(true);
         setIsError(false)
 
-        //  Connect
-        const ws = new WebSocket(`ws://localhost:8000/ws/research/${id}`);
+        // Next sequence number expected; sent back as the resume offset
+        let received = 0;
+        let disposed = false;
+        let ws: WebSocket;
+        let retry: NodeJS.Timeout | null = null;
 
-        ws.onmessage = (ev) => {
-            const content = ev.data;
-            if (content.startsWith('__ERROR__')) {
-                console.error('Error from server:', content);
-                setRunning(false);
-                setIsError(true);
-                return;
-            }
-            if (content.startsWith('__OUTPUT_FILE__')) {
-                console.log('File output:', content);
-                router.refresh();
-                return;
+        // Returns the markdown to append for an event, if any
+        const handleEvent = (event: StreamEvent): string => {
+            switch (event.type) {
+                case 'token':
+                    return event.text;
+                case 'tool_start':
+                    return `\n\n**Tool call:** \`${event.name}\` ${JSON.stringify(event.args)}\n\n`;
+                case 'tool_end':
+                    return `\n\n_${event.name} returned ${event.chars} chars${event.seconds != null ? ` in ${event.seconds}s` : ''}_\n\n`;
+                case 'stage':
+                    if (event.detail) {
+                        setStage(event.detail);
+                    }
+                    return '';
+                case 'progress':
+                    setProgress(event.percent);
+                    return '';
+                case 'artifact':
+                    console.log('File output:', event.path);
+                    router.refresh();
+                    return '';
+                case 'error':
+                    console.error('Error from server:', `${event.error}: ${event.message}`);
+                    setRunning(false);
+                    setIsError(true);
+                    return '';
+                default:
+                    // tool_result bodies are not displayed
+                    return '';
             }
-            setText((prev) => prev + content);
         };
 
-        ws.onclose = () => {
-            setRunning(false);
-        };
-        ws.onerror = (err) => {
-            console.log(err);
-            setRunning(false);
+        const connect = () => {
+            ws = new WebSocket(
+                `ws://localhost:8000/ws/research/${id}?offset=${received}`,
+                ['research.json'],
+            );
+
+            ws.onmessage = (ev) => {
+                // Batched frame: { seq, next, data: [...events] }
+                const frame = JSON.parse(ev.data) as { seq: number; next: number; data: StreamEvent[] };
+                received = frame.next;
+
+                let appended = '';
+                for (const event of frame.data) {
+                    appended += handleEvent(event);
+                }
+                if (appended) {
+                    setText((prev) => prev + appended);
+                }
+            };
+
+            ws.onclose = (ev) => {
+                // 1000: stream finished, 1008: nothing to stream for this id
+                if (!disposed && ev.code !== 1000 && ev.code !== 1008) {
+                    retry = setTimeout(connect, 1000);
+                    return;
+                }
+                setRunning(false);
+            };
+            ws.onerror = (err) => {
+                console.log(err);
+            };
         };
+
+        connect();
+
         return () => {
+            disposed = true;
+            if (retry) {
+                clearTimeout(retry);
+            }
             ws.close();
-           
         };
     // eslint-disable-next-line react-hooks/exhaustive-deps
     }, []);
@@ -72,6 +136,9 @@ function Thinking({ id }: { id: string }) {
                     {running && (
                         <div className="flex items-center gap-2">
                             <LoaderPinwheel className="animate-spin" />
+                            <span className="text-sm text-muted-foreground">
+                                {progress}%{stage && ` · ${stage}`}
+                            </span>
                         </div>
                     )}
                 </div>
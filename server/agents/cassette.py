@@ -0,0 +1,299 @@
+"""
+Record/replay of the external calls made by one analysis run.
+
+In ``record`` mode every LLM request/response (through ``CassetteRecorder``
+on each client) and every MCP tool call/result (through the wrappers from
+``instrument_tools``) made while a cassette is active is captured with its
+measured latency. In ``replay`` mode the LLM clients are ``ReplayChatModel``
+instances and the tools are rebuilt from the cassette, so a run needs no
+network access and costs nothing.
+
+Calls are matched by a hash of their input; when the input differs (e.g. a
+prompt changed since recording) the next unused recording for the same
+node or tool is served instead, so a replay always runs to completion.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, ChatResult, LLMResult
+from langchain_core.tools import BaseTool, StructuredTool
+
+RECORD = "record"
+REPLAY = "replay"
+
+current_cassette: ContextVar[Optional["Cassette"]] = ContextVar("cassette", default=None)
+
+
+def _hash(payload: Any) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def messages_key(messages: List[BaseMessage]) -> str:
+    return _hash([[m.type, m.content] for m in messages])
+
+
+def tool_key(name: str, args: Any) -> str:
+    return _hash([name, args])
+
+
+class Cassette:
+    """The LLM and tool interactions of one run, plus replay bookkeeping."""
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = RECORD,
+        meta: Optional[dict] = None,
+        zero_latency: bool = False,
+    ):
+        self.path = path
+        self.mode = mode
+        self.meta = meta or {}
+        self.zero_latency = zero_latency
+        self.llm: List[dict] = []
+        self.tools: List[dict] = []
+        self.tool_specs: Dict[str, dict] = {}
+        # replay: indexes already served, and (start, end) of every wait
+        self._used_llm: set = set()
+        self._used_tools: set = set()
+        self.waits: List[Tuple[float, float, str]] = []
+
+    # ---------- persistence ----------
+    @classmethod
+    def load(cls, path: str, zero_latency: bool = False) -> "Cassette":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        cassette = cls(path, REPLAY, data.get("meta"), zero_latency)
+        cassette.llm = data.get("llm", [])
+        cassette.tools = data.get("tools", [])
+        cassette.tool_specs = data.get("tool_specs", {})
+        return cassette
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {"meta": self.meta, "llm": self.llm, "tools": self.tools, "tool_specs": self.tool_specs},
+                f,
+                default=str,
+            )
+        os.replace(tmp, self.path)
+
+    # ---------- recording ----------
+    def record_llm(self, node: str, key: str, response: BaseMessage, started: float, seconds: float) -> None:
+        self.llm.append(
+            {
+                "node": node,
+                "key": key,
+                "response": message_to_dict(response),
+                "started": started,
+                "seconds": round(seconds, 4),
+            }
+        )
+
+    def record_tool(self, tool: BaseTool, args: Any, result: Any, started: float, seconds: float) -> None:
+        if tool.name not in self.tool_specs:
+            schema = tool.args_schema
+            self.tool_specs[tool.name] = {
+                "description": tool.description,
+                "args_schema": schema.model_json_schema() if hasattr(schema, "model_json_schema") else schema,
+                "response_format": tool.response_format,
+            }
+        self.tools.append(
+            {
+                "name": tool.name,
+                "key": tool_key(tool.name, args),
+                "args": args,
+                "result": result,
+                "started": started,
+                "seconds": round(seconds, 4),
+            }
+        )
+
+    def copy_tools(self, source: "Cassette", keys: Set[str]) -> None:
+        """Add the tool calls ``source`` recorded under ``keys`` to this cassette."""
+        for entry in source.tools:
+            if entry["key"] in keys:
+                self.tools.append(dict(entry))
+                self.tool_specs.setdefault(entry["name"], source.tool_specs[entry["name"]])
+
+    # ---------- replay ----------
+    def _pick(self, entries: List[dict], used: set, field: str, value: str, key: str) -> dict:
+        candidates = [i for i, e in enumerate(entries) if e[field] == value and i not in used]
+        if not candidates:
+            raise LookupError(f"cassette {self.path} has no more recordings for {value}")
+        index = next((i for i in candidates if entries[i]["key"] == key), candidates[0])
+        used.add(index)
+        return entries[index]
+
+    async def _wait(self, seconds: float, label: str) -> None:
+        start = time.monotonic()
+        if not self.zero_latency and seconds > 0:
+            await asyncio.sleep(seconds)
+        self.waits.append((start, time.monotonic(), label))
+
+    def _wait_sync(self, seconds: float, label: str) -> None:
+        start = time.monotonic()
+        if not self.zero_latency and seconds > 0:
+            time.sleep(seconds)
+        self.waits.append((start, time.monotonic(), label))
+
+    def _take_llm(self, node: str, messages: List[BaseMessage]) -> Tuple[float, BaseMessage]:
+        entry = self._pick(self.llm, self._used_llm, "node", node, messages_key(messages))
+        return entry["seconds"], messages_from_dict([entry["response"]])[0]
+
+    async def replay_llm(self, node: str, messages: List[BaseMessage]) -> BaseMessage:
+        seconds, message = self._take_llm(node, messages)
+        await self._wait(seconds, "llm")
+        return message
+
+    def replay_llm_sync(self, node: str, messages: List[BaseMessage]) -> BaseMessage:
+        seconds, message = self._take_llm(node, messages)
+        self._wait_sync(seconds, "llm")
+        return message
+
+    async def replay_tool(self, name: str, args: Any) -> Any:
+        entry = self._pick(self.tools, self._used_tools, "name", name, tool_key(name, args))
+        await self._wait(entry["seconds"], "tool")
+        result = entry["result"]
+        if self.tool_specs.get(name, {}).get("response_format") == "content_and_artifact":
+            return tuple(result)
+        return result
+
+    def wait_seconds(self, label: Optional[str] = None) -> float:
+        """Wall time during which at least one replayed call was pending."""
+        spans = sorted((s, e) for s, e, l in self.waits if label is None or l == label)
+        total, cur_start, cur_end = 0.0, None, None
+        for start, end in spans:
+            if cur_end is None or start > cur_end:
+                if cur_end is not None:
+                    total += cur_end - cur_start  # type: ignore
+                cur_start, cur_end = start, end
+            else:
+                cur_end = max(cur_end, end)
+        if cur_end is not None:
+            total += cur_end - cur_start  # type: ignore
+        return total
+
+
+class CassetteRecorder(BaseCallbackHandler):
+    """Captures the calls of one LLM client into the active recording cassette."""
+
+    run_inline = True
+
+    def __init__(self, node: str):
+        self.node = node
+        self._pending: Dict[UUID, Tuple[str, float, float]] = {}
+
+    def on_chat_model_start(self, serialized: Any, messages: List[List[BaseMessage]], *, run_id: UUID, **kwargs: Any) -> None:
+        cassette = current_cassette.get()
+        if cassette is not None and cassette.mode == RECORD:
+            self._pending[run_id] = (messages_key(messages[0]), time.time(), time.monotonic())
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        pending = self._pending.pop(run_id, None)
+        cassette = current_cassette.get()
+        if pending is None or cassette is None:
+            return
+        key, started, start = pending
+        message = getattr(response.generations[0][0], "message", None)
+        if message is not None:
+            cassette.record_llm(self.node, key, message, started, time.monotonic() - start)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._pending.pop(run_id, None)
+
+
+class ReplayChatModel(BaseChatModel):
+    """Serves the active cassette's recorded responses for one node."""
+
+    node: str = "default"
+
+    @property
+    def _llm_type(self) -> str:
+        return "cassette-replay"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "ReplayChatModel":
+        # recorded responses already contain the tool calls
+        return self
+
+    @staticmethod
+    def _cassette() -> Cassette:
+        cassette = current_cassette.get()
+        if cassette is None or cassette.mode != REPLAY:
+            raise RuntimeError("no replay cassette is active")
+        return cassette
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        message = self._cassette().replay_llm_sync(self.node, messages)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        message = await self._cassette().replay_llm(self.node, messages)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def instrument_tools(tools: List[BaseTool]) -> List[BaseTool]:
+    """
+    Wrap tools so their calls are recorded while a recording cassette is
+    active. Already wrapped tools are returned unchanged.
+    """
+    return [t if (t.metadata or {}).get("cassette") else _recording_tool(t) for t in tools]
+
+
+def _recording_tool(tool: BaseTool) -> BaseTool:
+    async def run(**kwargs: Any) -> Any:
+        cassette = current_cassette.get()
+        if cassette is None or cassette.mode != RECORD:
+            return await _call(tool, kwargs)
+        started, start = time.time(), time.monotonic()
+        result = await _call(tool, kwargs)
+        cassette.record_tool(tool, kwargs, result, started, time.monotonic() - start)
+        return result
+
+    return StructuredTool(
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema,
+        coroutine=run,
+        response_format=tool.response_format,
+        metadata={**(tool.metadata or {}), "cassette": True},
+    )
+
+
+async def _call(tool: BaseTool, kwargs: dict) -> Any:
+    # call the underlying coroutine so content_and_artifact tuples survive
+    coroutine = getattr(tool, "coroutine", None)
+    if coroutine is not None:
+        return await coroutine(**kwargs)
+    return await tool.ainvoke(kwargs)
+
+
+def replay_tools(cassette: Cassette) -> List[BaseTool]:
+    """Offline stand-ins for the tools a cassette recorded."""
+
+    def make(name: str, spec: dict) -> BaseTool:
+        async def run(**kwargs: Any) -> Any:
+            active = current_cassette.get() or cassette
+            return await active.replay_tool(name, kwargs)
+
+        return StructuredTool(
+            name=name,
+            description=spec.get("description", ""),
+            args_schema=spec.get("args_schema") or {"type": "object", "properties": {}},
+            coroutine=run,
+            response_format=spec.get("response_format", "content"),
+            metadata={"cassette": True},
+        )
+
+    return [make(name, spec) for name, spec in cassette.tool_specs.items()]
@@ -0,0 +1,65 @@
+import os
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional, Tuple
+
+from config.settings import checkpoint_enabled, checkpoint_path
+
+# thread id suffixes for the two checkpointed stages of a job
+STAGES = ("init", "reflect")
+
+
+@asynccontextmanager
+async def open_checkpointer():
+    """
+    Durable LangGraph checkpointer backed by a local SQLite file, or None
+    when checkpointing is disabled or the saver package is not installed.
+    """
+    if not checkpoint_enabled:
+        yield None
+        return
+
+    try:
+        from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    except ImportError:
+        print("langgraph-checkpoint-sqlite is not installed, checkpointing disabled")
+        yield None
+        return
+
+    os.makedirs(os.path.dirname(os.path.abspath(checkpoint_path)), exist_ok=True)
+    async with AsyncSqliteSaver.from_conn_string(checkpoint_path) as saver:
+        yield saver
+
+
+def thread_config(job_id: str, stage: str, **config: Any) -> Dict[str, Any]:
+    return {**config, "configurable": {"thread_id": f"{job_id}:{stage}"}}
+
+
+async def resume_point(graph, config: Dict[str, Any], fresh_input: Any) -> Tuple[Any, Optional[dict]]:
+    """
+    Decide how to (re)start a checkpointed graph for a job.
+
+    Returns ``(input, None)`` to stream from scratch, ``(None, None)`` to
+    resume an interrupted run from its last completed node, or
+    ``(None, values)`` when the run already finished and its final state
+    can be used as-is.
+    """
+    if not getattr(graph, "checkpointer", None):
+        return fresh_input, None
+
+    snapshot = await graph.aget_state(config)
+    if snapshot.next:
+        return None, None
+    if snapshot.values:
+        return None, snapshot.values
+    return fresh_input, None
+
+
+async def delete_job(checkpointer, job_id: str) -> None:
+    """Drop a finished job's checkpoints so the store does not grow forever."""
+    if checkpointer is None:
+        return
+    for stage in STAGES:
+        try:
+            await checkpointer.adelete_thread(f"{job_id}:{stage}")
+        except Exception as exc:
+            print(f"Could not delete checkpoints for {job_id}:{stage}: {exc}")
@@ -0,0 +1,109 @@
+import re
+from typing import Any, Dict, List
+
+from langchain_core.messages import BaseMessage, ToolMessage
+
+from config.settings import (
+    react_context_token_budget,
+    react_keep_recent_tool_results,
+    react_compacted_tool_chars,
+)
+from .rate_limiter import current_job
+from . import usage
+
+_URL = re.compile(r"https?://[^\s)\]>\"'|]+")
+_FIGURE = re.compile(
+    r"\d[\d,.]*\s*(%|percent|million|billion|trillion|crore|lakh|bn|mn|k\b)|[$€£₹]\s?\d|\b(19|20)\d{2}\b",
+    re.I,
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) used for budgeting."""
+    return len(text) // 4 + 1
+
+
+def _text(message: BaseMessage) -> str:
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return " ".join(
+        part.get("text", "") if isinstance(part, dict) else str(part) for part in content
+    )
+
+
+def compact_text(text: str, max_chars: int) -> str:
+    """
+    Shrink a tool result to about ``max_chars``: keep the opening excerpt,
+    then the lines that carry figures, then every distinct URL, so the
+    agent can still cite what it read.
+    """
+    if len(text) <= max_chars:
+        return text
+
+    head = text[: max_chars // 2]
+    budget = max_chars - len(head)
+
+    urls: List[str] = []
+    for url in _URL.findall(text):
+        url = url.rstrip(".,;")
+        if url not in urls:
+            urls.append(url)
+    sources = "\n".join(f"- {u}" for u in urls[:30])
+    budget -= len(sources)
+
+    figures: List[str] = []
+    for line in text[len(head):].splitlines():
+        line = line.strip()
+        if not line or len(line) > 300 or not _FIGURE.search(line):
+            continue
+        if budget - len(line) < 0:
+            break
+        figures.append(f"- {line}")
+        budget -= len(line) + 3
+
+    parts = [head, f"\n\n[... {len(text) - len(head)} characters compacted ...]"]
+    if figures:
+        parts.append("\nKey figures:\n" + "\n".join(figures))
+    if sources:
+        parts.append("\nSources:\n" + sources)
+    return "".join(parts)
+
+
+def compact_messages(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    ``pre_model_hook`` for ReAct agents. Older tool results are compacted,
+    oldest first, until the history fits the token budget; the most recent
+    results are always sent in full. Only the model input changes, the
+    graph state keeps the originals. Savings are added to the job's usage,
+    once per compacted message.
+    """
+    messages: List[BaseMessage] = state["messages"]
+    sizes = [estimate_tokens(_text(m)) for m in messages]
+    total = sum(sizes)
+    if total <= react_context_token_budget:
+        return {"llm_input_messages": messages}
+
+    tool_idx = [i for i, m in enumerate(messages) if isinstance(m, ToolMessage)]
+    if react_keep_recent_tool_results > 0:
+        tool_idx = tool_idx[:-react_keep_recent_tool_results]
+
+    compacted = list(messages)
+    saved: Dict[str, int] = {}
+    for i in tool_idx:
+        if total <= react_context_token_budget:
+            break
+        text = _text(messages[i])
+        short = compact_text(text, react_compacted_tool_chars)
+        if short is text:
+            continue
+        compacted[i] = messages[i].model_copy(update={"content": short})
+        delta = sizes[i] - estimate_tokens(short)
+        total -= delta
+        # the hook runs on every model step over the whole history: key the
+        # savings by message so older results are not counted again
+        saved[messages[i].id or messages[i].tool_call_id] = delta
+
+    if saved:
+        usage.record_saved(current_job.get(), saved)
+    return {"llm_input_messages": compacted}
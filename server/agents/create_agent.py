@@ -1,115 +1,240 @@
 import os
-import asyncio
-from markdown_pdf import MarkdownPdf, Section
-from typing import List
+import time
+from typing import List, Optional, Sequence
 from langchain_core.tools import BaseTool
 from langchain_core.messages import ToolMessage, AIMessage
-from langgraph.prebuilt import create_react_agent
-from config.settings import output_dir
-from .utils import get_llm
-from .graph import make_graph
+from config.settings import (
+    output_dir,
+    gap_fill_concurrency,
+    reflection_max_rounds,
+    evidence_prefetch_enabled,
+    cassette_mode,
+    cassette_dir,
+)
+from database import analyses
+from streaming.broadcaster import Channel
+from streaming.events import EventWriter
+from .registry import get_agents, get_checkpointer
+from .checkpoint import delete_job, resume_point, thread_config
+from .evidence import (
+    evidence_for,
+    format_evidence,
+    gather_evidence,
+    gather_shared_evidence,
+    shared_recording,
+)
+from .render import render_report
+from .cassette import RECORD, Cassette, current_cassette, instrument_tools, tool_key
+from .rate_limiter import current_job
+from . import usage
 
 
 # ------------------------------------------------------------------
-# Public entry-point: caller provides an asyncio.Queue
+# Public entry-point: caller provides a queue-like output channel
 # ------------------------------------------------------------------
 async def create_agent(
     id: str,
     analysisType: str,
     user_prompt: str,
     tools: List[BaseTool],
-    out_queue: asyncio.Queue,
+    out_queue: Channel,
     PROMPT: str,
     reflection_instructions_prompt,
     fill_gaps_prompt,
     merge_gaps_prompt,
+    batch_id: Optional[str] = None,
+    batch_types: Sequence[str] = (),
 ) -> None:
     # Convert id to string in case it's an ObjectId
     id_str = str(id)
+    # every LLM call made by this job (including graph nodes) shares its
+    # fair-share slot in the rate limiter; jobs run in their own task
+    current_job.set(id_str)
+    started_at = time.time()
+    events = EventWriter(out_queue)
+    cassette = None
+    if cassette_mode == RECORD:
+        # capture every LLM and MCP call of this run for offline replay
+        cassette = Cassette(
+            os.path.join(cassette_dir, f"{id_str}.json"),
+            meta={"id": id_str, "query": user_prompt, "analysis_type": analysisType, "recorded_at": started_at},
+        )
+        current_cassette.set(cassette)
+        tools = instrument_tools(tools)
     try:
-        llm = get_llm()
-
-        industry_research_agent = await make_graph(
-            tools=tools,
+        # a resumed run carries on from the usage saved when it stopped;
+        # saving the new summary below would otherwise overwrite it
+        try:
+            previous = await analyses.get_analysis(id_str) or {}
+            usage.restore(id_str, previous.get("usage"), previous.get("context_tokens_saved") or 0)
+        except Exception as exc:
+            print(f"Could not load earlier usage for {id_str}: {exc}")
+
+        react_agent, industry_research_agent = await get_agents(
+            analysisType,
+            tools,
+            PROMPT=PROMPT,
             reflection_instructions_prompt=reflection_instructions_prompt,
             fill_gaps_prompt=fill_gaps_prompt,
             merge_gaps_prompt=merge_gaps_prompt,
         )
 
-        react_agent = create_react_agent(model=llm, tools=tools, prompt=PROMPT)
-
         # ----------------------------------------------------------
         # 1. Initial REACT pass
         # ----------------------------------------------------------
         init_report = ""
 
-        async for message in react_agent.astream(
+        # Both stages checkpoint after every node; a restarted job resumes
+        # from its last completed node instead of starting over.
+        init_config = thread_config(id_str, "init", recursion_limit=50)
+        init_input, init_done = await resume_point(
+            react_agent,
+            init_config,
             {"messages": [{"role": "user", "content": user_prompt}]},
-            {"recursion_limit": 50},
-            stream_mode="values",
-        ):
-            last = message["messages"][-1]
-            if isinstance(last, ToolMessage):
-                await out_queue.put(f"Results:\n{last.content}\n")
-            elif isinstance(last, AIMessage):
-                await out_queue.put(last.content)
-                for tc in last.tool_calls:
-                    await out_queue.put(f"Tool Call:\n {tc['name']}")
-                    await out_queue.put(f"Arguments:\n {tc['args']}")
-                init_report = last.content
+        )
+
+        if init_input is not None and (evidence_prefetch_enabled or batch_id):
+            # run the obvious first-round searches concurrently and hand the
+            # results to the agent, instead of letting it call them one by one
+            await events.stage("evidence", "Gathering initial evidence...")
+            if batch_id:
+                # one pass per query serves every analysis type in the batch
+                shared = await gather_shared_evidence(
+                    batch_id, user_prompt, batch_types or [analysisType], tools
+                )
+                evidence = evidence_for(shared, user_prompt, analysisType)
+                recording = shared_recording(batch_id, user_prompt)
+                if cassette is not None and recording is not None:
+                    # the pass recorded on its own; keep what this run used
+                    # so its cassette still replays by itself
+                    cassette.copy_tools(recording, {tool_key(e["tool"], e["args"]) for e in evidence})
+            else:
+                evidence = await gather_evidence(user_prompt, analysisType, tools)
+            await events.stage(
+                "evidence",
+                f"Collected {len(evidence)} evidence results: "
+                + ", ".join(e["tool"] for e in evidence),
+            )
+            init_input = {
+                "messages": [
+                    {"role": "user", "content": user_prompt + format_evidence(evidence)}
+                ]
+            }
+        if init_done:
+            init_report = init_done["messages"][-1].content
+        else:
+            await events.stage("initial_report", "Writing the initial report")
+            seen = 0
+            async for message in react_agent.astream(init_input, init_config, stream_mode="values"):
+                # "values" yields the whole history; parallel tool results
+                # arrive together, so walk everything new since last time
+                new, seen = message["messages"][seen:], len(message["messages"])
+                for msg in new:
+                    if isinstance(msg, ToolMessage):
+                        await events.tool_end(msg.tool_call_id, msg.name or "", msg.content)
+                        await events.progress(min(45, events.percent + 2))
+                    elif isinstance(msg, AIMessage):
+                        await events.token(msg.content, node="agent")
+                        for tc in msg.tool_calls:
+                            await events.tool_start(tc["id"], tc["name"], tc["args"])
+                        init_report = msg.content
 
         final_report = ""
 
-        async for mode, message in industry_research_agent.astream(
+        graph_config = thread_config(id_str, "reflect", max_concurrency=gap_fill_concurrency)
+        graph_input, graph_done = await resume_point(
+            industry_research_agent,
+            graph_config,
             {
                 "knowledge_gaps": "",
                 "k": 0,
                 "report": init_report,
                 "kg_gap": "",
-            },  # type: ignore
-            stream_mode=["updates", "messages", "custom"],
-        ):
-            if mode == "messages":
-                msg, metadata = message[0], message[1]
-                if msg.content and metadata["langgraph_node"] != "merge_filled_gaps" or metadata["langgraph_node"] == "find_gaps":  # type: ignore
-                    await out_queue.put(msg.content)  # type: ignore
-
-            if mode == "updates":
-                if "final" in message:
-                    final_report = message["final"]["report"]  # type: ignore
-                if "merge_filled_gaps" in message:
-                    await out_queue.put(
-                        "=" * 30 + "Merging the gathered Resources" + "=" * 30 + "\n"
-                    )
-            else:
-                if "react_agent" in message:
-                    msg = message["react_agent"]["messages"][-1]  # type: ignore
-                    await out_queue.put(msg.content)  # type: ignore
+                "stop_reason": "",
+                "started_at": started_at,
+            },
+        )
+        if graph_done:
+            final_report = graph_done["report"]
+        else:
+            await events.stage("reflection", "Looking for gaps in the report")
+            async for mode, message in industry_research_agent.astream(
+                graph_input,  # type: ignore
+                graph_config,
+                stream_mode=["updates", "messages", "custom"],
+            ):
+                if mode == "messages":
+                    msg, metadata = message[0], message[1]
+                    if msg.content and metadata["langgraph_node"] != "merge_filled_gaps" or metadata["langgraph_node"] == "find_gaps":  # type: ignore
+                        await events.token(msg.content, node=metadata["langgraph_node"])  # type: ignore
+
+                if mode == "updates":
+                    if "final" in message:
+                        final_report = message["final"]["report"]  # type: ignore
+                        rounds = message["final"]["k"]  # type: ignore
+                        await analyses.update_analysis(
+                            id_str,
+                            {
+                                "reflection": {
+                                    "stop_reason": message["final"]["stop_reason"],  # type: ignore
+                                    "rounds": rounds,
+                                    "rounds_saved": max(0, reflection_max_rounds - rounds),
+                                }
+                            },
+                        )
+                    if "merge_filled_gaps" in message:
+                        rounds = message["merge_filled_gaps"]["k"]  # type: ignore
+                        await events.stage(
+                            "reflection",
+                            f"Merged the gathered resources (round {rounds})",
+                            percent=50 + 40 * rounds / max(1, reflection_max_rounds),
+                        )
                 else:
-                    chunk, meta = message[0], message[1]
-                    node = meta["langgraph_node"]  # type: ignore
-
-                    if node == "tools":
-                        await out_queue.put("Tool Call:\n")
-                        await out_queue.put(chunk.content + "\n")  # type: ignore
+                    if "react_agent" in message:
+                        msg = message["react_agent"]["messages"][-1]  # type: ignore
+                        await events.token(msg.content, node="fill_gaps")  # type: ignore
+                    else:
+                        chunk, meta = message[0], message[1]
+                        node = meta["langgraph_node"]  # type: ignore
+
+                        if node == "tools":
+                            await events.tool_end(
+                                getattr(chunk, "tool_call_id", ""),
+                                getattr(chunk, "name", "") or "",
+                                chunk.content,  # type: ignore
+                            )
+
+        await analyses.update_analysis(
+            id_str, {"context_tokens_saved": usage.tokens_saved(id_str)}
+        )
 
         print("Generating final report...")
-        pdf = MarkdownPdf()
-        pdf.meta["title"] = analysisType
-        pdf.add_section(Section(final_report, toc=False))
-
-        os.makedirs(f"{output_dir}/{id_str}", exist_ok=True)
-        pdf.save(os.path.join(output_dir, id_str, f"{analysisType}.pdf"))
-
-        await out_queue.put(
-            f"__OUTPUT_FILE__{output_dir}/{id_str}/{analysisType}.pdf\n"
+        await events.stage("render", "Rendering the PDF report")
+        await render_report(
+            final_report,
+            analysisType,
+            os.path.join(output_dir, id_str, f"{analysisType}.pdf"),
         )
 
+        await events.artifact("pdf", f"{output_dir}/{id_str}/{analysisType}.pdf")
+        await events.stage("done")
+        await delete_job(get_checkpointer(), id_str)
+
     except Exception as exc:
 
         print(exc)
-        await out_queue.put(f"__ERROR__{type(exc).__name__}: {exc}")
+        await events.error(exc)
+        # failed jobs are not retried; cancelled ones keep their checkpoints
+        await delete_job(get_checkpointer(), id_str)
+        raise
 
     finally:
 
-        await out_queue.put(None)
+        try:
+            await analyses.update_analysis(id_str, {"usage": usage.summary(id_str)})
+        except Exception as exc:
+            print(f"Could not save usage for {id_str}: {exc}")
+        usage.reset(id_str)
+        if cassette is not None:
+            cassette.save()
+        await events.close()
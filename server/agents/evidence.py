@@ -0,0 +1,190 @@
+import asyncio
+import contextvars
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.tools import BaseTool
+
+from config.settings import (
+    cassette_mode,
+    evidence_concurrency,
+    evidence_max_chars_per_result,
+    evidence_tool_timeout_seconds,
+)
+from database.schema import AnalysisType
+from mcp_servers.errors import is_failure
+from .cassette import RECORD, Cassette, current_cassette
+from .compaction import compact_text
+from .rate_limiter import current_job
+
+# Angles searched up front for each analysis type, appended to the query.
+SEED_ANGLES: Dict[str, List[str]] = {
+    AnalysisType.INDUSTRY_ANALYSIS: ["market size growth", "industry trends regulation"],
+    AnalysisType.COMPETITOR_ANALYSIS: ["competitors market share", "top brands pricing"],
+    AnalysisType.MARKET_GAP_ANALYSIS: ["unmet needs customer complaints", "market opportunities"],
+    AnalysisType.TARGET_MARKET_ANALYSIS: ["consumer demographics", "customer segments buying behaviour"],
+    AnalysisType.BARRIER_ANALYSIS: ["entry barriers regulation licensing", "startup costs challenges"],
+    AnalysisType.SALES_FORECASTING: ["sales forecast CAGR", "market size revenue projections"],
+}
+
+
+def _text(content) -> str:
+    """Text of a tool result, which MCP tools return as content blocks."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(
+            block if isinstance(block, str) else str(block.get("text", ""))
+            for block in content
+            if isinstance(block, str) or block.get("type") == "text"
+        )
+    return str(content)
+
+
+def seed_calls(query: str, analysis_type: str) -> List[Tuple[str, dict]]:
+    """The obvious first-round tool calls for a query and analysis type."""
+    calls: List[Tuple[str, dict]] = [
+        ("google_search", {"query": query}),
+        ("search_google_news", {"query": query}),
+        ("google_trends_summary", {"query": query, "data_type": "TIMESERIES"}),
+        ("get_reddit_post_data", {"query": query}),
+        ("search_youtube", {"query": query}),
+    ]
+    for angle in SEED_ANGLES.get(analysis_type, []):
+        calls.append(("google_search", {"query": f"{query} {angle}"}))
+    return calls
+
+
+async def gather_evidence(
+    query: str,
+    analysis_type: str,
+    tools: List[BaseTool],
+    calls: Optional[List[Tuple[str, dict]]] = None,
+) -> List[dict]:
+    """
+    Run the seed tool calls concurrently (bounded by EVIDENCE_CONCURRENCY,
+    each with its own timeout) and return one entry per call that
+    succeeded: ``{"tool", "args", "result", "seconds"}``. Tools missing from
+    the MCP tool set are skipped.
+    """
+    by_name = {t.name: t for t in tools}
+    slots = asyncio.Semaphore(evidence_concurrency)
+
+    async def run(name: str, args: dict) -> Optional[dict]:
+        tool = by_name.get(name)
+        if tool is None:
+            return None
+        async with slots:
+            start = time.perf_counter()
+            try:
+                # invoked as a tool call, so an MCP ``isError`` result comes
+                # back as a ToolMessage with an error status
+                message = await asyncio.wait_for(
+                    tool.ainvoke({"type": "tool_call", "id": f"evidence-{name}", "name": name, "args": args}),
+                    timeout=evidence_tool_timeout_seconds,
+                )
+            except Exception as exc:
+                print(f"Evidence call {name}({args}) failed: {exc}")
+                return None
+        if getattr(message, "status", None) == "error":
+            return None
+        text = _text(getattr(message, "content", message))
+        if is_failure(text):
+            return None
+        return {
+            "tool": name,
+            "args": args,
+            "result": text,
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+
+    results = await asyncio.gather(
+        *(run(name, args) for name, args in (calls or seed_calls(query, analysis_type)))
+    )
+    return [r for r in results if r]
+
+
+# Evidence gathered once per query of a batch and shared by its items,
+# keyed by (batch id, query). The first item to get there starts the pass.
+_shared: Dict[Tuple[str, str], "asyncio.Task[List[dict]]"] = {}
+# tool calls of a shared pass while recording, for the items to copy from
+_recordings: Dict[Tuple[str, str], Cassette] = {}
+
+
+def batch_calls(query: str, analysis_types: Sequence[str]) -> List[Tuple[str, dict]]:
+    """Seed calls of every analysis type in a batch, without duplicates."""
+    calls: List[Tuple[str, dict]] = []
+    for analysis_type in analysis_types:
+        for call in seed_calls(query, analysis_type):
+            if call not in calls:
+                calls.append(call)
+    return calls
+
+
+async def gather_shared_evidence(
+    batch_id: str,
+    query: str,
+    analysis_types: Sequence[str],
+    tools: List[BaseTool],
+) -> List[dict]:
+    """
+    Evidence for ``query`` covering all ``analysis_types`` of a batch,
+    gathered by a single pass that every item of the batch awaits. A
+    cancelled item does not cancel the pass for the others.
+    """
+    key = (batch_id, query)
+    task = _shared.get(key)
+    if task is None or task.cancelled() or (task.done() and task.exception()):
+        task = asyncio.get_running_loop().create_task(
+            gather_evidence(query, "", tools, calls=batch_calls(query, analysis_types)),
+            context=_batch_context(key),
+        )
+        _shared[key] = task
+    return await asyncio.shield(task)
+
+
+def _batch_context(key: Tuple[str, str]) -> contextvars.Context:
+    """
+    A fresh context for a shared pass, so its usage and rate-limit debits
+    are charged to the batch and its tool calls recorded into a cassette of
+    its own, not to whichever item happened to start it.
+    """
+    ctx = contextvars.Context()
+    ctx.run(current_job.set, f"batch:{key[0]}")
+    if cassette_mode == RECORD:
+        recording = Cassette("", meta={"batch_id": key[0], "query": key[1]})
+        _recordings[key] = recording
+        ctx.run(current_cassette.set, recording)
+    return ctx
+
+
+def shared_recording(batch_id: str, query: str) -> Optional[Cassette]:
+    """The tool calls recorded by the shared pass for ``query``, if any."""
+    return _recordings.get((batch_id, query))
+
+
+def evidence_for(evidence: List[dict], query: str, analysis_type: str) -> List[dict]:
+    """The part of a shared pass that ``analysis_type`` would have gathered itself."""
+    calls = seed_calls(query, analysis_type)
+    return [e for e in evidence if (e["tool"], e["args"]) in calls]
+
+
+def release_shared(batch_id: str, query: str) -> None:
+    _shared.pop((batch_id, query), None)
+    _recordings.pop((batch_id, query), None)
+
+
+def format_evidence(evidence: List[dict]) -> str:
+    """Render gathered evidence as context for the initial ReAct prompt."""
+    if not evidence:
+        return ""
+
+    blocks = [
+        f"### {e['tool']} {e['args']}\n{compact_text(e['result'], evidence_max_chars_per_result)}"
+        for e in evidence
+    ]
+    return (
+        "\n\nPRELIMINARY RESEARCH EVIDENCE (already gathered with the tools, "
+        "cite the URLs it contains; use the tools for anything still missing):\n\n"
+        + "\n\n".join(blocks)
+    )
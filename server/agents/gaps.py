@@ -0,0 +1,89 @@
+import json
+import re
+from difflib import SequenceMatcher
+from typing import Dict, List
+
+# Phrases the reflection prompts use for the gaps they want handled first
+# (missing/empty sections), weighted above merely thin ones.
+_IMPACT_TERMS = {
+    "completely absent": 5,
+    "complete absence": 5,
+    "entirely missing": 5,
+    "missing": 3,
+    "absent": 3,
+    "empty": 3,
+    "placeholder": 3,
+    "critical": 2,
+    "severely": 2,
+    "undermines": 1,
+    "cannot": 1,
+    "inaccurate": 1,
+    "outdated": 1,
+}
+_LEVELS = {"critical": 10, "high": 8, "medium": 5, "moderate": 5, "low": 2}
+
+
+def parse_gaps(text: str) -> List[Dict[str, str]]:
+    """Parse the reflection LLM's JSON array, tolerating a code fence around it."""
+    text = text.strip()
+    fence = re.match(r"^```(?:json)?\s*(.*?)\s*```$", text, re.S)
+    if fence:
+        text = fence.group(1)
+    gaps = json.loads(text)
+    return [g for g in gaps if isinstance(g, dict) and g.get("section")]
+
+
+def impact_score(gap: Dict[str, str]) -> float:
+    """
+    Rank a gap by its ``impact`` field. Explicit levels ("high") or numbers
+    are used as-is; free-text impacts are scored on the severity wording
+    the prompts ask for, with description length as a tie-breaker.
+    """
+    impact = gap.get("impact", "")
+    if isinstance(impact, (int, float)):
+        return float(impact)
+
+    text = f"{impact} {gap.get('gap_description', '')}".lower()
+    level = _LEVELS.get(str(impact).strip().lower())
+    if level is not None:
+        return float(level)
+
+    score = sum(w for term, w in _IMPACT_TERMS.items() if term in text)
+    return score + min(len(text), 2000) / 2000
+
+
+def _similar(a: str, b: str) -> float:
+    return SequenceMatcher(None, a.lower(), b.lower()).ratio()
+
+
+def dedupe_gaps(gaps: List[Dict[str, str]], threshold: float) -> List[Dict[str, str]]:
+    """Merge gaps in the same section whose descriptions are near-duplicates."""
+    merged: List[Dict[str, str]] = []
+    for gap in gaps:
+        section = gap["section"].strip().lower()
+        for kept in merged:
+            if kept["section"].strip().lower() != section:
+                continue
+            if _similar(kept.get("gap_description", ""), gap.get("gap_description", "")) >= threshold:
+                kept["gap_description"] = f"{kept.get('gap_description', '')}\n{gap.get('gap_description', '')}"
+                if impact_score(gap) > impact_score(kept):
+                    kept["impact"] = gap.get("impact", "")
+                break
+        else:
+            merged.append(dict(gap))
+    return merged
+
+
+def plan_gaps(
+    gaps: List[Dict[str, str]],
+    max_gaps: int,
+    dedupe_threshold: float,
+) -> List[str]:
+    """De-duplicate, rank by impact and keep the ``max_gaps`` most important."""
+    ranked = sorted(dedupe_gaps(gaps, dedupe_threshold), key=impact_score, reverse=True)
+    if max_gaps > 0:
+        ranked = ranked[:max_gaps]
+    return [
+        f"{g['section']}\n{g.get('gap_description', '')}\n{g.get('impact', '')}"
+        for g in ranked
+    ]
@@ -1,4 +1,4 @@
-import json
+import time
 from langgraph.prebuilt import create_react_agent
 from langchain_mcp_adapters.client import MultiServerMCPClient
 from langchain_core.messages import HumanMessage, AIMessage,ToolMessage
@@ -10,6 +10,29 @@ from langgraph.config import get_stream_writer
 from langgraph.types import Send
 from .state import *
 from .utils import *
+from .rate_limiter import Priority, llm_context
+from .gaps import impact_score, parse_gaps, plan_gaps
+from .compaction import compact_messages
+from .sections import match_section, report_change, section_level, splice_sections, split_sections
+from .usage import cost, tokens_used
+from .rate_limiter import current_job
+from .routing import get_fallback_llm, get_route_llm
+from config.settings import (
+    gap_fill_max_gaps,
+    gap_dedupe_threshold,
+    reflection_max_rounds,
+    reflection_min_gap_impact,
+    reflection_min_change,
+    job_time_budget_seconds,
+    job_token_budget,
+    job_cost_budget,
+)
+
+# Appended to the type-specific merge prompt when only some sections are sent.
+SECTION_SCOPE_NOTE = """
+
+SCOPE: The "Original Report" above is an excerpt containing only the sections that need updating. Output ONLY those same sections, keeping each section's original Markdown heading text exactly as given. If new information belongs to a section that is not in the excerpt, output it as a new section with its own heading at the same level. Do not output any other section. Keep existing citation numbers and continue numbering new sources after the highest number already used in the References section.
+"""
 
 
 async def make_graph(
@@ -17,97 +40,223 @@ async def make_graph(
     reflection_instructions_prompt,
     fill_gaps_prompt,
     merge_gaps_prompt,
-    k: int = 2,
+    k: int = reflection_max_rounds,
+    checkpointer=None,
+    analysis_type: str = "",
 ):
 
-    llm = get_llm()
+    gaps_llm = get_route_llm("find_gaps", analysis_type)
+    fill_llm = get_route_llm("fill_gaps", analysis_type)
+    merge_llm = get_route_llm("merge", analysis_type)
+    fallback_llm = get_fallback_llm()
 
     react_agent = create_react_agent(
-        model=llm,
+        model=fill_llm,
         tools=tools,
-        
+        pre_model_hook=compact_messages,
+        # each fill_gaps run is one node of the outer graph: checkpoint the
+        # outer graph only, an interrupted fill is simply re-run
+        checkpointer=False,
     )
     
+    def budget_exhausted(state: AgentState) -> str:
+        """Name of the per-job budget that ran out, or an empty string."""
+        started_at = state.get("started_at")
+        if job_time_budget_seconds and started_at and time.time() - started_at >= job_time_budget_seconds:
+            return "time_budget"
+        if job_token_budget and tokens_used(current_job.get()) >= job_token_budget:
+            return "token_budget"
+        if job_cost_budget and cost(current_job.get()) >= job_cost_budget:
+            return "cost_budget"
+        return ""
+
     async def find_gaps(state: AgentState):
+        stop_reason = budget_exhausted(state)
+        if stop_reason:
+            return {"knowledge_gaps": "[]", "stop_reason": stop_reason}
+
         report = state['report'] 
         rf_prompt = reflection_instructions_prompt.invoke(
             {"report": report}
         )
 
-        response = call_llm_with_backoff(
-            llm, [HumanMessage(content=rf_prompt.to_string())]
+        response = await acall_llm_with_backoff(
+            gaps_llm, [HumanMessage(content=rf_prompt.to_string())], fallback=fallback_llm
         )
         response = str(response.content) if response else "No Gaps Found"
 
         if response.startswith("```json"):
             response = response[7:-3]  # Remove the markdown code block formatting
 
-        return {"knowledge_gaps":response}
+        # Converged when nothing material is left to fill
+        try:
+            gaps = parse_gaps(response)
+        except ValueError:
+            gaps = []
+        if not gaps:
+            stop_reason = "no_gaps"
+        elif max(impact_score(g) for g in gaps) < reflection_min_gap_impact:
+            stop_reason = "low_impact_gaps"
+
+        return {"knowledge_gaps":response, "stop_reason": stop_reason}
 
     async def continue_to_fill_gaps(state: AgentState):
+        """Fan out one fill_gaps run per gap, highest impact first.
 
-        gaps = json.loads(state["knowledge_gaps"])
-        knowledge_gaps = []
-        for kg in gaps:
-            section = kg['section']
-            gap_description = kg['gap_description'] 
-            impact = kg['impact']
+        How many of them run at once is bounded by the ``max_concurrency``
+        the caller passes in the run config.
+        """
+        if state.get("stop_reason"):
+            return "final"
 
-            knowledge_gaps.append(section + "\n" + gap_description + "\n" + impact)
+        knowledge_gaps = plan_gaps(
+            parse_gaps(state["knowledge_gaps"]),
+            max_gaps=gap_fill_max_gaps,
+            dedupe_threshold=gap_dedupe_threshold,
+        )
 
         return [Send("fill_gaps", {'kg_gap': kg}) for kg in knowledge_gaps]
 
     async def fill_gaps(state: AgentState):
 
         curr_gap = state["kg_gap"]
-        
+        # a budget ran out while this round was queued: skip the search,
+        # merge_filled_gaps then keeps the report as it is
+        if budget_exhausted(state):
+            return {"filled_gaps": []}
+
         fill_prompt = fill_gaps_prompt.invoke(
             {"gaps": curr_gap}
         )
 
-        response = react_agent.astream(
-            {"messages": [{"role": "user", "content": fill_prompt.to_string()}]},
-            stream_mode=["values"],
-        )
         writer = get_stream_writer()  
         ans = ""
 
-        async for stream_mode,message  in response:
-            if(stream_mode == "values"):
-                last = message["messages"] # type: ignore
-                if isinstance(last[-1], AIMessage):
-                    ans = message["messages"][-1].content  # type: ignore
-                    writer({'react_agent': message}) 
+        with llm_context(priority=Priority.BACKGROUND):
+            response = react_agent.astream(
+                {"messages": [{"role": "user", "content": fill_prompt.to_string()}]},
+                stream_mode=["values"],
+            )
+
+            async for stream_mode,message  in response:
+                if(stream_mode == "values"):
+                    last = message["messages"] # type: ignore
+                    if isinstance(last[-1], AIMessage):
+                        ans = message["messages"][-1].content  # type: ignore
+                        writer({'react_agent': message}) 
            
 
-        return {"filled_gaps": ans}
+        return {"filled_gaps": [{"section": curr_gap.split("\n", 1)[0], "content": ans}]}
 
-    async def merge_filled_gaps(state: AgentState):
-        filled_gaps = state["filled_gaps"]
-        report = state["report"]
-        
+    async def merge_full_report(report: str, filled_gaps: List[str]):
         merge_prompt = merge_gaps_prompt.invoke(
             {"report": report, "filled_gaps": filled_gaps}
         )
 
-        response = call_llm_with_backoff(
-            llm, [HumanMessage(content=merge_prompt.to_string())]
+        with llm_context(priority=Priority.INTERACTIVE):
+            return await acall_llm_with_backoff(
+                merge_llm, [HumanMessage(content=merge_prompt.to_string())], fallback=fallback_llm
+            )
+
+    async def merge_sections(report: str, filled_gaps: List[dict]):
+        """
+        Merge only the sections targeted by gaps (plus References, so the
+        citation numbering stays consistent) and splice them back into the
+        untouched report. Sections the merge adds are inserted before
+        References. Returns None when there is no excerpt to send (no gap
+        matches a section and there are no References) or the output can't
+        be mapped onto the report's sections, in which case the caller
+        merges in full.
+        """
+        level = section_level(report)
+        sections = split_sections(report, level)
+        headings = [h for h, _ in sections]
+        targets = set()
+        for gap in filled_gaps:
+            # a gap for a section the report lacks becomes a new section
+            idx = match_section(gap["section"], headings)
+            if idx is not None:
+                targets.add(idx)
+
+        refs_idx = match_section("References", headings)
+        if refs_idx is not None:
+            targets.add(refs_idx)
+        scope = sorted(targets)
+        if not scope:
+            return None, None
+
+        merge_prompt = merge_gaps_prompt.invoke(
+            {
+                "report": "".join(sections[i][1] for i in scope),
+                "filled_gaps": [gap["content"] for gap in filled_gaps],
+            }
         )
+        with llm_context(priority=Priority.INTERACTIVE):
+            response = await acall_llm_with_backoff(
+                merge_llm,
+                [HumanMessage(content=merge_prompt.to_string() + SECTION_SCOPE_NOTE)],
+                fallback=fallback_llm,
+            )
+        if not response:
+            return None, None
+
+        scoped_headings = [headings[i] for i in scope]
+        replacements = {}
+        additions = []
+        for heading, body in split_sections(str(response.content), level):
+            idx = match_section(heading, scoped_headings)
+            if idx is not None:
+                replacements[scope[idx]] = body
+            elif heading:
+                additions.append(body)
+        if not replacements and not additions:
+            return None, None
+
+        return response, splice_sections(sections, replacements, additions, before=refs_idx)
+
+    async def merge_filled_gaps(state: AgentState):
+        filled_gaps = [gap for gap in state["filled_gaps"] if gap["content"]]
+        report = state["report"]
+
+        if not filled_gaps:
+            return {
+                "k": state["k"] + 1,
+                "filled_gaps": "DELETE",
+                "stop_reason": budget_exhausted(state) or "no_gaps",
+            }
+
+        response, merged = await merge_sections(report, filled_gaps)
+        if merged is None:
+            response = await merge_full_report(
+                report, [gap["content"] for gap in filled_gaps]
+            )
+            merged = str(response.content) if response else report
+        stop_reason = ""
+        if report_change(report, merged) < reflection_min_change:
+            stop_reason = "converged"
 
         return {
-            "messages": [HumanMessage(content=response.content if response else "")],
+            "messages": [HumanMessage(content=merged)],
             "k": state["k"] + 1,
-            "report": response.content , # type: ignore
-            "filled_gaps":"DELETE"
+            "report": merged,
+            "filled_gaps":"DELETE",
+            "stop_reason": stop_reason or budget_exhausted(state),
         }
 
     async def route_loop(state: AgentState):
         """After merge_filled_gaps decide to iterate or finish."""
+        if state.get("stop_reason"):
+            return "final"
         return "find_gaps" if state["k"] < k else "final"
 
     async def final_node(state: AgentState):
-        """Final node to return the final report."""
-        return {"report": state["report"]}
+        """Final node to return the final report and why the loop stopped."""
+        rounds = state["k"]
+        return {
+            "report": state["report"],
+            "stop_reason": state.get("stop_reason") or "max_rounds",
+            "k": rounds,
+        }
 
     # 5.  Build the graph
     workflow = StateGraph(AgentState)
@@ -118,14 +267,14 @@ async def make_graph(
     
 
     workflow.set_entry_point("find_gaps")  # Start with finding gaps
-    workflow.add_conditional_edges("find_gaps",continue_to_fill_gaps,['fill_gaps'])  # type: ignore
+    workflow.add_conditional_edges("find_gaps",continue_to_fill_gaps,['fill_gaps', 'final'])  # type: ignore
     workflow.add_edge("fill_gaps", "merge_filled_gaps")
     workflow.add_conditional_edges(
         "merge_filled_gaps", route_loop, ["find_gaps", "final"]
     )
     workflow.add_edge("final", END)
 
-    graph = workflow.compile()
+    graph = workflow.compile(checkpointer=checkpointer)
     # graph.get_graph().draw_mermaid_png(output_file_path="./graph.png")
 
     return graph
@@ -0,0 +1,163 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """
+    Content address for a call: the model/parameter string plus the
+    serialized messages with runs of whitespace collapsed, so re-rendered
+    prompts that only differ in formatting still hit.
+    """
+    normalized = " ".join(prompt.split())
+    return hashlib.sha256(f"{llm_string}\x00{normalized}".encode()).hexdigest()
+
+
+class TieredLLMCache(BaseCache):
+    """
+    LangChain cache with an in-memory LRU tier in front of a SQLite tier.
+
+    Entries older than ``ttl`` seconds are treated as misses and removed.
+    The memory tier holds at most ``max_memory_items`` entries and the disk
+    tier is pruned back to ``max_disk_items`` (least recently used first).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = 7 * 24 * 3600,
+        max_memory_items: int = 512,
+        max_disk_items: int = 20000,
+        prune_every: int = 100,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_memory_items = max_memory_items
+        self.max_disk_items = max_disk_items
+        self.prune_every = prune_every
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[float, RETURN_VAL_TYPE]]" = OrderedDict()
+        self._writes = 0
+        self.counters: Dict[str, int] = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0,
+        }
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache(accessed)"
+        )
+        self._conn.commit()
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl > 0 and now - created > self.ttl
+
+    def _remember(self, key: str, created: float, value: RETURN_VAL_TYPE) -> None:
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    # ---------- BaseCache ----------
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = cache_key(prompt, llm_string)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and not self._expired(entry[0], now):
+                self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return entry[1]
+            self._memory.pop(key, None)
+
+            row = self._conn.execute(
+                "SELECT value, created FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.counters["misses"] += 1
+                return None
+
+            value, created = row
+            if self._expired(created, now):
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self.counters["misses"] += 1
+                self.counters["evictions"] += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE llm_cache SET accessed = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            generations = loads(value)
+            self._remember(key, created, generations)
+            self.counters["disk_hits"] += 1
+            return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = cache_key(prompt, llm_string)
+        now = time.time()
+
+        with self._lock:
+            self._remember(key, now, return_val)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created, accessed)"
+                " VALUES (?, ?, ?, ?)",
+                (key, dumps(return_val), now, now),
+            )
+            self._writes += 1
+            self.counters["writes"] += 1
+            if self._writes % self.prune_every == 0:
+                self._prune(now)
+            self._conn.commit()
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    # ---------- eviction ----------
+    def _prune(self, now: float) -> None:
+        removed = 0
+        if self.ttl > 0:
+            removed += self._conn.execute(
+                "DELETE FROM llm_cache WHERE created < ?", (now - self.ttl,)
+            ).rowcount
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        if count > self.max_disk_items:
+            removed += self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                " SELECT key FROM llm_cache ORDER BY accessed ASC LIMIT ?)",
+                (count - self.max_disk_items,),
+            ).rowcount
+        self.counters["evictions"] += removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+            total = hits + self.counters["misses"]
+            return {
+                **self.counters,
+                "memory_items": len(self._memory),
+                "hit_rate": round(hits / total, 3) if total else None,
+            }
@@ -0,0 +1,197 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, Deque, Dict, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.rate_limiters import BaseRateLimiter
+
+
+class Priority(IntEnum):
+    """Lower value is served first."""
+
+    INTERACTIVE = 0  # merge: the user is waiting on it
+    NORMAL = 1  # initial report, gap extraction
+    BACKGROUND = 2  # gap filling ReAct runs
+
+
+current_priority: ContextVar[int] = ContextVar("llm_priority", default=Priority.NORMAL)
+current_job: ContextVar[str] = ContextVar("llm_job", default="")
+
+
+@contextmanager
+def llm_context(job_id: Optional[str] = None, priority: Optional[int] = None):
+    """Tag every LLM call made inside the block with a job id and/or lane."""
+    tokens = []
+    if job_id is not None:
+        tokens.append((current_job, current_job.set(job_id)))
+    if priority is not None:
+        tokens.append((current_priority, current_priority.set(priority)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+class SharedRateLimiter(BaseRateLimiter):
+    """
+    Process-wide token bucket for both requests and LLM tokens.
+
+    Requests are granted one at a time from the request bucket, and only
+    while the token bucket is positive. Token usage is debited after each
+    call by ``UsageDebitHandler`` (the bucket may go negative, which pauses
+    further grants until it refills).
+
+    Async waiters are served by priority lane first, then round-robin over
+    the jobs waiting in that lane so one job's burst of calls cannot starve
+    the others.
+    """
+
+    def __init__(
+        self,
+        requests_per_second: float,
+        tokens_per_minute: float,
+        max_bucket_size: float = 10,
+        check_every_n_seconds: float = 0.1,
+    ):
+        self.requests_per_second = requests_per_second
+        self.tokens_per_second = tokens_per_minute / 60
+        self.max_bucket_size = max_bucket_size
+        self.max_token_bucket = tokens_per_minute
+        self.check_every_n_seconds = check_every_n_seconds
+
+        self._lock = threading.Lock()
+        self._requests = 0.0
+        self._tokens = float(tokens_per_minute)
+        self._last: Optional[float] = None
+
+        # priority -> job id -> waiting futures (FIFO per job)
+        self._waiters: Dict[int, "OrderedDict[str, Deque[asyncio.Future]]"] = {}
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    # ---------- bucket ----------
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self._last is None:
+            self._last = now
+        elapsed = now - self._last
+        self._last = now
+        self._requests = min(
+            self.max_bucket_size, self._requests + elapsed * self.requests_per_second
+        )
+        self._tokens = min(
+            self.max_token_bucket, self._tokens + elapsed * self.tokens_per_second
+        )
+
+    def _consume(self) -> bool:
+        with self._lock:
+            self._refill()
+            if self._requests >= 1 and self._tokens > 0:
+                self._requests -= 1
+                return True
+            return False
+
+    def debit_tokens(self, n: int) -> None:
+        with self._lock:
+            self._refill()
+            self._tokens -= n
+
+    # ---------- BaseRateLimiter ----------
+    def acquire(self, *, blocking: bool = True) -> bool:
+        if not blocking:
+            return self._consume()
+        while not self._consume():
+            time.sleep(self.check_every_n_seconds)
+        return True
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        if not blocking:
+            return self._consume()
+
+        fut = asyncio.get_running_loop().create_future()
+        lane = self._waiters.setdefault(int(current_priority.get()), OrderedDict())
+        lane.setdefault(current_job.get(), deque()).append(fut)
+        self._ensure_dispatcher()
+        await fut
+        return True
+
+    # ---------- fair dispatch ----------
+    def _ensure_dispatcher(self) -> None:
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch())
+
+    def _next_waiter(self) -> Optional[asyncio.Future]:
+        for priority in sorted(self._waiters):
+            lane = self._waiters[priority]
+            while lane:
+                job, futures = next(iter(lane.items()))
+                fut = futures.popleft()
+                if futures:
+                    # rotate the job to the back of its lane
+                    lane.move_to_end(job)
+                else:
+                    del lane[job]
+                if not fut.done():
+                    return fut
+            del self._waiters[priority]
+        return None
+
+    def _has_waiters(self) -> bool:
+        return any(self._waiters.values())
+
+    async def _dispatch(self) -> None:
+        while self._has_waiters():
+            if not self._consume():
+                await asyncio.sleep(self.check_every_n_seconds)
+                continue
+            fut = self._next_waiter()
+            if fut is None:
+                # nobody left to hand the request to: give it back
+                with self._lock:
+                    self._requests += 1
+                break
+            fut.set_result(True)
+            await asyncio.sleep(0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refill()
+            return {
+                "request_bucket": round(self._requests, 3),
+                "token_bucket": round(self._tokens),
+                "waiting": {
+                    Priority(p).name.lower(): sum(len(f) for f in lane.values())
+                    for p, lane in self._waiters.items()
+                },
+            }
+
+
+def response_tokens(response: LLMResult) -> int:
+    """Total tokens reported in a response's usage metadata."""
+    total = 0
+    for generations in response.generations:
+        for gen in generations:
+            usage = getattr(getattr(gen, "message", None), "usage_metadata", None)
+            if usage:
+                total += usage.get("total_tokens", 0)
+    return total
+
+
+class UsageDebitHandler(BaseCallbackHandler):
+    """Debits the shared token bucket with the usage reported by each call."""
+
+    run_inline = True
+
+    def __init__(self, limiter: SharedRateLimiter):
+        self.limiter = limiter
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        total = response_tokens(response)
+        if total:
+            self.limiter.debit_tokens(total)
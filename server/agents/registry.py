@@ -0,0 +1,109 @@
+import asyncio
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.tools import BaseTool
+from langgraph.prebuilt import create_react_agent
+
+from config.settings import cassette_mode
+from .cassette import RECORD, instrument_tools
+from .compaction import compact_messages
+from .graph import make_graph
+from .routing import get_route_llm
+
+# analysis type -> (initial ReAct agent, reflection graph)
+_agents: Dict[str, Tuple[Any, Any]] = {}
+_tools_fingerprint: Optional[str] = None
+_checkpointer = None
+_lock = asyncio.Lock()
+
+
+def tools_fingerprint(tools: List[BaseTool]) -> str:
+    """Stable hash of the tool names, descriptions and argument schemas."""
+    spec = []
+    for tool in tools:
+        try:
+            args = tool.args
+        except Exception:
+            args = {}
+        spec.append([tool.name, tool.description, args])
+    spec.sort(key=lambda s: s[0])
+    return hashlib.sha256(json.dumps(spec, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def set_checkpointer(checkpointer) -> None:
+    """Use a durable checkpointer for every agent compiled from now on."""
+    global _checkpointer
+    _checkpointer = checkpointer
+    invalidate()
+
+
+def get_checkpointer():
+    return _checkpointer
+
+
+def invalidate() -> None:
+    """Drop every compiled agent; they are rebuilt on next use."""
+    global _tools_fingerprint
+    _agents.clear()
+    _tools_fingerprint = None
+
+
+async def get_agents(
+    analysis_type: str,
+    tools: List[BaseTool],
+    PROMPT: str,
+    reflection_instructions_prompt,
+    fill_gaps_prompt,
+    merge_gaps_prompt,
+) -> Tuple[Any, Any]:
+    """
+    Return the compiled ``(react_agent, graph)`` pair for an analysis type,
+    compiling it on first use. Compiled LangGraph graphs hold no per-run
+    state, so one pair is shared by every job of that type. The cache is
+    dropped whenever the MCP tool set changes.
+    """
+    global _tools_fingerprint
+
+    if cassette_mode == RECORD:
+        tools = instrument_tools(tools)
+
+    fingerprint = tools_fingerprint(tools)
+    cached = _agents.get(analysis_type)
+    if cached and fingerprint == _tools_fingerprint:
+        return cached
+
+    async with _lock:
+        if fingerprint != _tools_fingerprint:
+            if _tools_fingerprint is not None:
+                print("MCP tool set changed, recompiling agents")
+            _agents.clear()
+            _tools_fingerprint = fingerprint
+
+        if analysis_type not in _agents:
+            llm = get_route_llm("initial", analysis_type)
+            graph = await make_graph(
+                tools=tools,
+                reflection_instructions_prompt=reflection_instructions_prompt,
+                fill_gaps_prompt=fill_gaps_prompt,
+                merge_gaps_prompt=merge_gaps_prompt,
+                checkpointer=_checkpointer,
+                analysis_type=analysis_type,
+            )
+            react_agent = create_react_agent(
+                model=llm,
+                tools=tools,
+                prompt=PROMPT,
+                pre_model_hook=compact_messages,
+                checkpointer=_checkpointer,
+            )
+            _agents[analysis_type] = (react_agent, graph)
+
+        return _agents[analysis_type]
+
+
+async def warm_up(tools: List[BaseTool], prompts: Dict[str, dict]) -> None:
+    """Compile every analysis type up front so the first job pays nothing."""
+    for analysis_type, bundle in prompts.items():
+        await get_agents(analysis_type, tools, **bundle)
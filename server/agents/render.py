@@ -0,0 +1,134 @@
+import asyncio
+import hashlib
+import os
+import shutil
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Deque, Dict, Optional
+
+from config.settings import (
+    output_dir,
+    pdf_render_workers,
+    pdf_render_queue_size,
+    pdf_render_timeout_seconds,
+)
+
+
+class RenderTimeout(TimeoutError):
+    pass
+
+
+def _render_pdf(markdown: str, title: str, path: str) -> None:
+    """Runs in a worker process: markdown -> PDF is CPU bound."""
+    from markdown_pdf import MarkdownPdf, Section
+
+    pdf = MarkdownPdf()
+    pdf.meta["title"] = title
+    pdf.add_section(Section(markdown, toc=False))
+    # write then rename so a concurrent cache hit never sees a partial file
+    tmp = f"{path}.{os.getpid()}.tmp"
+    pdf.save(tmp)
+    os.replace(tmp, path)
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+_slots: Optional[asyncio.Semaphore] = None
+_cache_dir = os.path.join(output_dir, ".render_cache")
+
+_durations: Deque[float] = deque(maxlen=200)
+stats_counters: Dict[str, int] = {"renders": 0, "cache_hits": 0, "timeouts": 0, "failures": 0}
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor, _slots
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=pdf_render_workers)
+        # running renders plus the ones allowed to wait for a worker
+        _slots = asyncio.Semaphore(pdf_render_workers + pdf_render_queue_size)
+    return _executor
+
+
+def _release(loop: asyncio.AbstractEventLoop, slots: asyncio.Semaphore) -> None:
+    """Done callback of a render future; runs in the executor's thread."""
+    try:
+        loop.call_soon_threadsafe(slots.release)
+    except RuntimeError:
+        pass  # loop already closed at shutdown
+
+
+def content_hash(markdown: str, title: str) -> str:
+    return hashlib.sha256(f"{title}\x00{markdown}".encode()).hexdigest()
+
+
+async def render_report(markdown: str, title: Any, path: str) -> str:
+    """
+    Render a Markdown report to ``path`` in the rendering process pool.
+
+    Output is cached by content hash, so re-rendering an unchanged report is
+    a file copy. At most ``PDF_RENDER_WORKERS + PDF_RENDER_QUEUE_SIZE``
+    renders are admitted at once; waiting for a slot counts towards the
+    timeout. Raises ``RenderTimeout`` past ``PDF_RENDER_TIMEOUT_SECONDS``;
+    a render already running finishes in the background and holds its slot
+    until then.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.makedirs(_cache_dir, exist_ok=True)
+    cached = os.path.join(_cache_dir, f"{content_hash(markdown, str(title))}.pdf")
+
+    if os.path.isfile(cached):
+        await asyncio.to_thread(shutil.copyfile, cached, path)
+        stats_counters["cache_hits"] += 1
+        return path
+
+    executor = _get_executor()
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    slots = _slots
+
+    try:
+        await asyncio.wait_for(slots.acquire(), timeout=pdf_render_timeout_seconds)  # type: ignore
+    except asyncio.TimeoutError:
+        stats_counters["timeouts"] += 1
+        raise RenderTimeout(f"PDF rendering exceeded {pdf_render_timeout_seconds}s")
+
+    # the slot belongs to the render, not to this caller: a render that
+    # outlives the timeout keeps its worker busy, so it keeps its slot too
+    future = executor.submit(_render_pdf, markdown, title, cached)
+    future.add_done_callback(lambda _: _release(loop, slots))
+
+    remaining = pdf_render_timeout_seconds - (time.perf_counter() - start)
+    try:
+        await asyncio.wait_for(asyncio.wrap_future(future), timeout=max(0.0, remaining))
+    except asyncio.TimeoutError:
+        # cancelling only helps while it still waits for a worker
+        stats_counters["timeouts"] += 1
+        raise RenderTimeout(f"PDF rendering exceeded {pdf_render_timeout_seconds}s")
+    except Exception:
+        stats_counters["failures"] += 1
+        raise
+
+    _durations.append(time.perf_counter() - start)
+    stats_counters["renders"] += 1
+    await asyncio.to_thread(shutil.copyfile, cached, path)
+    return path
+
+
+def stats() -> Dict[str, Any]:
+    ordered = sorted(_durations)
+    return {
+        **stats_counters,
+        "render_seconds": {
+            "last": round(_durations[-1], 3) if _durations else None,
+            "avg": round(sum(ordered) / len(ordered), 3) if ordered else None,
+            "p95": round(ordered[int(0.95 * (len(ordered) - 1))], 3) if ordered else None,
+        },
+    }
+
+
+def shutdown() -> None:
+    global _executor, _slots
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+        _slots = None
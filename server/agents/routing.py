@@ -0,0 +1,173 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from config import google_api_key
+from config.settings import cassette_mode, llm_fallback_model, llm_routes
+from .cassette import REPLAY, CassetteRecorder, ReplayChatModel
+from .rate_limiter import UsageDebitHandler
+from .usage import UsageTracker
+from .utils import llm_cache, rate_limiter
+
+# Graph nodes that call a model.
+NODES = ("initial", "find_gaps", "fill_gaps", "merge")
+
+# Built-in routing table: cheap, fast models on gap extraction and the tool
+# loops, the larger model on the long-form passes. LLM_ROUTES overrides it.
+DEFAULT_ROUTES: Dict[str, dict] = {
+    "default": {"model": "gemini-2.0-flash", "temperature": 0.7, "max_tokens": None, "timeout": None},
+    "find_gaps": {"model": "gemini-2.0-flash-lite", "temperature": 0.0},
+    "fill_gaps": {"model": "gemini-2.0-flash-lite", "temperature": 0.3},
+    "merge": {"model": "gemini-2.0-flash", "temperature": 0.2},
+}
+if llm_fallback_model:
+    # retried calls switch to this route once the primary model keeps failing
+    DEFAULT_ROUTES["fallback"] = {"model": llm_fallback_model}
+
+
+def resolve_route(node: str, analysis_type: str = "") -> dict:
+    """
+    Settings for ``node`` when running ``analysis_type``. Later entries win:
+    built-in default, built-in node, LLM_ROUTES ``default``, LLM_ROUTES
+    ``<node>``, LLM_ROUTES ``<analysis type>/<node>``.
+    """
+    route: dict = {}
+    for table in (DEFAULT_ROUTES, llm_routes):
+        route.update(table.get("default", {}))
+        route.update(table.get(node, {}))
+    if analysis_type:
+        route.update(llm_routes.get(f"{analysis_type}/{node}", {}))
+    return route
+
+
+class RouteStats(BaseCallbackHandler):
+    """Latency and token usage of every call made through one route."""
+
+    run_inline = True
+
+    def __init__(self, route: str, model: str):
+        self.route = route
+        self.model = model
+        self.calls = 0
+        self.errors = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self._started: Dict[UUID, float] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized: Any, messages: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = time.monotonic()
+
+    def on_llm_start(self, serialized: Any, prompts: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = time.monotonic()
+
+    def _finish(self, run_id: UUID) -> float:
+        started = self._started.pop(run_id, None)
+        return time.monotonic() - started if started is not None else 0.0
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        elapsed = self._finish(run_id)
+        with self._lock:
+            self.calls += 1
+            self.latency_total += elapsed
+            self.latency_max = max(self.latency_max, elapsed)
+            for generations in response.generations:
+                for gen in generations:
+                    usage = getattr(getattr(gen, "message", None), "usage_metadata", None)
+                    if usage:
+                        self.input_tokens += usage.get("input_tokens", 0)
+                        self.output_tokens += usage.get("output_tokens", 0)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id)
+        with self._lock:
+            self.errors += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "model": self.model,
+                "calls": self.calls,
+                "errors": self.errors,
+                "latency_avg": round(self.latency_total / self.calls, 3) if self.calls else 0.0,
+                "latency_max": round(self.latency_max, 3),
+                "input_tokens": self.input_tokens,
+                "output_tokens": self.output_tokens,
+            }
+
+
+# route key -> (client, stats)
+_routes: Dict[str, Tuple[ChatGoogleGenerativeAI, RouteStats]] = {}
+_routes_lock = threading.Lock()
+# (node, route, callbacks) -> chat model; replaces Gemini when set
+_client_factory: Optional[Callable[[str, dict, list], Any]] = None
+
+
+def set_client_factory(factory: Optional[Callable[[str, dict, list], Any]]) -> None:
+    """
+    Build every route's client with ``factory`` instead of Gemini (used by
+    the offline benchmarks). Clients created so far are dropped.
+    """
+    global _client_factory
+    with _routes_lock:
+        _client_factory = factory
+        _routes.clear()
+
+
+def gemini_client(node: str, route: dict, callbacks: list) -> ChatGoogleGenerativeAI:
+    return ChatGoogleGenerativeAI(
+        model=route["model"],
+        temperature=route.get("temperature"),
+        max_output_tokens=route.get("max_tokens"),
+        timeout=route.get("timeout"),
+        rate_limiter=rate_limiter,
+        google_api_key=google_api_key,
+        callbacks=[*callbacks, CassetteRecorder(node)],
+        cache=llm_cache,
+    )
+
+
+def replay_client(node: str, route: dict, callbacks: list) -> ReplayChatModel:
+    """Serves the active cassette's recordings (CASSETTE_MODE=replay)."""
+    return ReplayChatModel(node=node, callbacks=callbacks)
+
+
+def route_key(node: str, analysis_type: str = "") -> str:
+    return f"{analysis_type}/{node}" if analysis_type else node
+
+
+def get_route_llm(node: str, analysis_type: str = "") -> ChatGoogleGenerativeAI:
+    """
+    Client for one node of one analysis type. Every route shares the
+    process-wide rate limiter and response cache, but gets its own stats.
+    """
+    key = route_key(node, analysis_type)
+    with _routes_lock:
+        if key not in _routes:
+            route = resolve_route(node, analysis_type)
+            stats = RouteStats(key, route["model"])
+            factory = _client_factory or (replay_client if cassette_mode == REPLAY else gemini_client)
+            llm = factory(
+                node,
+                route,
+                [UsageDebitHandler(rate_limiter), UsageTracker(node, route["model"]), stats],
+            )
+            _routes[key] = (llm, stats)
+        return _routes[key][0]
+
+
+def get_fallback_llm() -> Optional[ChatGoogleGenerativeAI]:
+    """Client of the fallback route, or None when LLM_FALLBACK_MODEL is unset."""
+    return get_route_llm("fallback") if llm_fallback_model else None
+
+
+def stats() -> Dict[str, dict]:
+    with _routes_lock:
+        return {key: s.stats() for key, (_, s) in _routes.items()}
@@ -0,0 +1,129 @@
+import re
+from difflib import SequenceMatcher
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+_HEADING = re.compile(r"^(#{1,3})\s+(.+?)\s*#*\s*$")
+
+
+def _lines(markdown: str) -> Iterator[Tuple[str, Optional[re.Match]]]:
+    """Each line with its heading match; headings inside code fences don't count."""
+    in_code = False
+    for line in markdown.splitlines(keepends=True):
+        if line.lstrip().startswith("```"):
+            in_code = not in_code
+        yield line, None if in_code else _HEADING.match(line.rstrip("\n"))
+
+
+def section_level(markdown: str) -> int:
+    """
+    Heading level a report is divided into sections at: the shallowest one
+    used, except that a lone level-1 title is skipped in favour of the
+    level below it.
+    """
+    levels = [len(m.group(1)) for _, m in _lines(markdown) if m]
+    if not levels:
+        return 1
+    top = min(levels)
+    deeper = [l for l in levels if l > top]
+    if top == 1 and levels.count(1) == 1 and deeper:
+        return min(deeper)
+    return top
+
+
+def split_sections(markdown: str, level: Optional[int] = None) -> List[Tuple[str, str]]:
+    """
+    Split a Markdown report into ``(heading, body)`` pairs at headings of
+    ``level`` or shallower (by default the report's ``section_level``), so a
+    section owns its subsections. Text before the first heading gets an
+    empty heading. The heading line is kept at the start of its body so
+    joining the bodies gives back the original document.
+    """
+    if level is None:
+        level = section_level(markdown)
+
+    sections: List[Tuple[str, List[str]]] = [("", [])]
+    for line, match in _lines(markdown):
+        if match and len(match.group(1)) <= level:
+            sections.append((match.group(2).strip(), [line]))
+        else:
+            sections[-1][1].append(line)
+
+    result = [(heading, "".join(lines)) for heading, lines in sections]
+    if not result[0][1]:
+        result = result[1:]
+    return result
+
+
+def normalize_heading(heading: str) -> str:
+    """Lower-case a heading and drop numbering/punctuation for matching."""
+    heading = re.sub(r"^[\d.\s)]+", "", heading.lower())
+    return re.sub(r"[^a-z0-9]+", " ", heading).strip()
+
+
+def report_change(old: str, new: str) -> float:
+    """
+    Fraction of the report that changed, compared section by section and
+    weighted by section size. 0.0 means identical, 1.0 fully rewritten.
+    """
+    old_sections = {normalize_heading(h): b for h, b in split_sections(old)}
+    new_sections = {normalize_heading(h): b for h, b in split_sections(new)}
+
+    changed = 0.0
+    total = 0
+    for key in set(old_sections) | set(new_sections):
+        a = old_sections.get(key, "")
+        b = new_sections.get(key, "")
+        size = max(len(a), len(b))
+        if not size:
+            continue
+        ratio = SequenceMatcher(None, a.splitlines(), b.splitlines(), autojunk=False).ratio()
+        changed += (1 - ratio) * size
+        total += size
+
+    return changed / total if total else 0.0
+
+
+def match_section(name: str, headings: List[str]) -> Optional[int]:
+    """
+    Index of the heading that matches a section name (as written by the
+    reflection LLM), or None. Only exact and containment matches count, so
+    a section the report doesn't have is reported as missing rather than
+    mapped onto an unrelated heading.
+    """
+    target = normalize_heading(name)
+    if not target:
+        return None
+
+    normalized = [normalize_heading(h) for h in headings]
+    for idx, heading in enumerate(normalized):
+        if heading == target:
+            return idx
+    # whole words only: "market" matches "market size", "a" does not match "data"
+    padded = f" {target} "
+    for idx, heading in enumerate(normalized):
+        if heading and (padded in f" {heading} " or f" {heading} " in padded):
+            return idx
+    return None
+
+
+def splice_sections(
+    sections: List[Tuple[str, str]],
+    replacements: Dict[int, str],
+    additions: Sequence[str] = (),
+    before: Optional[int] = None,
+) -> str:
+    """
+    Rebuild a report, swapping in replacement bodies by section index and
+    inserting ``additions`` (new sections) before section ``before``, or at
+    the end when it is None.
+    """
+    bodies = [replacements.get(idx, body) for idx, (_, body) in enumerate(sections)]
+    at = len(bodies) if before is None else before
+    bodies[at:at] = list(additions)
+
+    parts: List[str] = []
+    for text in bodies:
+        if parts and not parts[-1].endswith("\n"):
+            parts[-1] += "\n"
+        parts.append(text)
+    return "".join(parts)
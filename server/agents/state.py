@@ -16,7 +16,11 @@ def custom_add_with_delete(left: List[str], right: str | List[str]) -> List[str]
 
 class AgentState(MessagesState):
     knowledge_gaps:str 
-    filled_gaps:Annotated[List[str], custom_add_with_delete]
+    # {"section": ..., "content": ...} per filled gap
+    filled_gaps:Annotated[List[Any], custom_add_with_delete]
     k : int 
     report : str
     kg_gap: str 
+    # set once the reflection loop decides to stop early (see make_graph)
+    stop_reason: str
+    started_at: float
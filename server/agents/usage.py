@@ -0,0 +1,136 @@
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from config.settings import llm_prices
+from .rate_limiter import current_job, response_tokens
+
+# USD per million (input, output) tokens; LLM_PRICES overrides or extends it.
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.0-flash-lite": (0.075, 0.30),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-pro": (1.25, 10.00),
+    **{model: tuple(price) for model, price in llm_prices.items()},
+}
+
+# job id -> total tokens reported by the provider
+_job_tokens: Dict[str, int] = defaultdict(int)
+# job id -> compacted message -> estimated prompt tokens its compaction saves
+_job_saved: Dict[str, Dict[str, int]] = defaultdict(dict)
+# job id -> (node, model) -> call / token counters
+_job_usage: Dict[str, Dict[Tuple[str, str], Dict[str, int]]] = defaultdict(dict)
+
+
+def tokens_used(job_id: str) -> int:
+    return _job_tokens.get(job_id, 0)
+
+
+def tokens_saved(job_id: str) -> int:
+    return sum(_job_saved.get(job_id, {}).values())
+
+
+def record_saved(job_id: str, saved: Dict[str, int]) -> None:
+    """Savings per compacted message; one compacted again on a later step counts once."""
+    if job_id:
+        _job_saved[job_id].update(saved)
+
+
+def price(model: str, input_tokens: int, output_tokens: int) -> float:
+    """Cost in USD; models without a known price cost nothing."""
+    in_price, out_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (input_tokens * in_price + output_tokens * out_price) / 1_000_000
+
+
+def cost(job_id: str) -> float:
+    return sum(
+        price(model, c["input_tokens"], c["output_tokens"])
+        for (_, model), c in _job_usage.get(job_id, {}).items()
+    )
+
+
+def is_tracked(job_id: str) -> bool:
+    return job_id in _job_usage
+
+
+def _add(totals: Dict[str, Any], counters: Dict[str, int], usd: float) -> None:
+    for name, n in counters.items():
+        totals[name] = totals.get(name, 0) + n
+    totals["cost_usd"] = round(totals.get("cost_usd", 0.0) + usd, 6)
+
+
+def summary(job_id: str) -> dict:
+    """
+    Usage of one job: totals plus breakdowns per node and per model, and
+    the raw counters per (node, model) that ``restore`` reads back.
+    """
+    totals: Dict[str, Any] = {"calls": 0, "input_tokens": 0, "output_tokens": 0, "total_tokens": 0, "cost_usd": 0.0}
+    by_node: Dict[str, dict] = {}
+    by_model: Dict[str, dict] = {}
+    routes: List[dict] = []
+    for (node, model), counters in _job_usage.get(job_id, {}).items():
+        usd = price(model, counters["input_tokens"], counters["output_tokens"])
+        _add(totals, counters, usd)
+        _add(by_node.setdefault(node, {}), counters, usd)
+        _add(by_model.setdefault(model, {}), counters, usd)
+        routes.append({"node": node, "model": model, **counters})
+    return {**totals, "by_node": by_node, "by_model": by_model, "by_node_model": routes}
+
+
+def restore(job_id: str, saved: Optional[dict], tokens_saved: int = 0) -> None:
+    """
+    Continue from the usage an earlier attempt of the job persisted, so a
+    resumed run's totals, cost and budgets cover the whole analysis rather
+    than only the part after the restart.
+    """
+    for route in (saved or {}).get("by_node_model", []):
+        counters = _job_usage[job_id].setdefault(
+            (route["node"], route["model"]),
+            {"calls": 0, "input_tokens": 0, "output_tokens": 0, "total_tokens": 0},
+        )
+        for name in counters:
+            counters[name] += route.get(name, 0)
+        _job_tokens[job_id] += route.get("total_tokens", 0)
+    if tokens_saved:
+        _job_saved[job_id]["earlier attempts"] = tokens_saved
+
+
+def reset(job_id: str) -> None:
+    _job_tokens.pop(job_id, None)
+    _job_saved.pop(job_id, None)
+    _job_usage.pop(job_id, None)
+
+
+class UsageTracker(BaseCallbackHandler):
+    """
+    Adds each call's token usage to the job found in ``current_job``,
+    attributed to the node the client serves and the model that answered.
+    """
+
+    run_inline = True
+
+    def __init__(self, node: str = "default", model: Optional[str] = None):
+        self.node = node
+        self.model = model
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        job_id = current_job.get()
+        if not job_id:
+            return
+
+        _job_tokens[job_id] += response_tokens(response)
+        for generations in response.generations:
+            for gen in generations:
+                message = getattr(gen, "message", None)
+                model = (getattr(message, "response_metadata", None) or {}).get("model_name") or self.model or "unknown"
+                counters = _job_usage[job_id].setdefault(
+                    (self.node, model),
+                    {"calls": 0, "input_tokens": 0, "output_tokens": 0, "total_tokens": 0},
+                )
+                usage = getattr(message, "usage_metadata", None) or {}
+                counters["calls"] += 1
+                counters["input_tokens"] += usage.get("input_tokens", 0)
+                counters["output_tokens"] += usage.get("output_tokens", 0)
+                counters["total_tokens"] += usage.get("total_tokens", 0)
@@ -1,53 +1,70 @@
+import asyncio
 import random
-import time
+from typing import Optional
 from google.api_core.exceptions import ServiceUnavailable
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.rate_limiters import InMemoryRateLimiter
-from config import google_api_key
+from config.settings import (
+    llm_requests_per_second,
+    llm_tokens_per_minute,
+    llm_max_burst,
+    llm_cache_enabled,
+    llm_cache_path,
+    llm_cache_ttl_seconds,
+    llm_cache_max_memory_items,
+    llm_cache_max_disk_items,
+)
+from .rate_limiter import SharedRateLimiter
+from .llm_cache import TieredLLMCache
 
-def call_llm_with_backoff(llm, messages, max_retries=5, base_delay=1):
-    """Call LLM with exponential backoff retry logic."""
-    for attempt in range(max_retries):
-        try:
-            return llm.invoke(messages)
-        except ServiceUnavailable as e:
-            if attempt == max_retries - 1:
-                raise e
-            
-            # Exponential backoff with jitter
-            delay = base_delay * (2 ** attempt) + random.uniform(0, 1)
-            print(f"Model overloaded. Retrying in {delay:.2f} seconds... (attempt {attempt + 1}/{max_retries})")
-            time.sleep(delay)
-        except Exception as e:
-            # For other exceptions, don't retry
-            raise e
 
-def call_tool_llm_with_backoff(tool_llm, messages, max_retries=5, base_delay=1):
-    """Call tool-bound LLM with exponential backoff retry logic."""
+async def acall_llm_with_backoff(
+    llm,
+    messages,
+    max_retries=5,
+    base_delay=1,
+    max_delay=30,
+    fallback=None,
+    fallback_after=2,
+):
+    """
+    Call an LLM (plain or tool-bound) with ``ainvoke``, retrying on
+    ServiceUnavailable with exponential backoff and jitter. Backoff uses
+    ``asyncio.sleep`` so other jobs keep streaming while we wait. Once the
+    primary model has failed ``fallback_after`` times, the remaining attempts
+    go to ``fallback`` when one is given.
+    """
+    model = llm
     for attempt in range(max_retries):
         try:
-            return tool_llm.invoke(messages)
+            return await model.ainvoke(messages)
         except ServiceUnavailable as e:
             if attempt == max_retries - 1:
                 raise e
-            
+
+            if fallback is not None and attempt + 1 >= fallback_after and model is not fallback:
+                print(f"Model overloaded. Switching to fallback model (attempt {attempt + 1}/{max_retries})")
+                model = fallback
+                continue
+
             # Exponential backoff with jitter
-            delay = base_delay * (2 ** attempt) + random.uniform(0, 1)
+            delay = min(max_delay, base_delay * (2 ** attempt)) + random.uniform(0, 1)
             print(f"Model overloaded. Retrying in {delay:.2f} seconds... (attempt {attempt + 1}/{max_retries})")
-            time.sleep(delay)
-        except Exception as e:
-            # For other exceptions, don't retry
-            raise e
+            await asyncio.sleep(delay)
+
 
+rate_limiter = SharedRateLimiter(
+    requests_per_second=llm_requests_per_second,
+    tokens_per_minute=llm_tokens_per_minute,
+    max_bucket_size=llm_max_burst,
+    check_every_n_seconds=0.1,
+)
 
-def get_llm():
-    rate_limiter = InMemoryRateLimiter(
-        requests_per_second=0.25,
-        check_every_n_seconds=0.1,
-        max_bucket_size=10,
+llm_cache: Optional[TieredLLMCache] = (
+    TieredLLMCache(
+        path=llm_cache_path,
+        ttl=llm_cache_ttl_seconds,
+        max_memory_items=llm_cache_max_memory_items,
+        max_disk_items=llm_cache_max_disk_items,
     )
-    return ChatGoogleGenerativeAI(
-        model="gemini-2.0-flash",
-        rate_limiter=rate_limiter,
-        google_api_key=google_api_key
-    )
\ No newline at end of file
+    if llm_cache_enabled
+    else None
+)
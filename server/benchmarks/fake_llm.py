@@ -0,0 +1,154 @@
+"""
+Scripted chat model for the offline pipeline benchmark.
+
+It plays each node's part well enough for the graph to run its full course:
+the ReAct nodes call tools for a configurable number of turns and then write
+a report, ``find_gaps`` answers with gap JSON, and ``merge`` echoes back the
+sections it was asked to rewrite. Latency and output sizes are configurable.
+"""
+import asyncio
+import json
+import re
+from typing import Any, List, Optional, Sequence
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+SECTIONS = [
+    "Market Size and Growth Projections",
+    "Competitive Landscape Overview",
+    "Key Industry Players and Market Share",
+    "Regulatory and Legal Considerations",
+    "Technological Trends",
+    "Economic Factors and Market Opportunities",
+    "Potential Risks and Challenges",
+    "Recommendations",
+]
+
+# Tools the ReAct turns call first, in this order, when they are available.
+PREFERRED_TOOLS = [
+    "google_search",
+    "search_google_news",
+    "get_reddit_post_data",
+    "search_youtube",
+    "google_trends_summary",
+    "scrape_website_to_markdown",
+]
+
+_HEADING = re.compile(r"^#{1,3} +(.+)$", re.M)
+
+
+def _filler(chars: int, seed: str) -> str:
+    sentence = f"Fixture analysis of {seed} shows steady demand and moderate competition [1]. "
+    return (sentence * (chars // len(sentence) + 1))[:chars]
+
+
+def _tool_args(spec: dict) -> dict:
+    params = spec.get("function", {}).get("parameters", {})
+    args = {}
+    for name in params.get("required", []):
+        prop = params.get("properties", {}).get(name, {})
+        if "enum" in prop:
+            args[name] = prop["enum"][0]
+        elif prop.get("type") == "integer":
+            args[name] = 3
+        elif name == "url":
+            args[name] = "https://example.com/fixture"
+        else:
+            args[name] = "fixture market"
+    return args
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Deterministic stand-in for Gemini; see the module docstring."""
+
+    node: str = "default"
+    latency: float = 0.05
+    tool_turns: int = 2
+    tools_per_turn: int = 2
+    report_chars: int = 6000
+    gaps_per_round: int = 3
+    tool_specs: List[dict] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "ScriptedChatModel":
+        specs = [convert_to_openai_tool(t) for t in tools]
+        ranked = sorted(
+            specs,
+            key=lambda s: (
+                PREFERRED_TOOLS.index(s["function"]["name"])
+                if s["function"]["name"] in PREFERRED_TOOLS
+                else len(PREFERRED_TOOLS)
+            ),
+        )
+        return self.model_copy(update={"tool_specs": ranked})
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    # ---------- script ----------
+    def _respond(self, messages: List[BaseMessage]) -> AIMessage:
+        prompt = str(messages[-1].content) if messages else ""
+        turns = sum(1 for m in messages if isinstance(m, AIMessage) and m.tool_calls)
+
+        if self.tool_specs and turns < self.tool_turns:
+            message = AIMessage(content="", tool_calls=self._tool_calls(turns))
+        elif self.node == "find_gaps":
+            message = AIMessage(content=self._gaps())
+        elif self.node == "merge":
+            message = AIMessage(content=self._merge(prompt))
+        else:
+            message = AIMessage(content=self._report(SECTIONS))
+
+        in_tokens = sum(len(str(m.content)) for m in messages) // 4
+        out_tokens = len(str(message.content)) // 4 + 10 * len(message.tool_calls)
+        message.usage_metadata = {
+            "input_tokens": in_tokens,
+            "output_tokens": out_tokens,
+            "total_tokens": in_tokens + out_tokens,
+        }
+        return message
+
+    def _tool_calls(self, turn: int) -> List[dict]:
+        calls = []
+        for i in range(self.tools_per_turn):
+            spec = self.tool_specs[(turn * self.tools_per_turn + i) % len(self.tool_specs)]
+            calls.append(
+                {
+                    "name": spec["function"]["name"],
+                    "args": _tool_args(spec),
+                    "id": f"call_{self.node}_{turn}_{i}",
+                    "type": "tool_call",
+                }
+            )
+        return calls
+
+    def _report(self, headings: List[str]) -> str:
+        per_section = max(200, self.report_chars // (len(headings) + 1))
+        body = "".join(f"## {h}\n\n{_filler(per_section, h)}\n\n" for h in headings)
+        return body + "## References\n\n[1] https://example.com/fixture\n"
+
+    def _gaps(self) -> str:
+        gaps = [
+            {
+                "section": SECTIONS[i % len(SECTIONS)],
+                "gap_description": f"Missing recent figures for {SECTIONS[i % len(SECTIONS)].lower()}",
+                "impact": "high",
+            }
+            for i in range(self.gaps_per_round)
+        ]
+        return json.dumps(gaps)
+
+    def _merge(self, prompt: str) -> str:
+        headings = [h.strip() for h in _HEADING.findall(prompt) if h.strip() != "References"]
+        return self._report(list(dict.fromkeys(headings)) or SECTIONS)
@@ -0,0 +1,150 @@
+"""
+Fixture MCP servers for the offline pipeline benchmark.
+
+Mirrors the tool names and signatures of mcp_servers/main.py (same mount
+points, same SSE transport) but answers every call from canned text after a
+configurable delay, so no Serper, SerpAPI, Reddit or YouTube access is
+needed.
+
+Usage:
+    python -m benchmarks.fixture_mcp --port 5100 --latency 0.2 --payload-chars 4000
+"""
+import argparse
+import asyncio
+import os
+import random
+from enum import Enum
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI
+from mcp.server.fastmcp import FastMCP
+
+LATENCY = float(os.getenv("FIXTURE_LATENCY_SECONDS", "0.1"))
+JITTER = float(os.getenv("FIXTURE_LATENCY_JITTER", "0.2"))
+PAYLOAD_CHARS = int(os.getenv("FIXTURE_PAYLOAD_CHARS", "4000"))
+
+
+async def _respond(tool: str, subject: str) -> str:
+    delay = LATENCY * (1 + random.uniform(-JITTER, JITTER))
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+    lines = []
+    i = 0
+    while sum(len(l) for l in lines) < PAYLOAD_CHARS:
+        i += 1
+        lines.append(
+            f"{i}. {subject} – fixture result from {tool}\n"
+            f"   https://example.com/{tool}/{i}\n"
+            f"   Market figures, trends and opinions about {subject} for benchmarking.\n"
+        )
+    return "".join(lines)[:PAYLOAD_CHARS]
+
+
+class DataType(Enum):
+    TIMESERIES = "TIMESERIES"
+    GEO_MAP_0 = "GEO_MAP_0"
+    RELATED_TOPICS = "RELATED_TOPICS"
+    RELATED_QUERIES = "RELATED_QUERIES"
+
+
+# ---------- google ----------
+google_mcp = FastMCP("Google Tools")
+
+
+@google_mcp.tool()
+async def google_search(query: str) -> str:
+    """Search Google and return the top organic results."""
+    return await _respond("google_search", query)
+
+
+@google_mcp.tool()
+async def search_google_shopping(query: str, sort_by: str = 'relevance', min_price=None, max_price=None, condition=None, location=None, num_results: int = 10) -> str:
+    """Search Google Shopping for products and prices."""
+    return await _respond("search_google_shopping", query)
+
+
+@google_mcp.tool()
+async def search_google_news(query: str, location: Optional[str] = None, time_period: Optional[str] = None, num_results: int = 10) -> str:
+    """Search Google News for recent articles and news coverage."""
+    return await _respond("search_google_news", query)
+
+
+@google_mcp.tool()
+async def google_trends_summary(query: str, data_type: DataType, geo: Optional[str] = None, region: Optional[str] = None) -> str:
+    """Summarise Google Trends data for a query."""
+    return await _respond("google_trends_summary", query)
+
+
+# ---------- reddit ----------
+reddit_mcp = FastMCP("Reddit Tools")
+
+
+@reddit_mcp.tool()
+async def get_reddit_post_data(query: str, subreddit_name: str = "all", max_posts: int = 5) -> str:
+    """Search Reddit posts and their top comments."""
+    return await _respond("get_reddit_post_data", query)
+
+
+@reddit_mcp.tool()
+async def find_relevant_subreddits(keywords: str, limit: int = 10) -> str:
+    """Find subreddits relevant to some keywords."""
+    return await _respond("find_relevant_subreddits", keywords)
+
+
+# ---------- scraper ----------
+scraper_mcp = FastMCP("Scraper Tools")
+
+
+@scraper_mcp.tool()
+async def scrape_website_to_markdown(url: str, include_links: bool = True, include_images: bool = False) -> str:
+    """Scrape a web page and return it as Markdown."""
+    return await _respond("scrape_website_to_markdown", url)
+
+
+# ---------- youtube ----------
+youtube_mcp = FastMCP("YouTube Tools")
+
+
+@youtube_mcp.tool()
+async def search_youtube(query: str) -> str:
+    """Search YouTube videos."""
+    return await _respond("search_youtube", query)
+
+
+@youtube_mcp.tool()
+async def get_youtube_comments(video_id: str) -> str:
+    """Top comments of a YouTube video."""
+    return await _respond("get_youtube_comments", video_id)
+
+
+@youtube_mcp.tool()
+async def summarize_youtube_transcript(video_id: str) -> str:
+    """Transcript summary of a YouTube video."""
+    return await _respond("summarize_youtube_transcript", video_id)
+
+
+app = FastAPI(title="Fixture MCP Server")
+
+app.mount("/mcp/google/", google_mcp.sse_app())
+app.mount("/mcp/reddit/", reddit_mcp.sse_app())
+app.mount("/mcp/scraper/", scraper_mcp.sse_app())
+app.mount("/mcp/youtube/", youtube_mcp.sse_app())
+
+
+@app.get("/")
+async def root():
+    return {"message": "Fixture MCP Server", "latency": LATENCY, "payload_chars": PAYLOAD_CHARS}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=5100)
+    parser.add_argument("--latency", type=float, default=LATENCY, help="seconds per tool call")
+    parser.add_argument("--jitter", type=float, default=JITTER, help="relative latency jitter")
+    parser.add_argument("--payload-chars", type=int, default=PAYLOAD_CHARS)
+    args = parser.parse_args()
+
+    LATENCY, JITTER, PAYLOAD_CHARS = args.latency, args.jitter, args.payload_chars
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
@@ -0,0 +1,117 @@
+"""
+Shared plumbing for the offline benchmarks: run ``create_agent`` without
+MongoDB or a websocket and time it from the events it emits.
+
+Import this module (and anything under ``agents``) only after the
+environment has been prepared with ``prepare_env``, since settings are read
+at import time.
+"""
+import asyncio
+import os
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+
+
+def prepare_env(**overrides: str) -> None:
+    """Settings for an offline run; explicit environment values still win."""
+    defaults = {
+        "GOOGLE_API_KEY": "offline",
+        "SERP_DEV_API_KEY": "offline",
+        "REDDIT_CLIENT_ID": "offline",
+        "REDDIT_SECRET": "offline",
+        "MONGO_DB_URI": "mongodb://localhost:27017",
+        "OUTPUT_DIR": os.path.join(tempfile.gettempdir(), "market_analysis_bench"),
+        "LLM_CACHE_ENABLED": "false",
+        "MCP_CACHE_ENABLED": "false",
+        "CHECKPOINT_ENABLED": "false",
+        # offline calls cost nothing and must not be throttled
+        "LLM_REQUESTS_PER_SECOND": "100000",
+        "LLM_TOKENS_PER_MINUTE": "1000000000000",
+        "LLM_MAX_BURST": "100000",
+        **overrides,
+    }
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+
+
+class MemoryStore:
+    """Stands in for ``database.analyses`` writes during a benchmark run."""
+
+    def __init__(self):
+        self.docs: Dict[str, dict] = {}
+
+    async def update_analysis(self, analysis_id: str, fields: dict) -> None:
+        self.docs.setdefault(analysis_id, {}).update(fields)
+
+
+def use_memory_store() -> MemoryStore:
+    """Route the analysis document writes made by create_agent to memory."""
+    from database import analyses
+
+    store = MemoryStore()
+    analyses.update_analysis = store.update_analysis  # type: ignore
+    return store
+
+
+def stage_durations(events: List[dict], finished: float) -> Dict[str, float]:
+    """Seconds spent in each stage, from the ``stage`` events' timestamps."""
+    marks: List[tuple] = []
+    for event in events:
+        if event.get("type") == "stage" and (not marks or marks[-1][0] != event["stage"]):
+            marks.append((event["stage"], event["ts"]))
+
+    durations: Dict[str, float] = {}
+    for i, (stage, ts) in enumerate(marks):
+        end = marks[i + 1][1] if i + 1 < len(marks) else finished
+        durations[stage] = round(durations.get(stage, 0.0) + end - ts, 4)
+    durations.pop("done", None)
+    return durations
+
+
+async def run_job(
+    analysis_type: str,
+    query: str,
+    tools: List[Any],
+    job_id: Optional[str] = None,
+) -> dict:
+    """Run one analysis to completion and time it from its event stream."""
+    from agents.create_agent import create_agent
+    from prompts import ANALYSIS_PROMPTS
+    from streaming.broadcaster import Channel
+
+    job_id = job_id or str(ObjectId())
+    channel = Channel(max_items=100_000, max_bytes=1 << 30)
+    events: List[dict] = []
+
+    async def collect():
+        async for _, event in channel.subscribe(0):
+            events.append(event)
+
+    collector = asyncio.create_task(collect())
+    start = time.time()
+    error = None
+    try:
+        await create_agent(
+            id=job_id,
+            analysisType=analysis_type,
+            user_prompt=query,
+            tools=tools,
+            out_queue=channel,
+            **ANALYSIS_PROMPTS[analysis_type],  # type: ignore
+        )
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+    finished = time.time()
+    await collector
+
+    return {
+        "id": job_id,
+        "analysis_type": str(analysis_type),
+        "wall_seconds": round(finished - start, 4),
+        "stages": stage_durations(events, finished),
+        "events": len(events),
+        "error": error,
+    }
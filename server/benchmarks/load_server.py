@@ -0,0 +1,83 @@
+"""
+Run server.py with a stubbed agent, as the target of benchmarks/load_test.py.
+
+The FastAPI app, job scheduler, MongoDB writes and websocket streaming are
+the real ones; only create_agent is replaced by a stub that emits a
+configurable stream of events, and the MCP client is skipped. Needs a
+reachable MONGO_DB_URI.
+
+Usage:
+    python -m benchmarks.load_server --port 8000 --tokens 500 --interval 0.01
+"""
+import argparse
+import asyncio
+from contextlib import asynccontextmanager
+
+from benchmarks.harness import prepare_env
+
+prepare_env()
+
+import uvicorn  # noqa: E402
+from langchain_core.tools import StructuredTool  # noqa: E402
+
+import server  # noqa: E402
+from streaming.events import EventWriter  # noqa: E402
+
+STUB = {"tokens": 500, "interval": 0.01, "token_chars": 40, "tool_calls": 5}
+
+
+async def stub_agent(id, analysisType, user_prompt, tools, out_queue, **prompts) -> None:
+    """Stand-in for create_agent with the same event shape and no LLM."""
+    events = EventWriter(out_queue)
+    text = ("lorem ipsum " * (STUB["token_chars"] // 12 + 1))[: STUB["token_chars"]]
+    try:
+        await events.stage("initial_report", "Writing the initial report")
+        tool_every = max(1, STUB["tokens"] // max(1, STUB["tool_calls"]))
+        for i in range(STUB["tokens"]):
+            if i % tool_every == 0:
+                call_id = f"stub_{i}"
+                await events.tool_start(call_id, "google_search", {"query": user_prompt})
+                await events.tool_end(call_id, "google_search", text * 50)
+            await events.token(text, node="agent")
+            await events.progress(5 + 90 * i / STUB["tokens"])
+            await asyncio.sleep(STUB["interval"])
+        await events.artifact("pdf", f"stub/{id}/{analysisType}.pdf")
+        await events.stage("done")
+    finally:
+        await events.close()
+
+
+@asynccontextmanager
+async def stub_lifespan(app):
+    server.McpState.tools = [
+        StructuredTool.from_function(
+            func=lambda query: "", name="google_search", description="stub"
+        )
+    ]
+    await server.ping_db()
+    server.scheduler.start()
+    server.loop_monitor.start()
+    yield
+    await server.scheduler.stop()
+    await server.loop_monitor.stop()
+    await server.close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--tokens", type=int, default=STUB["tokens"], help="token events per analysis")
+    parser.add_argument("--interval", type=float, default=STUB["interval"], help="seconds between tokens")
+    parser.add_argument("--token-chars", type=int, default=STUB["token_chars"])
+    parser.add_argument("--tool-calls", type=int, default=STUB["tool_calls"])
+    args = parser.parse_args()
+
+    STUB.update(
+        tokens=args.tokens,
+        interval=args.interval,
+        token_chars=args.token_chars,
+        tool_calls=args.tool_calls,
+    )
+    server.create_agent = stub_agent
+    server.app.router.lifespan_context = stub_lifespan
+    uvicorn.run(server.app, host="127.0.0.1", port=args.port, log_level="warning", ws_per_message_deflate=True)
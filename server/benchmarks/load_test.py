@@ -0,0 +1,223 @@
+"""
+HTTP and WebSocket load test for server.py.
+
+Creates N analyses with POST /analysis, attaches M websocket readers to
+their /ws/research streams (a share of them deliberately slow) and polls
+GET /analysis/{id} until every analysis is done. While it runs it samples
+GET /jobs/stats for the server's event-loop lag and memory. It reports
+request latency, websocket setup time, message throughput, event-loop lag
+and memory growth, and can write everything to a JSON file for tracking
+over time.
+
+Start the target with a stubbed agent first:
+    python -m benchmarks.load_server --port 8000
+
+Usage:
+    python -m benchmarks.load_test --analyses 50 --readers 200 --slow-readers 20 --output load.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from typing import Dict, List, Optional
+
+import httpx
+import websockets
+
+try:
+    import ormsgpack
+except ImportError:  # optional: only needed for --protocol research.msgpack
+    ormsgpack = None
+
+JSON_PROTOCOL = "research.json"
+MSGPACK_PROTOCOL = "research.msgpack"
+
+
+def _pct(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))], 3)
+
+
+def _dist(values: List[float]) -> dict:
+    return {"count": len(values), "p50": _pct(values, 50), "p95": _pct(values, 95), "max": _pct(values, 100)}
+
+
+def _events(protocol: Optional[str], frame) -> int:
+    """Events carried by one frame of the negotiated sub-protocol."""
+    if protocol == MSGPACK_PROTOCOL:
+        return len(ormsgpack.unpackb(frame)["data"])  # type: ignore
+    if protocol == JSON_PROTOCOL:
+        return len(json.loads(frame)["data"])
+    # no sub-protocol: legacy plain-text frames, one chunk each
+    return 1
+
+
+async def create_analyses(client: httpx.AsyncClient, n: int, analysis_type: str) -> dict:
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    ids: List[str] = []
+
+    async def post(i: int):
+        start = time.perf_counter()
+        resp = await client.post(
+            "/analysis", json={"query": f"load test market {i}", "analysis_type": analysis_type}
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+        statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+        if resp.status_code == 200:
+            ids.append(resp.json()["id"])
+
+    await asyncio.gather(*(post(i) for i in range(n)))
+    return {"ids": ids, "latency_ms": _dist(latencies), "status_codes": statuses}
+
+
+async def read_stream(ws_url: str, analysis_id: str, slow_delay: float, protocol: str) -> dict:
+    """One websocket reader; a slow one sleeps after every frame."""
+    result = {"slow": slow_delay > 0, "frames": 0, "events": 0, "bytes": 0, "close_code": None, "error": None}
+    start = time.perf_counter()
+    try:
+        async with websockets.connect(
+            f"{ws_url}/ws/research/{analysis_id}?offset=0",
+            subprotocols=[protocol],  # type: ignore
+            max_size=None,
+        ) as ws:
+            result["connect_ms"] = (time.perf_counter() - start) * 1000
+            result["protocol"] = ws.subprotocol
+            first = None
+            try:
+                async for frame in ws:
+                    if first is None:
+                        first = time.perf_counter()
+                        result["first_frame_ms"] = (first - start) * 1000
+                    result["frames"] += 1
+                    result["bytes"] += len(frame)
+                    result["events"] += _events(ws.subprotocol, frame)
+                    if slow_delay:
+                        await asyncio.sleep(slow_delay)
+            except websockets.ConnectionClosed:
+                pass
+            result["close_code"] = ws.close_code
+    except Exception as exc:
+        result["error"] = f"{type(exc).__name__}: {exc}"
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+async def poll_until_done(client: httpx.AsyncClient, analysis_id: str, interval: float, deadline: float) -> List[float]:
+    latencies: List[float] = []
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        resp = await client.get(f"/analysis/{analysis_id}")
+        latencies.append((time.perf_counter() - start) * 1000)
+        if resp.status_code != 200 or resp.json().get("status") in ("completed", "failed"):
+            break
+        await asyncio.sleep(interval * random.uniform(0.5, 1.5))
+    return latencies
+
+
+async def sample_server(client: httpx.AsyncClient, samples: List[dict], stop: asyncio.Event, every: float) -> None:
+    while True:
+        try:
+            resp = await client.get("/jobs/stats")
+            samples.append({"t": time.monotonic(), **resp.json().get("event_loop", {})})
+        except httpx.HTTPError:
+            pass
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=every)
+            return
+        except asyncio.TimeoutError:
+            continue
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--analyses", type=int, default=20)
+    parser.add_argument("--readers", type=int, default=50, help="websocket readers, spread over the analyses")
+    parser.add_argument("--slow-readers", type=int, default=5, help="how many of the readers are slow")
+    parser.add_argument("--slow-delay", type=float, default=0.5, help="seconds a slow reader waits per frame")
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--analysis-type", default="Industry Report")
+    parser.add_argument("--protocol", default=JSON_PROTOCOL, choices=[JSON_PROTOCOL, MSGPACK_PROTOCOL])
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+    if args.protocol == MSGPACK_PROTOCOL and ormsgpack is None:
+        parser.error("--protocol research.msgpack needs the ormsgpack package")
+
+    ws_url = args.url.replace("http", "ws", 1)
+    limits = httpx.Limits(max_connections=max(100, args.analyses * 2))
+    async with httpx.AsyncClient(base_url=args.url, timeout=60, limits=limits) as client:
+        samples: List[dict] = []
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(sample_server(client, samples, stop, 1.0))
+
+        started = time.perf_counter()
+        created = await create_analyses(client, args.analyses, args.analysis_type)
+        ids = created["ids"]
+        if not ids:
+            stop.set()
+            await sampler
+            raise SystemExit(f"no analysis was accepted: {created['status_codes']}")
+
+        deadline = time.monotonic() + args.timeout
+        readers = [
+            read_stream(ws_url, ids[i % len(ids)], args.slow_delay if i < args.slow_readers else 0.0, args.protocol)
+            for i in range(args.readers)
+        ]
+        pollers = [poll_until_done(client, aid, args.poll_interval, deadline) for aid in ids]
+        streams, polls = await asyncio.gather(
+            asyncio.gather(*readers), asyncio.gather(*pollers)
+        )
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await sampler
+
+    fast = [s for s in streams if not s["slow"] and not s["error"]]
+    slow = [s for s in streams if s["slow"] and not s["error"]]
+    events = sum(s["events"] for s in streams)
+    lags = [s["lag_ms"]["p95"] for s in samples if s.get("lag_ms", {}).get("p95") is not None]
+    lag_max = [s["lag_ms"]["max"] for s in samples if s.get("lag_ms")]
+    rss = [s["rss_mb"] for s in samples if "rss_mb" in s]
+
+    results = {
+        "config": vars(args),
+        "elapsed_seconds": round(elapsed, 3),
+        "create": {"accepted": len(ids), "latency_ms": created["latency_ms"], "status_codes": created["status_codes"]},
+        "websocket": {
+            "readers": len(streams),
+            "errors": sum(1 for s in streams if s["error"]),
+            "close_codes": {str(c): sum(1 for s in streams if s["close_code"] == c) for c in {s["close_code"] for s in streams}},
+            "connect_ms": _dist([s["connect_ms"] for s in streams if "connect_ms" in s]),
+            "first_frame_ms": _dist([s["first_frame_ms"] for s in streams if "first_frame_ms" in s]),
+            "frames": sum(s["frames"] for s in streams),
+            "events": events,
+            "bytes": sum(s["bytes"] for s in streams),
+            "events_per_second": round(events / elapsed, 1) if elapsed else None,
+            "fast_reader_seconds": _dist([s["seconds"] for s in fast]),
+            "slow_reader_seconds": _dist([s["seconds"] for s in slow]),
+        },
+        "poll": {"latency_ms": _dist([l for p in polls for l in p])},
+        "server": {
+            "samples": len(samples),
+            "loop_lag_p95_ms": _dist(lags),
+            "loop_lag_max_ms": max(lag_max) if lag_max else None,
+            "rss_start_mb": rss[0] if rss else None,
+            "rss_end_mb": rss[-1] if rss else None,
+            "rss_peak_mb": max(rss) if rss else None,
+            "rss_growth_mb": round(rss[-1] - rss[0], 1) if rss else None,
+        },
+    }
+    print(json.dumps({k: v for k, v in results.items() if k != "config"}, indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
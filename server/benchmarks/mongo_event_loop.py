@@ -0,0 +1,120 @@
+"""
+Event-loop latency benchmark: blocking MongoClient vs AsyncMongoClient.
+
+Simulates N concurrent research streams. Each stream pushes tokens through an
+asyncio.Queue (like create_agent -> websocket_research) and touches Mongo the
+way the handlers do (find_one on connect, update_one on status changes).
+A monitor task sleeps for a fixed tick and records how late it wakes up,
+which is the latency every other stream on the loop sees.
+
+Usage:
+    python -m benchmarks.mongo_event_loop --uri mongodb://localhost:27017 --streams 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+from bson import ObjectId
+from dotenv import load_dotenv
+from pymongo import AsyncMongoClient, MongoClient
+
+load_dotenv()
+
+TICK = 0.005
+
+
+async def _monitor(lags: list, stop: asyncio.Event):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(max(0.0, time.perf_counter() - start - TICK))
+
+
+async def _stream_sync(coll, ops: int, tokens: int):
+    q: asyncio.Queue = asyncio.Queue()
+    _id = coll.insert_one({"status": "pending"}).inserted_id
+    for _ in range(ops):
+        coll.find_one({"_id": _id})
+        for t in range(tokens):
+            await q.put(t)
+            await q.get()
+        coll.update_one({"_id": _id}, {"$set": {"status": "in_progress"}})
+
+
+async def _stream_async(coll, ops: int, tokens: int):
+    q: asyncio.Queue = asyncio.Queue()
+    _id = (await coll.insert_one({"status": "pending"})).inserted_id
+    for _ in range(ops):
+        await coll.find_one({"_id": _id})
+        for t in range(tokens):
+            await q.put(t)
+            await q.get()
+        await coll.update_one({"_id": _id}, {"$set": {"status": "in_progress"}})
+
+
+def _summary(lags: list, elapsed: float) -> dict:
+    ms = sorted(l * 1000 for l in lags) or [0.0]
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "lag_p50_ms": round(statistics.median(ms), 3),
+        "lag_p95_ms": round(ms[int(0.95 * (len(ms) - 1))], 3),
+        "lag_max_ms": round(ms[-1], 3),
+        "samples": len(ms),
+    }
+
+
+async def run_mode(mode: str, uri: str, streams: int, ops: int, tokens: int) -> dict:
+    collection = f"bench_{ObjectId()}"
+    lags: list = []
+    stop = asyncio.Event()
+
+    if mode == "sync":
+        client = MongoClient(uri)
+        coll = client["market_analysis_bench"][collection]
+        worker = _stream_sync
+    else:
+        client = AsyncMongoClient(uri, maxPoolSize=streams)
+        coll = client["market_analysis_bench"][collection]
+        worker = _stream_async
+
+    monitor = asyncio.create_task(_monitor(lags, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(coll, ops, tokens) for _ in range(streams)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await monitor
+
+    if mode == "sync":
+        coll.drop()
+        client.close()
+    else:
+        await coll.drop()
+        await client.close()
+
+    return _summary(lags, elapsed)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--uri", default=os.getenv("MONGO_DB_URI"))
+    parser.add_argument("--streams", type=int, default=50)
+    parser.add_argument("--ops", type=int, default=20, help="Mongo round-trips per stream")
+    parser.add_argument("--tokens", type=int, default=50, help="queued chunks between round-trips")
+    args = parser.parse_args()
+
+    if not args.uri:
+        parser.error("--uri or MONGO_DB_URI is required")
+
+    results = {}
+    for mode in ("sync", "async"):
+        results[mode] = await run_mode(mode, args.uri, args.streams, args.ops, args.tokens)
+        print(f"{mode:>5}: {results[mode]}")
+
+    print(json.dumps({"streams": args.streams, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,220 @@
+"""
+Offline end-to-end benchmark of the analysis pipeline.
+
+Runs create_agent through the job scheduler with a scripted fake chat model
+(benchmarks/fake_llm.py) and fixture MCP servers (benchmarks/fixture_mcp.py,
+started as a subprocess and reached over SSE like the real ones), so what is
+measured is orchestration: graph execution, streaming, queueing, document
+writes and PDF rendering. For each concurrency level it reports jobs per
+minute, per-stage latency and peak RSS of the benchmark process (PDF render
+workers run in their own processes and are not included).
+
+Usage:
+    python -m benchmarks.pipeline --levels 1,10,100 --llm-latency 0.05 --tool-latency 0.1
+    python -m benchmarks.pipeline --levels 10 --mongo --output pipeline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+
+from benchmarks.harness import prepare_env
+
+prepare_env()
+
+from langchain_mcp_adapters.client import MultiServerMCPClient  # noqa: E402
+
+from agents import render, routing  # noqa: E402
+from agents.utils import rate_limiter  # noqa: E402
+from benchmarks.fake_llm import ScriptedChatModel  # noqa: E402
+from benchmarks.harness import run_job, use_memory_store  # noqa: E402
+from database import analyses  # noqa: E402
+from database.schema import AnalysisSchema, AnalysisType, Status  # noqa: E402
+from jobs.monitor import rss_bytes  # noqa: E402
+from jobs.scheduler import Job, JobScheduler  # noqa: E402
+
+
+async def _sample_rss(peak: Dict[str, int], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        peak["rss"] = max(peak["rss"], rss_bytes())
+        await asyncio.sleep(0.05)
+
+
+def _pct(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))], 4)
+
+
+async def _start_fixtures(port: int, latency: float, payload_chars: int) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmarks.fixture_mcp",
+            "--port", str(port),
+            "--latency", str(latency),
+            "--payload-chars", str(payload_chars),
+        ],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    for _ in range(100):
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return proc
+        except OSError:
+            await asyncio.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError(f"fixture MCP server did not start on port {port}")
+
+
+async def run_level(
+    level: int,
+    tools: list,
+    analysis_types: List[str],
+    use_mongo: bool,
+) -> dict:
+    """Submit ``level`` analyses at once to a scheduler with ``level`` slots."""
+    results: List[dict] = []
+    done = asyncio.Event()
+    peak = {"rss": rss_bytes()}
+    stop = asyncio.Event()
+
+    async def on_finish(job: Job, error):
+        if len(results) >= level:
+            done.set()
+
+    scheduler = JobScheduler(
+        max_workers=level,
+        max_per_type=level,
+        max_pending=level,
+        on_finish=on_finish,
+    )
+    scheduler.start()
+    sampler = asyncio.create_task(_sample_rss(peak, stop))
+
+    start = time.perf_counter()
+    for i in range(level):
+        analysis_type = analysis_types[i % len(analysis_types)]
+        query = f"fixture market {i}"
+        if use_mongo:
+            job_id = await analyses.insert_analysis(
+                AnalysisSchema(query=query, analysis_type=analysis_type, status=Status.PENDING)
+            )
+        else:
+            job_id = str(ObjectId())
+
+        async def run(job_id=job_id, analysis_type=analysis_type, query=query):
+            results.append(await run_job(analysis_type, query, tools, job_id=job_id))
+
+        await scheduler.submit(Job(job_id, analysis_type, run), force=True)
+
+    await done.wait()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await sampler
+    waits = scheduler.stats()["wait_seconds"]
+    await scheduler.stop()
+
+    ok = [r for r in results if not r["error"]]
+    stages = sorted({s for r in ok for s in r["stages"]})
+    return {
+        "concurrency": level,
+        "jobs": len(results),
+        "failed": len(results) - len(ok),
+        "errors": sorted({r["error"] for r in results if r["error"]})[:5],
+        "elapsed_seconds": round(elapsed, 3),
+        "jobs_per_minute": round(len(ok) / elapsed * 60, 2) if elapsed else None,
+        "job_seconds": {
+            "p50": _pct([r["wall_seconds"] for r in ok], 50),
+            "p95": _pct([r["wall_seconds"] for r in ok], 95),
+        },
+        "stage_seconds": {
+            s: {
+                "p50": _pct([r["stages"][s] for r in ok if s in r["stages"]], 50),
+                "p95": _pct([r["stages"][s] for r in ok if s in r["stages"]], 95),
+                "mean": round(statistics.mean(r["stages"][s] for r in ok if s in r["stages"]), 4),
+            }
+            for s in stages
+        },
+        "queue_wait_seconds": waits,
+        "peak_rss_mb": round(peak["rss"] / 2**20, 1),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--levels", default="1,10,100", help="comma separated concurrency levels")
+    parser.add_argument("--analysis-types", default=",".join(t.value for t in AnalysisType))
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per fake LLM call")
+    parser.add_argument("--tool-turns", type=int, default=2, help="tool-calling turns per ReAct run")
+    parser.add_argument("--tools-per-turn", type=int, default=2)
+    parser.add_argument("--report-chars", type=int, default=6000)
+    parser.add_argument("--gaps", type=int, default=3, help="gaps returned by each reflection")
+    parser.add_argument("--tool-latency", type=float, default=0.1, help="seconds per fixture tool call")
+    parser.add_argument("--payload-chars", type=int, default=4000, help="size of each tool result")
+    parser.add_argument("--port", type=int, default=5100, help="port for the fixture MCP server")
+    parser.add_argument("--mongo", action="store_true", help="write analysis documents to MONGO_DB_URI")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    levels = [int(l) for l in args.levels.split(",") if l.strip()]
+    analysis_types = [t.strip() for t in args.analysis_types.split(",") if t.strip()]
+
+    if not args.mongo:
+        use_memory_store()
+
+    routing.set_client_factory(
+        lambda node, route, callbacks: ScriptedChatModel(
+            node=node,
+            latency=args.llm_latency,
+            tool_turns=args.tool_turns,
+            tools_per_turn=args.tools_per_turn,
+            report_chars=args.report_chars,
+            gaps_per_round=args.gaps,
+            callbacks=callbacks,
+            rate_limiter=rate_limiter,
+        )
+    )
+
+    fixtures = await _start_fixtures(args.port, args.tool_latency, args.payload_chars)
+    try:
+        base = f"http://127.0.0.1:{args.port}"
+        client = MultiServerMCPClient(
+            {
+                name: {"url": f"{base}/mcp/{name.split('_')[0]}/sse", "transport": "sse"}
+                for name in ("google_tools", "reddit_tools", "scraper_tools", "youtube_tools")
+            }
+        )
+        tools = await client.get_tools()
+
+        results = []
+        for level in levels:
+            result = await run_level(level, tools, analysis_types, args.mongo)
+            results.append(result)
+            print(
+                f"concurrency={level:>4}: {result['jobs_per_minute']} jobs/min, "
+                f"p50 {result['job_seconds']['p50']}s, peak RSS {result['peak_rss_mb']} MB"
+                + (f", {result['failed']} failed" if result["failed"] else "")
+            )
+    finally:
+        render.shutdown()
+        fixtures.terminate()
+        fixtures.wait()
+
+    report = {"config": vars(args), "levels": results}
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,129 @@
+"""
+Replay recorded analysis runs offline and report where the time goes.
+
+Record cassettes by running the server with CASSETTE_MODE=record (one file
+per analysis in CASSETTE_DIR). This replays each one through the real
+create_agent pipeline with the recorded LLM responses and MCP tool results,
+either with the originally measured latencies or with none, and reports
+per-stage timings plus the orchestration overhead: wall time during which
+no replayed LLM or tool call was pending.
+
+Usage:
+    python -m benchmarks.replay cache/cassettes --zero-latency --output replay.json
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import statistics
+from typing import List
+
+from benchmarks.harness import prepare_env
+
+prepare_env(CASSETTE_MODE="replay")
+
+from benchmarks.harness import run_job, use_memory_store  # noqa: E402
+from agents.cassette import Cassette, current_cassette, replay_tools  # noqa: E402
+
+
+def _cassette_paths(paths: List[str]) -> List[str]:
+    found: List[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(sorted(glob.glob(os.path.join(path, "*.json"))))
+        else:
+            found.append(path)
+    return found
+
+
+def recorded_wall(cassette: Cassette) -> float:
+    """Span of the recorded external calls, a lower bound of the original run."""
+    calls = cassette.llm + cassette.tools
+    if not calls:
+        return 0.0
+    start = min(c["started"] for c in calls)
+    end = max(c["started"] + c["seconds"] for c in calls)
+    return round(end - start, 4)
+
+
+async def replay_one(path: str, zero_latency: bool) -> dict:
+    cassette = Cassette.load(path, zero_latency=zero_latency)
+    current_cassette.set(cassette)
+    result = await run_job(
+        cassette.meta["analysis_type"],
+        cassette.meta["query"],
+        replay_tools(cassette),
+    )
+    waiting = cassette.wait_seconds()
+    return {
+        "cassette": os.path.basename(path),
+        "recorded_wall_seconds": recorded_wall(cassette),
+        **result,
+        "llm_calls": len(cassette.llm),
+        "tool_calls": len(cassette.tools),
+        "llm_wait_seconds": round(cassette.wait_seconds("llm"), 4),
+        "tool_wait_seconds": round(cassette.wait_seconds("tool"), 4),
+        "overhead_seconds": round(max(0.0, result["wall_seconds"] - waiting), 4),
+    }
+
+
+def _aggregate(runs: List[dict]) -> dict:
+    ok = [r for r in runs if not r["error"]]
+    if not ok:
+        return {"runs": len(runs), "failed": len(runs)}
+
+    stages = sorted({s for r in ok for s in r["stages"]})
+    return {
+        "runs": len(runs),
+        "failed": len(runs) - len(ok),
+        "wall_seconds_median": round(statistics.median(r["wall_seconds"] for r in ok), 4),
+        "overhead_seconds_median": round(statistics.median(r["overhead_seconds"] for r in ok), 4),
+        "overhead_seconds_total": round(sum(r["overhead_seconds"] for r in ok), 4),
+        "stage_seconds_median": {
+            s: round(statistics.median(r["stages"].get(s, 0.0) for r in ok), 4) for s in stages
+        },
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("paths", nargs="+", help="cassette files or directories of them")
+    parser.add_argument("--zero-latency", action="store_true", help="serve recordings instantly")
+    parser.add_argument("--concurrency", type=int, default=1, help="cassettes replayed at once")
+    parser.add_argument("--output", help="write the full results as JSON to this file")
+    args = parser.parse_args()
+
+    paths = _cassette_paths(args.paths)
+    if not paths:
+        parser.error("no cassettes found")
+
+    use_memory_store()
+    slots = asyncio.Semaphore(args.concurrency)
+
+    async def bounded(path: str) -> dict:
+        async with slots:
+            run = await replay_one(path, args.zero_latency)
+            print(
+                f"{run['cassette']}: wall={run['wall_seconds']}s "
+                f"overhead={run['overhead_seconds']}s stages={run['stages']}"
+                + (f" error={run['error']}" if run["error"] else "")
+            )
+            return run
+
+    runs = await asyncio.gather(*(bounded(p) for p in paths))
+    results = {
+        "zero_latency": args.zero_latency,
+        "concurrency": args.concurrency,
+        "summary": _aggregate(runs),
+        "runs": runs,
+    }
+    print(json.dumps(results["summary"], indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,4 +1,5 @@
 import os
+import json
 import warnings
 from typing import Optional
 from dotenv import load_dotenv
@@ -14,6 +15,10 @@ reddit_username: Optional[str] = os.getenv("REDDIT_USERNAME")
 reddit_password: Optional[str] = os.getenv("REDDIT_PASSWORD")
 
 mongodb_uri: Optional[str] = os.getenv("MONGO_DB_URI", None)
+mongodb_max_pool_size: int = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+mongodb_min_pool_size: int = int(os.getenv("MONGO_MIN_POOL_SIZE", "5"))
+mongodb_max_idle_ms: int = int(os.getenv("MONGO_MAX_IDLE_MS", "60000"))
+mongodb_wait_queue_timeout_ms: int = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000"))
 
 if not google_api_key:
     raise ValueError("Warning: Google API Key is not set. Some features may not work.")
@@ -27,4 +32,105 @@ if not serp_dev_api_key:
 if not mongodb_uri:
     raise ValueError("Warning: MongoDB URI is not set. Database operations will not work.")
 
-output_dir: str = os.getenv("OUTPUT_DIR", "reports")
\ No newline at end of file
+output_dir: str = os.getenv("OUTPUT_DIR", "reports")
+
+# ---------- job scheduler ----------
+max_concurrent_jobs: int = int(os.getenv("MAX_CONCURRENT_JOBS", "4"))
+max_jobs_per_type: int = int(os.getenv("MAX_JOBS_PER_TYPE", "2"))
+# JSON object overriding the per-type cap, e.g. {"Industry Report": 1}
+job_type_concurrency: dict = json.loads(os.getenv("JOB_TYPE_CONCURRENCY", "{}"))
+max_pending_jobs: int = int(os.getenv("MAX_PENDING_JOBS", "50"))
+
+
+# ---------- research stream ----------
+stream_buffer_items: int = int(os.getenv("STREAM_BUFFER_ITEMS", "2000"))
+stream_buffer_bytes: int = int(os.getenv("STREAM_BUFFER_BYTES", str(4 * 1024 * 1024)))
+stream_frame_window_ms: int = int(os.getenv("STREAM_FRAME_WINDOW_MS", "50"))
+stream_frame_max_bytes: int = int(os.getenv("STREAM_FRAME_MAX_BYTES", str(64 * 1024)))
+# steps applied in order when a job's buffer is full: coalesce, drop_tool_results, spill
+stream_buffer_policy: list = [
+    p.strip() for p in os.getenv("STREAM_BUFFER_POLICY", "coalesce,drop_tool_results").split(",") if p.strip()
+]
+stream_spill_dir: str = os.getenv("STREAM_SPILL_DIR", os.path.join("cache", "streams"))
+stream_spill_max_bytes: int = int(os.getenv("STREAM_SPILL_MAX_BYTES", str(64 * 1024 * 1024)))
+# a full buffer is relieved down to this fraction of its budget
+stream_buffer_low_water: float = float(os.getenv("STREAM_BUFFER_LOW_WATER", "0.75"))
+
+# ---------- shared LLM rate limit ----------
+llm_requests_per_second: float = float(os.getenv("LLM_REQUESTS_PER_SECOND", "0.25"))
+llm_tokens_per_minute: float = float(os.getenv("LLM_TOKENS_PER_MINUTE", "1000000"))
+llm_max_burst: float = float(os.getenv("LLM_MAX_BURST", "10"))
+llm_fallback_model: Optional[str] = os.getenv("LLM_FALLBACK_MODEL") or None
+
+# ---------- LLM response cache (opt-in) ----------
+llm_cache_enabled: bool = os.getenv("LLM_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+llm_cache_path: str = os.getenv("LLM_CACHE_PATH", os.path.join("cache", "llm_cache.sqlite"))
+llm_cache_ttl_seconds: float = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+llm_cache_max_memory_items: int = int(os.getenv("LLM_CACHE_MAX_MEMORY_ITEMS", "512"))
+llm_cache_max_disk_items: int = int(os.getenv("LLM_CACHE_MAX_DISK_ITEMS", "20000"))
+
+# ---------- MCP tool result cache ----------
+mcp_cache_enabled: bool = os.getenv("MCP_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+mcp_cache_path: str = os.getenv("MCP_CACHE_PATH", os.path.join("cache", "tool_cache.sqlite"))
+mcp_cache_max_memory_items: int = int(os.getenv("MCP_CACHE_MAX_MEMORY_ITEMS", "1024"))
+mcp_cache_max_disk_items: int = int(os.getenv("MCP_CACHE_MAX_DISK_ITEMS", "50000"))
+# JSON object of per-tool TTL overrides in seconds, e.g. {"search_google_news": 600}
+mcp_cache_ttls: dict = json.loads(os.getenv("MCP_CACHE_TTLS", "{}"))
+
+# ---------- reflection graph ----------
+gap_fill_concurrency: int = int(os.getenv("GAP_FILL_CONCURRENCY", "2"))
+gap_fill_max_gaps: int = int(os.getenv("GAP_FILL_MAX_GAPS", "5"))
+gap_dedupe_threshold: float = float(os.getenv("GAP_DEDUPE_THRESHOLD", "0.6"))
+reflection_max_rounds: int = int(os.getenv("REFLECTION_MAX_ROUNDS", "2"))
+# stop when the most important remaining gap scores below this (agents.gaps.impact_score)
+reflection_min_gap_impact: float = float(os.getenv("REFLECTION_MIN_GAP_IMPACT", "1.0"))
+# stop when a merge changed less than this fraction of the report
+reflection_min_change: float = float(os.getenv("REFLECTION_MIN_CHANGE", "0.05"))
+# per-job budgets for the reflection loop, 0 disables
+job_time_budget_seconds: float = float(os.getenv("JOB_TIME_BUDGET_SECONDS", "0"))
+job_token_budget: int = int(os.getenv("JOB_TOKEN_BUDGET", "0"))
+job_cost_budget: float = float(os.getenv("JOB_COST_BUDGET_USD", "0"))
+
+# ---------- ReAct context compaction ----------
+react_context_token_budget: int = int(os.getenv("REACT_CONTEXT_TOKEN_BUDGET", "30000"))
+react_keep_recent_tool_results: int = int(os.getenv("REACT_KEEP_RECENT_TOOL_RESULTS", "2"))
+react_compacted_tool_chars: int = int(os.getenv("REACT_COMPACTED_TOOL_CHARS", "2000"))
+
+# ---------- PDF rendering ----------
+pdf_render_workers: int = int(os.getenv("PDF_RENDER_WORKERS", "2"))
+pdf_render_queue_size: int = int(os.getenv("PDF_RENDER_QUEUE_SIZE", "8"))
+pdf_render_timeout_seconds: float = float(os.getenv("PDF_RENDER_TIMEOUT_SECONDS", "120"))
+
+# ---------- durable checkpoints ----------
+checkpoint_enabled: bool = os.getenv("CHECKPOINT_ENABLED", "true").lower() in ("1", "true", "yes")
+checkpoint_path: str = os.getenv("CHECKPOINT_PATH", os.path.join("cache", "checkpoints.sqlite"))
+
+# ---------- parallel first-round evidence ----------
+evidence_prefetch_enabled: bool = os.getenv("EVIDENCE_PREFETCH", "true").lower() in ("1", "true", "yes")
+evidence_concurrency: int = int(os.getenv("EVIDENCE_CONCURRENCY", "6"))
+evidence_tool_timeout_seconds: float = float(os.getenv("EVIDENCE_TOOL_TIMEOUT_SECONDS", "45"))
+evidence_max_chars_per_result: int = int(os.getenv("EVIDENCE_MAX_CHARS_PER_RESULT", "4000"))
+
+# ---------- duplicate submissions ----------
+# a completed identical analysis (same normalized query and type) younger
+# than this is returned instead of starting a new run; 0 disables reuse
+dedupe_window_seconds: float = float(os.getenv("DEDUPE_WINDOW_SECONDS", str(24 * 3600)))
+
+# ---------- batch submission ----------
+# most analyses (queries x types) one POST /batch may create
+batch_max_items: int = int(os.getenv("BATCH_MAX_ITEMS", "24"))
+
+# ---------- per-node model routing ----------
+# JSON object keyed by "default", a node name (initial, find_gaps, fill_gaps,
+# merge) or "<analysis type>/<node>"; values may set model, temperature,
+# max_tokens and timeout. Unset fields fall back to the built-in table.
+llm_routes: dict = json.loads(os.getenv("LLM_ROUTES", "{}"))
+
+# ---------- usage accounting ----------
+# JSON object: model -> [USD per 1M input tokens, USD per 1M output tokens]
+llm_prices: dict = json.loads(os.getenv("LLM_PRICES", "{}"))
+
+# ---------- record/replay cassettes ----------
+# off | record (capture every LLM and MCP call of each run) | replay
+cassette_mode: str = os.getenv("CASSETTE_MODE", "off").lower()
+cassette_dir: str = os.getenv("CASSETTE_DIR", os.path.join("cache", "cassettes"))
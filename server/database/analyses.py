@@ -0,0 +1,145 @@
+import datetime
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import UpdateOne
+
+from .db import db
+from .schema import AnalysisSchema, Status
+
+
+def _oid(analysis_id: str) -> ObjectId:
+    return analysis_id if isinstance(analysis_id, ObjectId) else ObjectId(analysis_id)
+
+
+def _now() -> str:
+    return datetime.datetime.now().ctime()
+
+
+def is_valid_id(analysis_id: str) -> bool:
+    try:
+        ObjectId(analysis_id)
+        return True
+    except (InvalidId, TypeError):
+        return False
+
+
+def query_key(query: str) -> str:
+    """Case, whitespace and punctuation insensitive form of a query."""
+    text = unicodedata.normalize("NFKC", query).casefold()
+    text = "".join(" " if unicodedata.category(c).startswith("P") else c for c in text)
+    return " ".join(text.split())
+
+
+def finished_within(analysis: Dict[str, Any], seconds: float) -> bool:
+    if seconds <= 0 or not analysis.get("finished_at"):
+        return False
+    try:
+        finished = datetime.datetime.strptime(analysis["finished_at"], "%a %b %d %H:%M:%S %Y")
+    except ValueError:
+        return False
+    return (datetime.datetime.now() - finished).total_seconds() <= seconds
+
+
+async def ensure_indexes() -> None:
+    await db.analyses.create_index([("query_key", 1), ("analysis_type", 1)])
+
+
+# ---------- CRUD ----------
+async def insert_analysis(doc: AnalysisSchema) -> str:
+    """Insert a new analysis and return its id as a string."""
+    doc_dict = doc.model_dump(exclude={"id"}, by_alias=False)
+    doc_dict["query_key"] = doc.query_key or query_key(doc.query)
+    result = await db.analyses.insert_one(doc_dict)
+    return str(result.inserted_id)
+
+
+async def get_analysis(analysis_id: str) -> Optional[Dict[str, Any]]:
+    analysis = await db.analyses.find_one({"_id": _oid(analysis_id)})
+    if analysis:
+        analysis["_id"] = str(analysis["_id"])
+    return analysis
+
+
+async def update_analysis(analysis_id: str, fields: Dict[str, Any]) -> None:
+    await db.analyses.update_one({"_id": _oid(analysis_id)}, {"$set": fields})
+
+
+async def delete_analysis(analysis_id: str) -> None:
+    await db.analyses.delete_one({"_id": _oid(analysis_id)})
+
+
+async def find_by_status(status: Status) -> List[Dict[str, Any]]:
+    """Analyses with the given status, oldest first."""
+    cursor = db.analyses.find({"status": status}).sort("_id", 1)
+    return [a async for a in cursor]
+
+
+async def find_reusable(key: str, analysis_type: str, limit: int = 5) -> List[Dict[str, Any]]:
+    """Queued, running or completed analyses of the same query and type, newest first."""
+    cursor = (
+        db.analyses.find(
+            {
+                "query_key": key,
+                "analysis_type": analysis_type,
+                "status": {"$in": [Status.PENDING, Status.IN_PROGRESS, Status.COMPLETED]},
+            }
+        )
+        .sort("_id", -1)
+        .limit(limit)
+    )
+    return [{**a, "_id": str(a["_id"])} async for a in cursor]
+
+
+async def find_by_batch(batch_id: str) -> List[Dict[str, Any]]:
+    """Analyses of a batch in submission order."""
+    cursor = db.analyses.find({"batch_id": batch_id}).sort("_id", 1)
+    return [{**a, "_id": str(a["_id"])} async for a in cursor]
+
+
+# ---------- status transitions ----------
+async def set_queue_positions(positions: Dict[str, Optional[int]]) -> None:
+    """Persist the queue position of many analyses in one round trip."""
+    if positions:
+        await db.analyses.bulk_write(
+            [
+                UpdateOne({"_id": _oid(analysis_id)}, {"$set": {"queue_position": position}})
+                for analysis_id, position in positions.items()
+            ],
+            ordered=False,
+        )
+
+
+async def mark_in_progress(analysis_id: str) -> None:
+    await update_analysis(
+        analysis_id,
+        {"status": Status.IN_PROGRESS, "queue_position": None, "started_at": _now()},
+    )
+
+
+async def mark_completed(analysis_id: str, report_path: str) -> None:
+    await update_analysis(
+        analysis_id,
+        {"status": Status.COMPLETED, "report_path": report_path, "finished_at": _now()},
+    )
+
+
+async def mark_failed(analysis_id: str) -> None:
+    await update_analysis(
+        analysis_id, {"status": Status.FAILED, "queue_position": None, "finished_at": _now()}
+    )
+
+
+async def mark_pending(analysis_id: str) -> None:
+    await update_analysis(analysis_id, {"status": Status.PENDING})
+
+
+async def fail_interrupted() -> int:
+    """Mark analyses left in progress by a previous process as failed."""
+    result = await db.analyses.update_many(
+        {"status": Status.IN_PROGRESS},
+        {"$set": {"status": Status.FAILED, "queue_position": None}},
+    )
+    return result.modified_count
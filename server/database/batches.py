@@ -0,0 +1,65 @@
+import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+
+from .analyses import find_by_batch
+from .db import db
+from .schema import BatchSchema, Status
+
+FINISHED = (Status.COMPLETED, Status.FAILED)
+
+
+def _oid(batch_id: str) -> ObjectId:
+    return batch_id if isinstance(batch_id, ObjectId) else ObjectId(batch_id)
+
+
+# ---------- CRUD ----------
+async def insert_batch(doc: BatchSchema) -> str:
+    """Insert a new batch and return its id as a string."""
+    doc_dict = doc.model_dump(exclude={"id"}, by_alias=False)
+    result = await db.batches.insert_one(doc_dict)
+    return str(result.inserted_id)
+
+
+async def get_batch(batch_id: str) -> Optional[Dict[str, Any]]:
+    batch = await db.batches.find_one({"_id": _oid(batch_id)})
+    if batch:
+        batch["_id"] = str(batch["_id"])
+    return batch
+
+
+async def update_batch(batch_id: str, fields: Dict[str, Any]) -> None:
+    await db.batches.update_one({"_id": _oid(batch_id)}, {"$set": fields})
+
+
+# ---------- status ----------
+def summarize(items: List[Dict[str, Any]]) -> Tuple[Status, Dict[str, int]]:
+    """
+    Overall status and per-status counts of a batch's analyses: completed
+    once every item has finished and at least one succeeded, failed if all
+    of them failed.
+    """
+    counts = {s.value: 0 for s in Status}
+    for item in items:
+        counts[Status(item["status"]).value] += 1
+
+    finished = counts[Status.COMPLETED.value] + counts[Status.FAILED.value]
+    if items and finished == len(items):
+        status = Status.COMPLETED if counts[Status.COMPLETED.value] else Status.FAILED
+    elif counts[Status.PENDING.value] == len(items):
+        status = Status.PENDING
+    else:
+        status = Status.IN_PROGRESS
+    return status, counts
+
+
+async def refresh_status(batch_id: str) -> List[Dict[str, Any]]:
+    """Recompute the batch status from its analyses and return them."""
+    items = await find_by_batch(batch_id)
+    status, counts = summarize(items)
+    fields: Dict[str, Any] = {"status": status, "counts": counts}
+    if status in FINISHED:
+        fields["finished_at"] = datetime.datetime.now().ctime()
+    await update_batch(batch_id, fields)
+    return items
@@ -1,13 +1,34 @@
-from pymongo.mongo_client import MongoClient
+from pymongo import AsyncMongoClient
 from pymongo.server_api import ServerApi
-from config.settings import mongodb_uri
+from config.settings import (
+    mongodb_uri,
+    mongodb_max_pool_size,
+    mongodb_min_pool_size,
+    mongodb_max_idle_ms,
+    mongodb_wait_queue_timeout_ms,
+)
 
-client = MongoClient(mongodb_uri, server_api=ServerApi('1'))
+# One client (and therefore one connection pool) shared by the whole process.
+client = AsyncMongoClient(
+    mongodb_uri,
+    server_api=ServerApi('1'),
+    maxPoolSize=mongodb_max_pool_size,
+    minPoolSize=mongodb_min_pool_size,
+    maxIdleTimeMS=mongodb_max_idle_ms,
+    waitQueueTimeoutMS=mongodb_wait_queue_timeout_ms,
+)
+db = client['market_analysis']
 
-try:
-    client.admin.command('ping')
-    print("Pinged your deployment. You successfully connected to MongoDB!")
-    db = client['market_analysis']
-except Exception as e:
-    print(e)
-    
\ No newline at end of file
+
+async def ping() -> bool:
+    try:
+        await client.admin.command('ping')
+        print("Pinged your deployment. You successfully connected to MongoDB!")
+        return True
+    except Exception as e:
+        print(e)
+        return False
+
+
+async def close() -> None:
+    await client.close()
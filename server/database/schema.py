@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field
 from enum import Enum
 import time
@@ -24,10 +24,33 @@ class Status(str, Enum):
 class AnalysisSchema(BaseModel):
     id: Optional[str] = Field(default=None, description="Unique identifier for the analysis", alias="_id") 
     query: str = Field(..., description="The market query or topic")
+    query_key: Optional[str] = Field(default=None, description="Normalized query used to find identical analyses")
     analysis_type: AnalysisType = Field(..., description="The type of analysis to perform")
     status: Status = Field(default=Status.PENDING, description="The current status of the analysis")
     created_at: Optional[str] = Field(default=datetime.datetime.now().ctime(), description="The timestamp when the analysis was created")
     report_path: Optional[str] = Field(default=None, description="Path to the generated report file")
+    queue_position: Optional[int] = Field(default=None, description="1-based position in the job queue while pending")
+    started_at: Optional[str] = Field(default=None, description="The timestamp when a worker picked the analysis up")
+    finished_at: Optional[str] = Field(default=None, description="The timestamp when the analysis finished")
+    context_tokens_saved: Optional[int] = Field(default=None, description="Estimated prompt tokens saved by compacting tool results")
+    reflection: Optional[dict] = Field(default=None, description="Reflection loop outcome: stop_reason, rounds and rounds_saved")
+    usage: Optional[dict] = Field(default=None, description="LLM calls, tokens and cost in USD, in total and per node and model")
+    stream: Optional[dict] = Field(default=None, description="Stream buffer policy and how many events were coalesced, dropped, spilled or evicted")
+    batch_id: Optional[str] = Field(default=None, description="The batch this analysis was submitted in, if any")
+
+    class Config:
+        validate_by_name = True
+
+
+class BatchSchema(BaseModel):
+    id: Optional[str] = Field(default=None, description="Unique identifier for the batch", alias="_id")
+    queries: List[str] = Field(..., description="The market queries, each analysed for every type")
+    analysis_types: List[AnalysisType] = Field(..., description="The types of analysis run for every query")
+    status: Status = Field(default=Status.PENDING, description="Overall status derived from the items")
+    items: List[dict] = Field(default_factory=list, description="One entry per query and type: analysis_id, query, analysis_type")
+    counts: Optional[dict] = Field(default=None, description="Number of items per status")
+    created_at: Optional[str] = Field(default_factory=lambda: datetime.datetime.now().ctime(), description="The timestamp when the batch was created")
+    finished_at: Optional[str] = Field(default=None, description="The timestamp when the last item finished")
 
     class Config:
         validate_by_name = True
@@ -0,0 +1,67 @@
+import asyncio
+import os
+import resource
+import sys
+import time
+from collections import deque
+from typing import Deque, Optional
+
+from .scheduler import _percentile
+
+_PAGE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_bytes() -> int:
+    """Current resident set size of this process (peak RSS where /proc is missing)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class LoopMonitor:
+    """
+    Measures event-loop lag: a task sleeps for ``tick`` seconds and records
+    how late it wakes up, which is the delay every other coroutine on the
+    loop (websocket sends, request handlers) sees at that moment.
+    """
+
+    def __init__(self, tick: float = 0.05, window: int = 1200):
+        self.tick = tick
+        self._lags: Deque[float] = deque(maxlen=window)
+        self._max = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._rss_start = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._rss_start = rss_bytes()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.tick)
+            lag = max(0.0, time.perf_counter() - start - self.tick)
+            self._lags.append(lag)
+            self._max = max(self._max, lag)
+
+    def stats(self) -> dict:
+        rss = rss_bytes()
+        return {
+            "lag_ms": {
+                "p50": _percentile([l * 1000 for l in self._lags], 50),
+                "p95": _percentile([l * 1000 for l in self._lags], 95),
+                "max": round(self._max * 1000, 3),
+            },
+            "rss_mb": round(rss / 2**20, 1),
+            "rss_growth_mb": round((rss - self._rss_start) / 2**20, 1),
+        }
@@ -0,0 +1,221 @@
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+
+class QueueFullError(Exception):
+    """Raised when the pending backlog is above the admission threshold."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Job queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class Job:
+    def __init__(
+        self,
+        analysis_id: str,
+        analysis_type: str,
+        run: Callable[[], Awaitable[None]],
+    ):
+        self.analysis_id = analysis_id
+        self.analysis_type = analysis_type
+        self.run = run
+        self.enqueued_at = time.monotonic()
+        self.position: Optional[int] = None
+
+
+def _percentile(values, pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1)
+    return round(ordered[max(idx, 0)], 3)
+
+
+class JobScheduler:
+    """
+    FIFO job queue drained by a fixed pool of worker slots.
+
+    A job is only dispatched when a slot is free and its analysis type is
+    below its own concurrency cap, otherwise the next eligible job in the
+    queue is picked. Submissions beyond ``max_pending`` are rejected with
+    ``QueueFullError`` so the caller can answer with a 429.
+
+    Hooks are awaited on every transition so the caller can persist state:
+        on_positions(changes)       - [(job, position)] of every job whose
+                                      queue position changed (1-based)
+        on_start(job)               - job left the queue and is running
+        on_finish(job, error)       - job finished, error is None on success
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_per_type: int,
+        type_caps: Optional[Dict[str, int]] = None,
+        max_pending: int = 50,
+        on_positions: Optional[Callable[[List[Tuple[Job, int]]], Awaitable[None]]] = None,
+        on_start: Optional[Callable[[Job], Awaitable[None]]] = None,
+        on_finish: Optional[Callable[[Job, Optional[BaseException]], Awaitable[None]]] = None,
+        default_job_seconds: float = 300.0,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.max_per_type = max(1, max_per_type)
+        self.type_caps = type_caps or {}
+        self.max_pending = max_pending
+        self.on_positions = on_positions
+        self.on_start = on_start
+        self.on_finish = on_finish
+        self.default_job_seconds = default_job_seconds
+
+        self.pending: Deque[Job] = deque()
+        self.running: Dict[str, asyncio.Task] = {}
+        self._running_per_type: Dict[str, int] = {}
+        self._changed = asyncio.Event()
+        self._dispatcher: Optional[asyncio.Task] = None
+
+        # rolling windows used for Retry-After estimation and stats
+        self._wait_times: Deque[float] = deque(maxlen=200)
+        self._run_times: Deque[float] = deque(maxlen=200)
+
+    # ---------- lifecycle ----------
+    def start(self) -> None:
+        if self._dispatcher is None:
+            self._dispatcher = asyncio.create_task(self._dispatch_loop())
+
+    async def stop(self) -> None:
+        if self._dispatcher:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+        for task in list(self.running.values()):
+            task.cancel()
+        if self.running:
+            await asyncio.gather(*self.running.values(), return_exceptions=True)
+
+    # ---------- admission ----------
+    def type_cap(self, analysis_type: str) -> int:
+        return int(self.type_caps.get(analysis_type, self.max_per_type))
+
+    def estimate_wait(self, extra: int = 1) -> int:
+        """Seconds until a newly submitted job would be expected to start."""
+        avg = (
+            sum(self._run_times) / len(self._run_times)
+            if self._run_times
+            else self.default_job_seconds
+        )
+        ahead = len(self.pending) + extra
+        return max(1, math.ceil(avg * ahead / self.max_workers))
+
+    def ensure_capacity(self, n: int = 1) -> None:
+        if len(self.pending) + n > self.max_pending:
+            raise QueueFullError(self.estimate_wait())
+
+    async def submit(self, job: Job, force: bool = False) -> int:
+        """Queue a job and return its 1-based position in the backlog."""
+        if not force:
+            self.ensure_capacity()
+
+        self.pending.append(job)
+        position = len(self.pending)
+        # best effort (see _publish_positions): the job is queued either way,
+        # so the caller must not answer with an error
+        await self._publish_positions()
+        self._changed.set()
+        return position
+
+    def is_known(self, analysis_id: str) -> bool:
+        return analysis_id in self.running or any(
+            j.analysis_id == analysis_id for j in self.pending
+        )
+
+    # ---------- dispatch ----------
+    def _pop_eligible(self) -> Optional[Job]:
+        if len(self.running) >= self.max_workers:
+            return None
+
+        for job in self.pending:
+            used = self._running_per_type.get(job.analysis_type, 0)
+            if used < self.type_cap(job.analysis_type):
+                self.pending.remove(job)
+                return job
+        return None
+
+    async def _dispatch_loop(self) -> None:
+        while True:
+            job = self._pop_eligible()
+            if job is None:
+                self._changed.clear()
+                await self._changed.wait()
+                continue
+
+            self._running_per_type[job.analysis_type] = (
+                self._running_per_type.get(job.analysis_type, 0) + 1
+            )
+            self.running[job.analysis_id] = asyncio.create_task(self._run(job))
+            await self._publish_positions()
+
+    async def _run(self, job: Job) -> None:
+        started = time.monotonic()
+        self._wait_times.append(started - job.enqueued_at)
+        error: Optional[BaseException] = None
+
+        try:
+            if self.on_start:
+                await self.on_start(job)
+            await job.run()
+        except asyncio.CancelledError as exc:
+            error = exc
+            raise
+        except Exception as exc:
+            error = exc
+            print(f"Job {job.analysis_id} failed: {exc}")
+        finally:
+            self._run_times.append(time.monotonic() - started)
+            self.running.pop(job.analysis_id, None)
+            self._running_per_type[job.analysis_type] -= 1
+            self._changed.set()
+            if self.on_finish:
+                try:
+                    await self.on_finish(job, error)
+                except Exception as exc:
+                    print(f"Job {job.analysis_id} finish hook failed: {exc}")
+
+    async def _publish_positions(self) -> None:
+        # one hook call per transition, however many jobs moved up
+        changes: List[Tuple[Job, int]] = [
+            (job, idx) for idx, job in enumerate(self.pending, 1) if job.position != idx
+        ]
+        if not changes:
+            return
+        if self.on_positions:
+            # best effort: a failed write must neither stop the dispatcher
+            # nor fail a submit whose job is already queued
+            try:
+                await self.on_positions(changes)
+            except Exception as exc:
+                print(f"Queue position hook failed: {exc}")
+                return
+        # only now, so positions that failed to publish are sent again
+        for job, idx in changes:
+            job.position = idx
+
+    # ---------- reporting ----------
+    def stats(self) -> dict:
+        return {
+            "running": len(self.running),
+            "pending": len(self.pending),
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "running_per_type": {k: v for k, v in self._running_per_type.items() if v},
+            "wait_seconds": {
+                "p50": _percentile(self._wait_times, 50),
+                "p95": _percentile(self._wait_times, 95),
+            },
+            "run_seconds": {
+                "p50": _percentile(self._run_times, 50),
+                "p95": _percentile(self._run_times, 95),
+            },
+        }
@@ -0,0 +1,220 @@
+import sys
+import os
+# Add the server directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from config.settings import (
+    mcp_cache_enabled,
+    mcp_cache_path,
+    mcp_cache_max_memory_items,
+    mcp_cache_max_disk_items,
+    mcp_cache_ttls,
+)
+from mcp_servers.errors import ToolError, raise_on_error
+
+# Seconds a tool result stays fresh. News moves fast, trends and geo barely do.
+DEFAULT_TTLS: Dict[str, float] = {
+    "google_search": 6 * 3600,
+    "search_google_news": 15 * 60,
+    "search_google_shopping": 6 * 3600,
+    "google_trends_summary": 24 * 3600,
+    "get_reddit_post_data": 3600,
+    "find_relevant_subreddits": 24 * 3600,
+    "search_youtube": 6 * 3600,
+    "get_youtube_comments": 3600,
+    "summarize_youtube_transcript": 7 * 24 * 3600,
+    "scrape_website_to_markdown": 24 * 3600,
+}
+DEFAULT_TTL = 3600
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+class ToolCache:
+    """
+    Tool result cache shared by every MCP server in the process.
+
+    An in-memory LRU tier sits in front of a SQLite tier, and entries carry
+    their own expiry so each tool can have its own TTL. Tools run in worker
+    threads so they don't block the event loop, and identical calls made
+    while the first one is still running wait for its result instead of
+    hitting the upstream API again (single-flight). Failures (``ToolError``
+    results and exceptions) are never cached.
+    """
+
+    def __init__(self, path: str, max_memory_items: int = 1024, max_disk_items: int = 50000):
+        self.max_memory_items = max_memory_items
+        self.max_disk_items = max_disk_items
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        # key -> result of the call in progress; only touched on the event loop
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._writes = 0
+        self.counters: Dict[str, int] = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+        }
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tool_cache ("
+            " key TEXT PRIMARY KEY, tool TEXT NOT NULL, value TEXT NOT NULL,"
+            " expires REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def key(tool: str, arguments: Dict[str, Any]) -> str:
+        payload = json.dumps(_normalize(arguments), sort_keys=True, default=str)
+        return hashlib.sha256(f"{tool}\x00{payload}".encode()).hexdigest()
+
+    def _get(self, key: str) -> Optional[str]:
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry and entry[0] > now:
+            self._memory.move_to_end(key)
+            self.counters["memory_hits"] += 1
+            return entry[1]
+        self._memory.pop(key, None)
+
+        row = self._conn.execute(
+            "SELECT value, expires FROM tool_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[1] <= now:
+            return None
+
+        self._conn.execute("UPDATE tool_cache SET accessed = ? WHERE key = ?", (now, key))
+        self._conn.commit()
+        self._remember(key, row[1], row[0])
+        self.counters["disk_hits"] += 1
+        return row[0]
+
+    def _remember(self, key: str, expires: float, value: str) -> None:
+        self._memory[key] = (expires, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _put(self, key: str, tool: str, value: str, ttl: float) -> None:
+        now = time.time()
+        expires = now + ttl
+        self._remember(key, expires, value)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO tool_cache (key, tool, value, expires, accessed)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (key, tool, value, expires, now),
+        )
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self._conn.execute("DELETE FROM tool_cache WHERE expires <= ?", (now,))
+            self._conn.execute(
+                "DELETE FROM tool_cache WHERE key IN ("
+                " SELECT key FROM tool_cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_disk_items,),
+            )
+        self._conn.commit()
+
+    def _lookup(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._get(key)
+
+    def _store(self, key: str, tool: str, value: str, ttl: float) -> None:
+        with self._lock:
+            self._put(key, tool, value, ttl)
+
+    async def call(self, tool: str, arguments: Dict[str, Any], ttl: float, fn: Callable[[], str]) -> str:
+        key = self.key(tool, arguments)
+
+        cached = await asyncio.to_thread(self._lookup, key)
+        if cached is not None:
+            return cached
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.counters["coalesced"] += 1
+            return await asyncio.shield(inflight)
+
+        inflight = asyncio.get_running_loop().create_future()
+        self._inflight[key] = inflight
+        self.counters["misses"] += 1
+        try:
+            result = await asyncio.to_thread(fn)
+            inflight.set_result(result)
+        except BaseException as exc:
+            inflight.set_exception(exc)
+            inflight.exception()  # retrieved: waiters get it, nobody else needs to
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        if isinstance(result, str) and not isinstance(result, ToolError):
+            await asyncio.to_thread(self._store, key, tool, result, ttl)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.counters, "memory_items": len(self._memory)}
+
+
+tool_cache = ToolCache(
+    mcp_cache_path,
+    max_memory_items=mcp_cache_max_memory_items,
+    max_disk_items=mcp_cache_max_disk_items,
+)
+
+
+def cached_tool(fn: Callable[..., str]) -> Callable[..., str]:
+    """
+    Serve a tool from ``tool_cache``, keyed on its name and bound arguments
+    (defaults applied). The wrapper is async and keeps the original
+    signature and docstring, so FastMCP builds the same tool schema and
+    awaits it instead of running the blocking tool on its event loop.
+    A ``ToolError`` result is raised as ``ToolFailed``, which FastMCP
+    reports as an ``isError`` result.
+    """
+    if not mcp_cache_enabled:
+        @functools.wraps(fn)
+        async def uncached(*args, **kwargs):
+            return raise_on_error(await asyncio.to_thread(fn, *args, **kwargs))
+
+        return uncached
+
+    name = fn.__name__
+    ttl = float(mcp_cache_ttls.get(name, DEFAULT_TTLS.get(name, DEFAULT_TTL)))
+    signature = inspect.signature(fn)
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        result = await tool_cache.call(
+            name, dict(bound.arguments), ttl, lambda: fn(*args, **kwargs)
+        )
+        return raise_on_error(result)
+
+    return wrapper
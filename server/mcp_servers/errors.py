@@ -0,0 +1,36 @@
+import re
+
+
+class ToolError(str):
+    """
+    A tool's failure message. Tools return it instead of a plain string, so
+    the tool cache can tell a failure from a result and never stores it, and
+    the agent receives the text as an error result (see ``ToolFailed``).
+    """
+
+
+class ToolFailed(Exception):
+    """
+    Raised by the tool wrappers for a ``ToolError`` result, so FastMCP
+    answers with ``isError`` and MCP clients see the failure without having
+    to parse the text.
+    """
+
+
+def raise_on_error(result):
+    if isinstance(result, ToolError):
+        raise ToolFailed(str(result))
+    return result
+
+
+# What the tools answer when a call failed or found nothing, for results
+# that reach a client as plain text (older MCP adapters, cassettes).
+_FAILURE = re.compile(
+    r"^(?:Error\b|[\w ]*Error:|An unexpected error occurred|"
+    r"Summary formatting not yet implemented|No .* found\b)"
+)
+
+
+def is_failure(text: str) -> bool:
+    """True for a tool result that failed or carries no evidence."""
+    return not text.strip() or bool(_FAILURE.match(text.strip()))
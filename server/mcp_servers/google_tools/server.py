@@ -5,14 +5,15 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirna
 from mcp.server.fastmcp import FastMCP
 # from tools import *
 from .tools import *
+from mcp_servers.cache import cached_tool
 
 
 mcp = FastMCP("Google Tools")
 
-mcp.add_tool(google_search)
-mcp.add_tool(search_google_shopping)
-mcp.add_tool(search_google_news)
-mcp.add_tool(google_trends_summary)
+mcp.add_tool(cached_tool(google_search))
+mcp.add_tool(cached_tool(search_google_shopping))
+mcp.add_tool(cached_tool(search_google_news))
+mcp.add_tool(cached_tool(google_trends_summary))
 
 # if __name__ == "__main__":
 #     mcp.run('streamable-http',mount_path='/mcp')
\ No newline at end of file
@@ -7,6 +7,7 @@ import json
 from typing import Optional
 import requests
 from config import *
+from mcp_servers.errors import ToolError
 
 def search_google_news(
     query: str,
@@ -57,6 +58,9 @@ def search_google_news(
         }
 
         response = requests.request("POST", url, headers=headers, data=json.dumps(payload))
+        if not response.ok:
+            return ToolError(f"Error searching Google News: HTTP {response.status_code}")
+
         results = json.loads(response.text)
 
         if "news" not in results:
@@ -99,4 +103,4 @@ def search_google_news(
         
         return "\n".join(summary_parts)
     except Exception as e:
-        return f"Error searching Google News"
+        return ToolError(f"Error searching Google News")
@@ -6,6 +6,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirna
 import requests
 import json
 from config import *  
+from mcp_servers.errors import ToolError
 
 def google_search(query:str)->str:
     """
@@ -33,6 +34,9 @@ def google_search(query:str)->str:
         
         response = requests.request("POST", url, headers=headers, data=params)
 
+        if not response.ok:
+            return ToolError(f"Error searching Google: HTTP {response.status_code}")
+
         results = json.loads(response.text)
 
         if 'organic' not in results:
@@ -60,6 +64,6 @@ def google_search(query:str)->str:
     
     except Exception as e:
         
-        return f"Error searching Google: {str(e)}"
+        return ToolError(f"Error searching Google: {str(e)}")
 
 
@@ -4,6 +4,7 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
 
 from config import *
+from mcp_servers.errors import ToolError
 from serpapi import GoogleSearch
 
 def search_google_shopping(query: str, sort_by: str = 'relevance', min_price = None, max_price  = None, condition = None, location = None, num_results: int = 10) -> str:
@@ -62,7 +63,7 @@ def search_google_shopping(query: str, sort_by: str = 'relevance', min_price = N
         results = search.get_dict()
 
         if "error" in results:
-            return f"SerpApi Error: {results['error']}"
+            return ToolError(f"SerpApi Error: {results['error']}")
 
         # Create market analysis summary
         if 'shopping_results' not in results:
@@ -112,4 +113,4 @@ def search_google_shopping(query: str, sort_by: str = 'relevance', min_price = N
         return analysis
     except Exception as e:
         
-        return f"Error searching Google Shopping"
+        return ToolError(f"Error searching Google Shopping")
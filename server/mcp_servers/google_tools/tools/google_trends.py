@@ -6,6 +6,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirna
 from serpapi import GoogleSearch
 from enum import Enum
 from config import  *
+from mcp_servers.errors import ToolError
 from typing import Optional
 from .google_trends_helper import *
 
@@ -105,7 +106,7 @@ def google_trends_summary(query: str, data_type: DataType, geo: Optional[str] =
     
     if "error" in analytics_data:
         
-        return f"Analytics Error: {analytics_data['error']}"
+        return ToolError(f"Analytics Error: {analytics_data['error']}")
     
     if data_type == DataType.TIMESERIES:
         return format_timeseries_summary(analytics_data)
@@ -117,4 +118,4 @@ def google_trends_summary(query: str, data_type: DataType, geo: Optional[str] =
         return format_queries_summary(analytics_data)
     else:
         
-        return "Summary formatting not yet implemented for this data type"
+        return ToolError("Summary formatting not yet implemented for this data type")
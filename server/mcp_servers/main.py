@@ -10,6 +10,7 @@ from google_tools import google_mcp
 from reddit_tools import reddit_mcp
 from scraper_tools import scraper_mcp
 from youtube_tools import youtube_mcp
+from mcp_servers.cache import tool_cache
 
 app = FastAPI(title="Market Research MCP Server", version="1.0.0")
 
@@ -34,6 +35,11 @@ async def root():
     }
 
 
+@app.get("/cache/stats")
+async def cache_stats():
+    return tool_cache.stats()
+
+
 if __name__ == "__main__":
     uvicorn.run(
         "mcp_servers.main:app",
@@ -6,6 +6,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 import praw
 from config import *
 from mcp.server.fastmcp import FastMCP
+from mcp_servers.cache import cached_tool
+from mcp_servers.errors import ToolError
 
 mcp = FastMCP("Reddit Tools")
 
@@ -35,6 +37,7 @@ except Exception as e:
 
 
 @mcp.tool()
+@cached_tool
 def get_reddit_post_data(query: str, subreddit_name: str = "all", max_posts: int = 5) -> str:
     """
     Search Reddit for posts and comments related to a specific topic.
@@ -50,7 +53,7 @@ def get_reddit_post_data(query: str, subreddit_name: str = "all", max_posts: int
     try:
         if not reddit:
             
-            return "Error: Reddit client not initialized. Check credentials"
+            return ToolError("Error: Reddit client not initialized. Check credentials")
 
         if max_posts > 10:
             max_posts = 10
@@ -113,9 +116,10 @@ def get_reddit_post_data(query: str, subreddit_name: str = "all", max_posts: int
         return analysis
     except Exception as e:
         
-        return f"Error searching Reddit"
+        return ToolError(f"Error searching Reddit")
 
 @mcp.tool()
+@cached_tool
 def find_relevant_subreddits(keywords: str, limit: int = 10) -> str:
     """
     Find subreddits relevant to specific keywords for targeted market research.
@@ -130,7 +134,7 @@ def find_relevant_subreddits(keywords: str, limit: int = 10) -> str:
     try:
         if not reddit:
             
-            return "Error: Reddit client not initialized. Check credentials"
+            return ToolError("Error: Reddit client not initialized. Check credentials")
 
         keywords_list = keywords.split()
         query = " ".join(keywords_list)
@@ -169,7 +173,7 @@ def find_relevant_subreddits(keywords: str, limit: int = 10) -> str:
         return analysis
     except Exception as e:
         
-        return f"Error finding subreddits"
+        return ToolError(f"Error finding subreddits")
 
 if __name__ == "__main__":
     mcp.run('streamable-http')
\ No newline at end of file
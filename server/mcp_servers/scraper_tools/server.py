@@ -8,10 +8,13 @@ from crawl4ai import AsyncWebCrawler
 from config import * 
 
 from mcp.server.fastmcp import FastMCP
+from mcp_servers.cache import cached_tool
+from mcp_servers.errors import ToolError
 
 mcp = FastMCP("Web Scraper Tools")
 
 @mcp.tool()
+@cached_tool
 def scrape_website_to_markdown(url: str, include_links: bool = True, include_images: bool = False) -> str:
     """
     Scrape a website and return its content in clean markdown format.
@@ -42,13 +45,13 @@ def scrape_website_to_markdown(url: str, include_links: bool = True, include_ima
         
         if not result.success: # type: ignore
             
-            return f"Error: Failed to scrape {url}. Status: {result.status_code}" # type: ignore
+            return ToolError(f"Error: Failed to scrape {url}. Status: {result.status_code}") # type: ignore
         
         # Get the markdown content
         markdown_content = result.markdown # type: ignore
         
         if not markdown_content:
-            return f"Error: No content extracted from {url}"
+            return ToolError(f"Error: No content extracted from {url}")
         
         # Create analysis summary
         analysis = f"Website Content Analysis for: {url}\n"
@@ -70,5 +73,5 @@ def scrape_website_to_markdown(url: str, include_links: bool = True, include_ima
         
     except Exception as e:
         
-        return f"Error scraping website {url}"
+        return ToolError(f"Error scraping website {url}")
 
@@ -8,12 +8,15 @@ import googleapiclient.discovery
 from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound # type: ignore
 from config import *
 from mcp.server.fastmcp import FastMCP
+from mcp_servers.cache import cached_tool
+from mcp_servers.errors import ToolError
 
 
 mcp = FastMCP("YouTube Tools")
 
 
 @mcp.tool()
+@cached_tool
 def search_youtube(query: str) -> str:
     """
     Search YouTube for videos related to a specific query.
@@ -59,9 +62,10 @@ def search_youtube(query: str) -> str:
         return analysis
     except Exception as e:
         
-        return f"Error searching YouTube"
+        return ToolError(f"Error searching YouTube")
 
 @mcp.tool()
+@cached_tool
 def get_youtube_comments(video_id: str) -> str:
     """
     Fetch comments from a specific YouTube video for sentiment analysis.
@@ -106,9 +110,10 @@ def get_youtube_comments(video_id: str) -> str:
         return analysis
     except Exception as e:
         print(f"Error fetching YouTube comments: {e}")
-        return f"Error fetching YouTube comments"
+        return ToolError(f"Error fetching YouTube comments")
 
 @mcp.tool()
+@cached_tool
 def summarize_youtube_transcript(video_id: str) -> str:
     """
     Fetch and summarize a YouTube video's transcript for content analysis.
@@ -134,14 +139,14 @@ def summarize_youtube_transcript(video_id: str) -> str:
                     break
                 
                 if not transcript_data:
-                     return f"Error: No transcripts found for video ID: {video_id}"
+                     return ToolError(f"Error: No transcripts found for video ID: {video_id}")
 
         except TranscriptsDisabled:
             
-            return f"Error: Transcripts are disabled for video ID: {video_id}"
+            return ToolError(f"Error: Transcripts are disabled for video ID: {video_id}")
         except Exception as e:
             
-            return f"An unexpected error occurred: {e}"
+            return ToolError(f"An unexpected error occurred: {e}")
 
         transcript_text = " ".join([item.text for item in transcript_data])
 
@@ -150,5 +155,5 @@ def summarize_youtube_transcript(video_id: str) -> str:
 
     except Exception as e:
         
-        return f"Error summarizing transcript"
+        return ToolError(f"Error summarizing transcript")
 
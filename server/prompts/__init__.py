@@ -0,0 +1,48 @@
+from database.schema import AnalysisType
+from .industry import *
+from .barrier_assessment import *
+from .competitive_analysis import *
+from .market_gap import *
+from .sales_forecast import *
+from .target_market_segmentation import *
+
+
+# ---------- per-type prompt bundles ----------
+ANALYSIS_PROMPTS = {
+    AnalysisType.INDUSTRY_ANALYSIS: dict(
+        PROMPT=INDUSTRY_PROMPT,
+        reflection_instructions_prompt=industry_reflection_instructions_prompt,
+        fill_gaps_prompt=industry_fill_gaps_prompt,
+        merge_gaps_prompt=industry_merge_gaps_prompt,
+    ),
+    AnalysisType.BARRIER_ANALYSIS: dict(
+        PROMPT=BARRIER_ASSESSMENT_PROMPT,
+        reflection_instructions_prompt=barrier_assessment_reflection_instructions_prompt,
+        fill_gaps_prompt=barrier_assessment_fill_gaps_prompt,
+        merge_gaps_prompt=barrier_assessment_merge_gaps_prompt,
+    ),
+    AnalysisType.COMPETITOR_ANALYSIS: dict(
+        PROMPT=COMPETITIVE_ANALYSIS_PROMPT,
+        reflection_instructions_prompt=competitive_analysis_reflection_instructions_prompt,
+        fill_gaps_prompt=competitive_analysis_fill_gaps_prompt,
+        merge_gaps_prompt=competitive_analysis_merge_gaps_prompt,
+    ),
+    AnalysisType.MARKET_GAP_ANALYSIS: dict(
+        PROMPT=MARKET_GAP_PROMPT,
+        reflection_instructions_prompt=market_gap_reflection_instructions_prompt,
+        fill_gaps_prompt=market_gap_fill_gaps_prompt,
+        merge_gaps_prompt=market_gap_merge_gaps_prompt,
+    ),
+    AnalysisType.SALES_FORECASTING: dict(
+        PROMPT=SALES_FORECAST_PROMPT,
+        reflection_instructions_prompt=sales_forecast_reflection_instructions_prompt,
+        fill_gaps_prompt=sales_forecast_fill_gaps_prompt,
+        merge_gaps_prompt=sales_forecast_merge_gaps_prompt,
+    ),
+    AnalysisType.TARGET_MARKET_ANALYSIS: dict(
+        PROMPT=TARGET_MARKET_SEGMENTATION_PROMPT,
+        reflection_instructions_prompt=target_market_segmentation_reflection_instructions_prompt,
+        fill_gaps_prompt=target_market_segmentation_fill_gaps_prompt,
+        merge_gaps_prompt=target_market_segmentation_merge_gaps_prompt,
+    ),
+}
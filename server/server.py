@@ -1,9 +1,8 @@
 import asyncio
-
 import os
-from bson import ObjectId
+import weakref
 from contextlib import asynccontextmanager
-from typing import Dict, List
+from typing import Dict, List, Optional, Sequence, Tuple
 
 from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
@@ -14,23 +13,56 @@ from langchain_mcp_adapters.client import MultiServerMCPClient
 
 from uvicorn import run
 
-from config.settings import output_dir
-from database.db import db
+from config.settings import (
+    output_dir,
+    max_concurrent_jobs,
+    max_jobs_per_type,
+    job_type_concurrency,
+    max_pending_jobs,
+    stream_buffer_items,
+    stream_buffer_bytes,
+    stream_buffer_policy,
+    stream_spill_dir,
+    stream_spill_max_bytes,
+    stream_buffer_low_water,
+    stream_frame_window_ms,
+    stream_frame_max_bytes,
+    batch_max_items,
+    dedupe_window_seconds,
+)
+from database import analyses, batches
+from database.db import ping as ping_db, close as close_db
+from agents import evidence, registry, render, routing, usage
 from agents.create_agent import create_agent
-from database.schema import AnalysisSchema, AnalysisType, Status 
-from prompts.industry import *
-from prompts.barrier_assessment import *
-from prompts.competitive_analysis import *
-from prompts.market_gap import *
-from prompts.sales_forecast import *
-from prompts.target_market_segmentation import *
+from agents.registry import tools_fingerprint
+from agents.checkpoint import open_checkpointer
+from agents.utils import rate_limiter, llm_cache
+from jobs.scheduler import Job, JobScheduler, QueueFullError
+from jobs.monitor import LoopMonitor
+from streaming.broadcaster import Channel
+from streaming.events import EventWriter, parse_types
+from streaming.framing import negotiate, send_stream
+from database.schema import AnalysisSchema, AnalysisType, BatchSchema, Status
+from prompts import ANALYSIS_PROMPTS
 
 
 # ---------- lifespan: MCP client ----------
 class McpState:
+    client: Optional[MultiServerMCPClient] = None
     tools: List[BaseTool] = []
 
 
+async def load_tools() -> bool:
+    """(Re)load the MCP tool set; compiled agents are dropped if it changed."""
+    tools = await McpState.client.get_tools()  # type: ignore
+    changed = tools_fingerprint(tools) != tools_fingerprint(McpState.tools)
+    McpState.tools = tools
+    if changed:
+        registry.invalidate()
+        await registry.warm_up(tools, ANALYSIS_PROMPTS)
+    return changed
+
+
 MCP_BASE = "http://localhost:5000"
 
 
@@ -44,9 +76,24 @@ async def lifespan(app: FastAPI):
             "youtube_tools": {"url": f"{MCP_BASE}/mcp/youtube/sse", "transport": "sse"},
         }
     )
-    McpState.tools = await client.get_tools()
+    McpState.client = client
+
+    async with open_checkpointer() as checkpointer:
+        registry.set_checkpointer(checkpointer)
+        await load_tools()
 
-    yield
+        await ping_db()
+        await analyses.ensure_indexes()
+        scheduler.start()
+        loop_monitor.start()
+        await restore_pending_jobs(resume=checkpointer is not None)
+
+        yield
+
+        await scheduler.stop()
+        await loop_monitor.stop()
+        render.shutdown()
+        await close_db()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -59,9 +106,89 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ---------- global queues & tasks ----------
-queues: Dict[str, asyncio.Queue] = {}
-tasks: Dict[str, asyncio.Task] = {}
+# ---------- global channels & scheduler ----------
+channels: Dict[str, Channel] = {}
+# analysis id -> batch id, for the jobs that belong to a batch
+job_batches: Dict[str, str] = {}
+
+
+async def _on_positions(changes: List[Tuple[Job, int]]):
+    await analyses.set_queue_positions({job.analysis_id: position for job, position in changes})
+    for job, position in changes:
+        channel = channels.get(job.analysis_id)
+        if channel:
+            await EventWriter(channel).stage("queued", f"Position {position} in the queue")
+
+
+async def _on_start(job: Job):
+    await analyses.mark_in_progress(job.analysis_id)
+
+
+async def _on_finish(job: Job, error):
+    if error is None:
+        await analyses.mark_completed(
+            job.analysis_id, f"{job.analysis_id}/{job.analysis_type}.pdf"
+        )
+    elif isinstance(error, asyncio.CancelledError):
+        # interrupted by shutdown: leave it queued for the next start
+        await analyses.mark_pending(job.analysis_id)
+    else:
+        await analyses.mark_failed(job.analysis_id)
+
+    channel = channels.pop(job.analysis_id, None)
+    if channel:
+        await analyses.update_analysis(job.analysis_id, {"stream": channel.stats()})
+        channel.discard()
+
+    batch_id = job_batches.pop(job.analysis_id, None)
+    if batch_id and not isinstance(error, asyncio.CancelledError):
+        items = await batches.refresh_status(batch_id)
+        query = next((i["query"] for i in items if i["_id"] == job.analysis_id), None)
+        if query is not None and all(
+            i["status"] in batches.FINISHED for i in items if i["query"] == query
+        ):
+            evidence.release_shared(batch_id, query)
+
+
+scheduler = JobScheduler(
+    max_workers=max_concurrent_jobs,
+    max_per_type=max_jobs_per_type,
+    type_caps=job_type_concurrency,
+    max_pending=max_pending_jobs,
+    on_positions=_on_positions,
+    on_start=_on_start,
+    on_finish=_on_finish,
+)
+loop_monitor = LoopMonitor()
+
+
+async def restore_pending_jobs(resume: bool):
+    """
+    Re-queue analyses persisted as pending. Ones cut off mid-run are queued
+    first and resume from their last checkpoint, or are failed when
+    checkpointing is off.
+    """
+    interrupted = []
+    if resume:
+        interrupted = await analyses.find_by_status(Status.IN_PROGRESS)
+    else:
+        await analyses.fail_interrupted()
+
+    for analysis in interrupted + await analyses.find_by_status(Status.PENDING):
+        analysis_id = str(analysis["_id"])
+        if scheduler.is_known(analysis_id):
+            continue
+        batch = analysis.get("batch_id") and await batches.get_batch(analysis["batch_id"])
+        await scheduler.submit(
+            make_job(
+                analysis_id,
+                AnalysisType(analysis["analysis_type"]),
+                analysis["query"],
+                batch_id=batch["_id"] if batch else None,
+                batch_types=batch["analysis_types"] if batch else (),
+            ),
+            force=True,
+        )
 
 
 # ---------- HTTP: start the job ----------
@@ -71,10 +198,17 @@ class ResearchRequest(BaseModel):
 
 # ---------- WebSocket ----------
 @app.websocket("/ws/research/{request_id}")
-async def websocket_research(websocket: WebSocket, request_id: str):
-    await websocket.accept()
+async def websocket_research(
+    websocket: WebSocket, request_id: str, offset: int = 0, events: str = ""
+):
+    protocol = negotiate(websocket.scope.get("subprotocols", []))
+    await websocket.accept(subprotocol=protocol)
 
-    analysis = db.analyses.find_one({"_id": ObjectId(request_id)})
+    analysis = (
+        await analyses.get_analysis(request_id)
+        if analyses.is_valid_id(request_id)
+        else None
+    )
     print(f"WebSocket connection for analysis {request_id} with status {analysis}")
     if not analysis:
         await websocket.close(code=1008, reason="No analysis found for this id")
@@ -88,19 +222,25 @@ async def websocket_research(websocket: WebSocket, request_id: str):
         await websocket.close(code=1008, reason="Analysis failed")
         return
 
-    q = queues.get(request_id)
+    channel = channels.get(request_id)
 
-    if not q:
+    if not channel:
         await websocket.close(code=1008, reason="Unknown id")
         return
 
     try:
-        while True:
-            chunk = await q.get()
-            if chunk is None:  # sentinel
-                await websocket.close()
-                break
-            await websocket.send_text(chunk)
+        # resume from the last sequence number the client has seen
+        await send_stream(
+            websocket,
+            channel,
+            offset,
+            protocol,
+            window=stream_frame_window_ms / 1000,
+            max_bytes=stream_frame_max_bytes,
+            # e.g. ?events=progress for stage/progress/artifact/error only
+            types=parse_types(events),
+        )
+        await websocket.close()
     except WebSocketDisconnect:
         # client closed tab – task keeps running
         pass
@@ -129,22 +269,121 @@ def serve_user_file(
 
 
 @app.get("/analysis/{analysis_id}")
-def get_analysis(analysis_id: str):
-    try:
-        object_id = ObjectId(analysis_id)
-        analysis = db.analyses.find_one({"_id": object_id})
+async def get_analysis(analysis_id: str):
+    if not analyses.is_valid_id(analysis_id):
+        raise HTTPException(
+            status_code=400, detail=f"Invalid analysis ID format: {analysis_id}"
+        )
+
+    analysis = await analyses.get_analysis(analysis_id)
+    if not analysis:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+
+    return analysis
 
-        if not analysis:
-            raise HTTPException(status_code=404, detail="Analysis not found")
 
-        # Convert ObjectId back to string for JSON serialization
-        analysis["_id"] = str(analysis["_id"])
-        return analysis
-    except Exception as e:
+@app.get("/analysis/{analysis_id}/usage")
+async def get_analysis_usage(analysis_id: str):
+    """Token and cost accounting; live while the analysis is running."""
+    if not analyses.is_valid_id(analysis_id):
         raise HTTPException(
-            status_code=400, detail=f"Invalid analysis ID format: {str(e)}"
+            status_code=400, detail=f"Invalid analysis ID format: {analysis_id}"
         )
 
+    if usage.is_tracked(analysis_id):
+        return {"live": True, **usage.summary(analysis_id)}
+
+    analysis = await analyses.get_analysis(analysis_id)
+    if not analysis:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+
+    return {"live": False, **(analysis.get("usage") or usage.summary(analysis_id))}
+
+
+def make_job(
+    analysis_id: str,
+    analysis_type: AnalysisType,
+    query: str,
+    batch_id: Optional[str] = None,
+    batch_types: Sequence[str] = (),
+) -> Job:
+    """Create the output channel for an analysis and wrap its agent run in a Job."""
+    q = Channel(
+        max_items=stream_buffer_items,
+        max_bytes=stream_buffer_bytes,
+        policy=stream_buffer_policy,
+        spill_path=os.path.join(stream_spill_dir, f"{analysis_id}.jsonl"),
+        spill_max_bytes=stream_spill_max_bytes,
+        low_water=stream_buffer_low_water,
+    )
+    channels[analysis_id] = q
+    if batch_id:
+        job_batches[analysis_id] = batch_id
+
+    async def run():
+        await create_agent(
+            id=analysis_id,
+            analysisType=analysis_type,
+            user_prompt=query,
+            tools=McpState.tools,
+            out_queue=q,
+            batch_id=batch_id,
+            batch_types=batch_types,
+            **ANALYSIS_PROMPTS[analysis_type],
+        )
+
+    return Job(analysis_id, analysis_type, run)
+
+
+@app.post("/tools/refresh")
+async def refresh_tools():
+    changed = await load_tools()
+    return {"tools": [t.name for t in McpState.tools], "changed": changed}
+
+
+@app.get("/jobs/stats")
+def job_stats():
+    return {
+        **scheduler.stats(),
+        "llm": rate_limiter.stats(),
+        "llm_cache": llm_cache.stats() if llm_cache else None,
+        "llm_routes": routing.stats(),
+        "pdf_render": render.stats(),
+        "event_loop": loop_monitor.stats(),
+        "streams": {aid: ch.stats() for aid, ch in channels.items()},
+    }
+
+
+# (query key, analysis type) -> lock held while a submission is checked and queued
+submit_locks: "weakref.WeakValueDictionary[Tuple[str, str], asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+async def find_duplicate(key: str, analysis_type: str) -> Optional[dict]:
+    """
+    An identical analysis to hand back instead of starting a new run: one
+    still queued or running in this process, or a completed one within the
+    freshness window whose report is still on disk.
+    """
+    for analysis in await analyses.find_reusable(key, analysis_type):
+        analysis_id = analysis["_id"]
+        if analysis["status"] in (Status.PENDING, Status.IN_PROGRESS):
+            if scheduler.is_known(analysis_id):
+                return {
+                    "id": analysis_id,
+                    "status": "attached",
+                    "queue_position": analysis.get("queue_position"),
+                }
+        elif analyses.finished_within(analysis, dedupe_window_seconds) and os.path.isfile(
+            os.path.join(output_dir, analysis.get("report_path") or "")
+        ):
+            return {
+                "id": analysis_id,
+                "status": "reused",
+                "report_path": analysis["report_path"],
+                "finished_at": analysis["finished_at"],
+            }
+    return None
+
 
 @app.post("/analysis")
 async def create_analysis(req: Request):
@@ -159,127 +398,148 @@ async def create_analysis(req: Request):
     if "analysis_type" not in data:
         raise HTTPException(status_code=400, detail="Missing analysis_type")
 
-    doc = AnalysisSchema(
-        query=data["query"],
-        analysis_type=data["analysis_type"],
-        status=Status.PENDING,
-    )
+    if data["analysis_type"] not in [t.value for t in ANALYSIS_PROMPTS]:
+        raise HTTPException(status_code=400, detail="Unsupported analysis type")
 
-    # Convert to dict for MongoDB insertion (without the id field)
-    doc_dict = doc.model_dump(exclude={"id"}, by_alias=False)
-    result = db.analyses.insert_one(doc_dict)
-    
-    # Convert ObjectId to string for use as keys and parameters
-    analysis_id = str(result.inserted_id)
-    
-    q: asyncio.Queue = asyncio.Queue()
-    queues[analysis_id] = q
-
-    task = None
-    if doc.analysis_type == AnalysisType.INDUSTRY_ANALYSIS:
-        task = asyncio.create_task(
-            create_agent(
-                id=analysis_id,
-                analysisType=doc.analysis_type,
-                user_prompt=doc.query,
-                tools=McpState.tools,
-                out_queue=q,
-                PROMPT=INDUSTRY_PROMPT,
-                reflection_instructions_prompt=industry_reflection_instructions_prompt,
-                fill_gaps_prompt=industry_fill_gaps_prompt,
-                merge_gaps_prompt=industry_merge_gaps_prompt,
+    key = analyses.query_key(data["query"])
+    # identical submissions are checked and queued one at a time, so two
+    # concurrent requests cannot both start a run
+    lock = submit_locks.setdefault((key, data["analysis_type"]), asyncio.Lock())
+    async with lock:
+        if not data.get("force_refresh"):
+            duplicate = await find_duplicate(key, data["analysis_type"])
+            if duplicate:
+                return duplicate
+
+        try:
+            scheduler.ensure_capacity()
+        except QueueFullError as e:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many analyses queued, please retry later",
+                headers={"Retry-After": str(e.retry_after)},
             )
+
+        doc = AnalysisSchema(
+            query=data["query"],
+            query_key=key,
+            analysis_type=data["analysis_type"],
+            status=Status.PENDING,
         )
-    elif doc.analysis_type == AnalysisType.BARRIER_ANALYSIS:
-        task = asyncio.create_task(
-            create_agent(
-                id=analysis_id,
-                analysisType=doc.analysis_type,
-                user_prompt=doc.query,
-                tools=McpState.tools,
-                out_queue=q,
-                PROMPT=BARRIER_ASSESSMENT_PROMPT,
-                reflection_instructions_prompt=barrier_assessment_reflection_instructions_prompt,
-                fill_gaps_prompt=barrier_assessment_fill_gaps_prompt,
-                merge_gaps_prompt=barrier_assessment_merge_gaps_prompt,
-            )
+
+        analysis_id = await analyses.insert_analysis(doc)
+
+        position = await scheduler.submit(
+            make_job(analysis_id, doc.analysis_type, doc.query), force=True
         )
-    elif doc.analysis_type == AnalysisType.COMPETITOR_ANALYSIS:
-        task = asyncio.create_task(
-            create_agent(
-                id=analysis_id,
-                analysisType=doc.analysis_type,
-                user_prompt=doc.query,
-                tools=McpState.tools,
-                out_queue=q,
-                PROMPT=COMPETITIVE_ANALYSIS_PROMPT,
-                reflection_instructions_prompt=competitive_analysis_reflection_instructions_prompt,
-                fill_gaps_prompt=competitive_analysis_fill_gaps_prompt,
-                merge_gaps_prompt=competitive_analysis_merge_gaps_prompt,
-            )
+
+    return {"id": analysis_id, "status": "created", "queue_position": position}
+
+
+@app.post("/batch")
+async def create_batch(req: Request):
+    """
+    Queue every analysis type in ``analysis_types`` (default: all) for every
+    query in ``queries``. The items of one query share a single evidence pass.
+    """
+    if not McpState.tools:
+        raise HTTPException(status_code=503, detail="MCP tools unavailable")
+
+    data = await req.json()
+
+    queries = data.get("queries")
+    if not isinstance(queries, list) or not queries:
+        raise HTTPException(status_code=400, detail="Missing queries")
+    queries = list(dict.fromkeys(str(q).strip() for q in queries if str(q).strip()))
+    if not queries:
+        raise HTTPException(status_code=400, detail="Missing queries")
+
+    types = data.get("analysis_types") or [t.value for t in ANALYSIS_PROMPTS]
+    if any(t not in [a.value for a in ANALYSIS_PROMPTS] for t in types):
+        raise HTTPException(status_code=400, detail="Unsupported analysis type")
+    types = [AnalysisType(t) for t in dict.fromkeys(types)]
+
+    size = len(queries) * len(types)
+    if size > batch_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch of {size} analyses exceeds the limit of {batch_max_items}",
         )
-    elif doc.analysis_type == AnalysisType.MARKET_GAP_ANALYSIS:
-        task = asyncio.create_task(
-            create_agent(
-                id=analysis_id,
-                analysisType=doc.analysis_type,
-                user_prompt=doc.query,
-                tools=McpState.tools,
-                out_queue=q,
-                PROMPT=MARKET_GAP_PROMPT,
-                reflection_instructions_prompt=market_gap_reflection_instructions_prompt,
-                fill_gaps_prompt=market_gap_fill_gaps_prompt,
-                merge_gaps_prompt=market_gap_merge_gaps_prompt,
-            )
+
+    try:
+        scheduler.ensure_capacity(size)
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many analyses queued, please retry later",
+            headers={"Retry-After": str(e.retry_after)},
         )
-    elif doc.analysis_type == AnalysisType.SALES_FORECASTING:
-        task = asyncio.create_task(
-            create_agent(
-                id=analysis_id,
-                analysisType=doc.analysis_type,
-                user_prompt=doc.query,
-                tools=McpState.tools,
-                out_queue=q,
-                PROMPT=SALES_FORECAST_PROMPT,
-                reflection_instructions_prompt=sales_forecast_reflection_instructions_prompt,
-                fill_gaps_prompt=sales_forecast_fill_gaps_prompt,
-                merge_gaps_prompt=sales_forecast_merge_gaps_prompt,
+
+    batch_id = await batches.insert_batch(BatchSchema(queries=queries, analysis_types=types))
+
+    items = []
+    for query in queries:
+        for analysis_type in types:
+            analysis_id = await analyses.insert_analysis(
+                AnalysisSchema(
+                    query=query,
+                    analysis_type=analysis_type,
+                    status=Status.PENDING,
+                    batch_id=batch_id,
+                )
             )
-        )
-    elif doc.analysis_type == AnalysisType.TARGET_MARKET_ANALYSIS:
-        task = asyncio.create_task(
-            create_agent(
-                id=analysis_id,
-                analysisType=doc.analysis_type,
-                user_prompt=doc.query,
-                tools=McpState.tools,
-                out_queue=q,
-                PROMPT=TARGET_MARKET_SEGMENTATION_PROMPT,
-                reflection_instructions_prompt=target_market_segmentation_reflection_instructions_prompt,
-                fill_gaps_prompt=target_market_segmentation_fill_gaps_prompt,
-                merge_gaps_prompt=target_market_segmentation_merge_gaps_prompt,
+            position = await scheduler.submit(
+                make_job(analysis_id, analysis_type, query, batch_id=batch_id, batch_types=types),
+                force=True,
             )
-        )
-    
-    if task is None:
-        raise HTTPException(status_code=400, detail="Unsupported analysis type")
-    
-    tasks[analysis_id] = task
-
-    # clean up when done
-    def _cleanup(t):
-        db.analyses.update_one(
-            {"_id": result.inserted_id},
-            {"$set": {"status": Status.COMPLETED, "report_path": f"{analysis_id}/{doc.analysis_type}.pdf"}}
-        )
-        queues.pop(analysis_id, None)
-        tasks.pop(analysis_id, None)
-        
+            items.append(
+                {
+                    "analysis_id": analysis_id,
+                    "query": query,
+                    "analysis_type": analysis_type,
+                    "queue_position": position,
+                }
+            )
+
+    await batches.update_batch(
+        batch_id,
+        {"items": [{k: v for k, v in i.items() if k != "queue_position"} for i in items]},
+    )
 
-    task.add_done_callback(_cleanup)
+    return {"id": batch_id, "status": "created", "items": items}
+
+
+@app.get("/batch/{batch_id}")
+async def get_batch(batch_id: str):
+    """Batch status with the current status and report of every item."""
+    if not analyses.is_valid_id(batch_id):
+        raise HTTPException(
+            status_code=400, detail=f"Invalid batch ID format: {batch_id}"
+        )
 
-    return {"id": str(result.inserted_id), "status": "created"}
+    batch = await batches.get_batch(batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    items = await analyses.find_by_batch(batch_id)
+    status, counts = batches.summarize(items)
+    return {
+        **batch,
+        "status": status,
+        "counts": counts,
+        "items": [
+            {
+                "analysis_id": i["_id"],
+                "query": i["query"],
+                "analysis_type": i["analysis_type"],
+                "status": i["status"],
+                "queue_position": i.get("queue_position"),
+                "report_path": i.get("report_path"),
+            }
+            for i in items
+        ],
+    }
 
 
 if __name__ == "__main__":
-    run("server:app", host="0.0.0.0", port=8000, reload=True)
+    run("server:app", host="0.0.0.0", port=8000, reload=True, ws_per_message_deflate=True)
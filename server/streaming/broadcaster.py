@@ -0,0 +1,336 @@
+import asyncio
+import json
+import os
+from bisect import bisect_left
+from collections import deque
+from itertools import islice
+from typing import Any, AsyncIterator, Callable, Deque, List, Optional, Sequence, Tuple
+
+# Buffer pressure policies, applied in the configured order while a channel
+# is over budget. Whatever is still over budget afterwards is evicted.
+COALESCE = "coalesce"  # merge runs of token deltas, keep only the latest progress
+DROP_TOOL_RESULTS = "drop_tool_results"  # drop tool_result bodies (tool_end stays)
+SPILL = "spill"  # move the oldest entries to a file on disk
+POLICIES = (COALESCE, DROP_TOOL_RESULTS, SPILL)
+
+# Event types only evicted once nothing else is left to evict.
+PROTECTED_TYPES = frozenset({"stage", "artifact", "error"})
+
+
+def _size(item: Any) -> int:
+    if isinstance(item, (str, bytes)):
+        return len(item)
+    return len(str(item))
+
+
+def _type(item: Any) -> Optional[str]:
+    return item.get("type") if isinstance(item, dict) else None
+
+
+class Channel:
+    """
+    Per-analysis broadcast channel backed by a bounded, sequence-numbered
+    ring buffer.
+
+    The producer calls ``put`` exactly like it would on an ``asyncio.Queue``
+    (``None`` closes the channel). Every subscriber keeps only a cursor into
+    the shared buffer, so memory is bounded by ``max_items`` / ``max_bytes``
+    no matter how many viewers are attached, or whether any are.
+
+    When the buffer goes over budget the ``policy`` steps run in order (see
+    ``POLICIES``), then the oldest unprotected entries are evicted, until it
+    is back under ``low_water`` times the budget; the headroom means a full
+    buffer is relieved once per many puts rather than on every one.
+    Sequence numbers are kept, so after coalescing or dropping they have
+    gaps; a subscriber that falls behind the oldest retained entry skips
+    ahead to it.
+    """
+
+    def __init__(
+        self,
+        max_items: int = 2000,
+        max_bytes: int = 4 * 1024 * 1024,
+        policy: Sequence[str] = (COALESCE, DROP_TOOL_RESULTS),
+        spill_path: Optional[str] = None,
+        spill_max_bytes: int = 64 * 1024 * 1024,
+        low_water: float = 0.75,
+    ):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.low_water = low_water
+        self.policy = [p for p in policy if p in POLICIES and (p != SPILL or spill_path)]
+        self.spill_path = spill_path
+        self.spill_max_bytes = spill_max_bytes
+
+        # (seq, item, size)
+        self._buffer: Deque[Tuple[int, Any, int]] = deque()
+        self._bytes = 0
+        self._next_seq = 0
+        self._closed = False
+        self._cond = asyncio.Condition()
+        self.subscribers = 0
+        # every seq below this was sent to some subscriber, which may resume
+        # from any of them with ?offset; only entries from here on coalesce
+        self._delivered = 0
+
+        # spilled entries: (seq, file offset), oldest first
+        self._spill_index: List[Tuple[int, int]] = []
+        self._spill_bytes = 0
+        self._discarded = False
+
+        self.counters = {"coalesced": 0, "dropped": 0, "spilled": 0, "evicted": 0}
+
+    @property
+    def next_seq(self) -> int:
+        return self._next_seq
+
+    @property
+    def oldest_seq(self) -> int:
+        if self._spill_index:
+            return self._spill_index[0][0]
+        return self._buffer[0][0] if self._buffer else self._next_seq
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    async def put(self, item: Any) -> None:
+        if item is None:
+            await self.close()
+            return
+
+        async with self._cond:
+            if self._closed:
+                return
+            size = _size(item)
+            self._buffer.append((self._next_seq, item, size))
+            self._bytes += size
+            self._next_seq += 1
+
+            if self._over_budget(1.0):
+                self._relieve()
+
+            self._cond.notify_all()
+
+    async def close(self) -> None:
+        async with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def discard(self) -> None:
+        """The channel is no longer reachable: remove its spill file once unread."""
+        self._discarded = True
+        self._remove_spill()
+
+    def stats(self) -> dict:
+        return {
+            "items": len(self._buffer),
+            "bytes": self._bytes,
+            "next_seq": self._next_seq,
+            "subscribers": self.subscribers,
+            "policy": self.policy,
+            "spill_bytes": self._spill_bytes,
+            **self.counters,
+        }
+
+    async def subscribe(self, offset: int = 0) -> AsyncIterator[Tuple[int, Any]]:
+        """Yield ``(seq, item)`` from ``offset`` until the channel is closed."""
+        async for batch in self.batches(offset):
+            for entry in batch:
+                yield entry
+
+    async def batches(
+        self,
+        offset: int = 0,
+        window: float = 0.0,
+        max_bytes: int = 0,
+    ) -> AsyncIterator[List[Tuple[int, Any]]]:
+        """
+        Yield lists of ``(seq, item)`` from ``offset`` until the channel is
+        closed. With a ``window`` the subscriber waits that long after new
+        data arrives so bursts are coalesced; a batch is cut short once it
+        reaches ``max_bytes`` (0 means unbounded).
+        """
+        cursor = max(0, offset)
+        self.subscribers += 1
+        try:
+            while True:
+                async with self._cond:
+                    await self._cond.wait_for(
+                        lambda: self._has_after(cursor) or self._closed
+                    )
+
+                if window > 0 and not self._closed and not self._has_bytes(cursor, max_bytes):
+                    await asyncio.sleep(window)
+
+                async with self._cond:
+                    cursor = max(cursor, self.oldest_seq)
+                    if self._spill_index and cursor <= self._spill_index[-1][0]:
+                        batch = self._read_spill(cursor, max_bytes)
+                    else:
+                        batch = self._take(cursor, max_bytes)
+                    if batch:
+                        cursor = batch[-1][0] + 1
+                        self._delivered = max(self._delivered, cursor)
+                    done = self._closed and not self._has_after(cursor)
+
+                if batch:
+                    yield batch
+
+                if done:
+                    return
+        finally:
+            self.subscribers -= 1
+            if self._discarded and not self.subscribers:
+                self._remove_spill()
+
+    # ---------- reading ----------
+    def _index(self, cursor: int) -> int:
+        """Position in the buffer of the first entry with seq >= cursor."""
+        lo, hi = 0, len(self._buffer)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._buffer[mid][0] < cursor:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _has_after(self, cursor: int) -> bool:
+        if self._buffer and self._buffer[-1][0] >= cursor:
+            return True
+        return bool(self._spill_index) and self._spill_index[-1][0] >= cursor
+
+    def _has_bytes(self, cursor: int, max_bytes: int) -> bool:
+        if max_bytes <= 0:
+            return False
+        total = 0
+        for _, _, size in islice(self._buffer, self._index(cursor), None):
+            total += size
+            if total >= max_bytes:
+                return True
+        return False
+
+    def _take(self, cursor: int, max_bytes: int) -> List[Tuple[int, Any]]:
+        batch: List[Tuple[int, Any]] = []
+        total = 0
+        for seq, item, size in islice(self._buffer, self._index(cursor), None):
+            total += size
+            if batch and max_bytes > 0 and total > max_bytes:
+                break
+            batch.append((seq, item))
+        return batch
+
+    def _read_spill(self, cursor: int, max_bytes: int) -> List[Tuple[int, Any]]:
+        start = bisect_left(self._spill_index, (cursor, -1))
+        batch: List[Tuple[int, Any]] = []
+        total = 0
+        with open(self.spill_path, "r", encoding="utf-8") as f:  # type: ignore
+            f.seek(self._spill_index[start][1])
+            for _ in range(len(self._spill_index) - start):
+                line = f.readline()
+                total += len(line)
+                if batch and max_bytes > 0 and total > max_bytes:
+                    break
+                seq, item = json.loads(line)
+                batch.append((seq, item))
+        return batch
+
+    # ---------- pressure ----------
+    def _over_budget(self, fraction: Optional[float] = None) -> bool:
+        """Over ``fraction`` of the budget (by default the low-water mark)."""
+        fraction = self.low_water if fraction is None else fraction
+        return len(self._buffer) > 1 and (
+            len(self._buffer) > self.max_items * fraction
+            or self._bytes > self.max_bytes * fraction
+        )
+
+    def _relieve(self) -> None:
+        for step in self.policy:
+            if not self._over_budget():
+                return
+            if step == COALESCE:
+                self._coalesce()
+            elif step == DROP_TOOL_RESULTS:
+                self._drop(lambda item: _type(item) == "tool_result", "dropped")
+            elif step == SPILL:
+                self._spill()
+
+        # last resort: oldest first, protected events only when nothing else is left
+        self._drop(lambda item: _type(item) not in PROTECTED_TYPES, "evicted")
+        while self._over_budget():
+            _, _, size = self._buffer.popleft()
+            self._bytes -= size
+            self.counters["evicted"] += 1
+
+    def _coalesce(self) -> None:
+        """
+        Merge adjacent undelivered token deltas of one node and keep only the
+        latest undelivered progress. Delivered entries are left alone: a
+        client resuming from inside a merged run would get its text twice.
+        """
+        start = self._index(self._delivered)
+        merged: Deque[Tuple[int, Any, int]] = deque(islice(self._buffer, start))
+        floor = len(merged)
+        for seq, item, size in islice(self._buffer, start, None):
+            if len(merged) > floor and self._mergeable(merged[-1], item):
+                _, prev, prev_size = merged[-1]
+                self._bytes -= prev_size + size
+                if _type(item) == "token":
+                    item = {**item, "text": prev["text"] + item["text"]}
+                    size = _size(item)
+                self._bytes += size
+                merged[-1] = (seq, item, size)
+                self.counters["coalesced"] += 1
+            else:
+                merged.append((seq, item, size))
+        self._buffer = merged
+
+    @staticmethod
+    def _mergeable(prev: Tuple[int, Any, int], item: Any) -> bool:
+        prev_item = prev[1]
+        kind = _type(item)
+        if kind not in ("token", "progress") or _type(prev_item) != kind:
+            return False
+        return kind != "token" or prev_item.get("node") == item.get("node")
+
+    def _drop(self, droppable: Callable[[Any], bool], counter: str) -> None:
+        """Remove the oldest matching entries (never the newest) until within budget."""
+        kept: Deque[Tuple[int, Any, int]] = deque()
+        last = len(self._buffer) - 1
+        for i, entry in enumerate(self._buffer):
+            if i < last and self._over_budget_after(kept, i) and droppable(entry[1]):
+                self._bytes -= entry[2]
+                self.counters[counter] += 1
+            else:
+                kept.append(entry)
+        self._buffer = kept
+
+    def _over_budget_after(self, kept: Deque, index: int) -> bool:
+        # entries still held if everything from ``index`` on were kept
+        items = len(kept) + len(self._buffer) - index
+        return items > 1 and (
+            items > self.max_items * self.low_water
+            or self._bytes > self.max_bytes * self.low_water
+        )
+
+    def _spill(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.spill_path)), exist_ok=True)  # type: ignore
+        with open(self.spill_path, "a", encoding="utf-8") as f:  # type: ignore
+            while self._over_budget() and self._spill_bytes < self.spill_max_bytes:
+                seq, item, size = self._buffer.popleft()
+                line = json.dumps([seq, item], separators=(",", ":"), default=str) + "\n"
+                self._spill_index.append((seq, f.tell()))
+                f.write(line)
+                self._spill_bytes += len(line)
+                self._bytes -= size
+                self.counters["spilled"] += 1
+
+    def _remove_spill(self) -> None:
+        if self.spill_path and not self.subscribers:
+            try:
+                os.remove(self.spill_path)
+            except FileNotFoundError:
+                pass
+            self._spill_index.clear()
+            self._spill_bytes = 0
@@ -0,0 +1,118 @@
+import time
+from typing import Any, Dict, Optional, Set
+
+from .broadcaster import Channel
+
+# Event types carried on a research stream. Every event is a dict with at
+# least ``type`` and ``ts`` (unix seconds); the transport adds ``seq``.
+TOKEN = "token"  # text: model output, node
+TOOL_START = "tool_start"  # call_id, name, args
+TOOL_END = "tool_end"  # call_id, name, seconds, chars
+TOOL_RESULT = "tool_result"  # call_id, name, content
+STAGE = "stage"  # stage, detail
+PROGRESS = "progress"  # percent
+ARTIFACT = "artifact"  # kind, path
+ERROR = "error"  # error, message
+
+EVENT_TYPES = (TOKEN, TOOL_START, TOOL_END, TOOL_RESULT, STAGE, PROGRESS, ARTIFACT, ERROR)
+
+# What a progress-only subscriber receives.
+PROGRESS_TYPES = frozenset({STAGE, PROGRESS, ARTIFACT, ERROR})
+
+# Overall progress at the start of each stage of an analysis.
+STAGE_PROGRESS = {
+    "queued": 0,
+    "evidence": 2,
+    "initial_report": 10,
+    "reflection": 50,
+    "render": 92,
+    "done": 100,
+}
+
+
+def parse_types(spec: str) -> Optional[Set[str]]:
+    """
+    Event filter from a ``?events=`` query value: ``progress`` or a comma
+    separated list of event types. Empty means everything.
+    """
+    if not spec:
+        return None
+    types: Set[str] = set()
+    for name in spec.split(","):
+        name = name.strip()
+        if name == "progress":
+            types |= PROGRESS_TYPES
+        elif name in EVENT_TYPES:
+            types.add(name)
+    return types or None
+
+
+def as_text(event: Dict[str, Any]) -> Optional[str]:
+    """Plain-text rendering for clients that did not negotiate a sub-protocol."""
+    kind = event.get("type")
+    if kind == TOKEN:
+        return event["text"]
+    if kind == TOOL_START:
+        return f"Tool Call:\n {event['name']}\nArguments:\n {event['args']}\n"
+    if kind == TOOL_RESULT:
+        return f"Results:\n{event['content']}\n"
+    if kind == STAGE and event.get("detail"):
+        return f"{event['detail']}\n"
+    if kind == ARTIFACT:
+        return f"__OUTPUT_FILE__{event['path']}\n"
+    if kind == ERROR:
+        return f"__ERROR__{event['error']}: {event['message']}"
+    return None
+
+
+class EventWriter:
+    """Typed producer side of a research channel."""
+
+    def __init__(self, channel: Channel):
+        self.channel = channel
+        self.percent = 0
+        self._tool_started: Dict[str, float] = {}
+
+    async def emit(self, event_type: str, **fields: Any) -> None:
+        await self.channel.put({"type": event_type, "ts": round(time.time(), 3), **fields})
+
+    async def token(self, text: Any, node: str = "") -> None:
+        if text:
+            await self.emit(TOKEN, text=str(text), node=node)
+
+    async def tool_start(self, call_id: str, name: str, args: Any) -> None:
+        self._tool_started[call_id] = time.monotonic()
+        await self.emit(TOOL_START, call_id=call_id, name=name, args=args)
+
+    async def tool_end(self, call_id: str, name: str, content: Any) -> None:
+        started = self._tool_started.pop(call_id, None)
+        content = str(content)
+        await self.emit(
+            TOOL_END,
+            call_id=call_id,
+            name=name,
+            seconds=round(time.monotonic() - started, 3) if started is not None else None,
+            chars=len(content),
+        )
+        await self.emit(TOOL_RESULT, call_id=call_id, name=name, content=content)
+
+    async def progress(self, percent: float) -> None:
+        # never report going backwards, e.g. when a resumed job skips stages
+        percent = int(min(100, max(self.percent, percent)))
+        if percent != self.percent:
+            self.percent = percent
+            await self.emit(PROGRESS, percent=percent)
+
+    async def stage(self, stage: str, detail: str = "", percent: Optional[float] = None) -> None:
+        await self.emit(STAGE, stage=stage, detail=detail)
+        await self.progress(STAGE_PROGRESS.get(stage, 0) if percent is None else percent)
+
+    async def artifact(self, kind: str, path: str) -> None:
+        await self.emit(ARTIFACT, kind=kind, path=path)
+
+    async def error(self, exc: BaseException) -> None:
+        await self.emit(ERROR, error=type(exc).__name__, message=str(exc))
+
+    async def close(self) -> None:
+        await self.channel.put(None)
+
@@ -0,0 +1,102 @@
+import json
+from typing import Any, List, Optional, Sequence, Set, Tuple, Union
+
+from fastapi import WebSocket
+
+from .broadcaster import Channel
+from .events import as_text
+
+try:
+    import ormsgpack
+except ImportError:  # optional: only needed for the binary sub-protocol
+    ormsgpack = None
+
+
+JSON_PROTOCOL = "research.json"
+MSGPACK_PROTOCOL = "research.msgpack"
+
+# Plain-text chunks with these prefixes are control messages that legacy
+# clients expect in a frame of their own.
+CONTROL_PREFIXES = ("__ERROR__", "__OUTPUT_FILE__")
+
+
+def negotiate(requested: Sequence[str]) -> Optional[str]:
+    """Pick the first sub-protocol offered by the client that we can speak."""
+    supported = [JSON_PROTOCOL] + ([MSGPACK_PROTOCOL] if ormsgpack else [])
+    for proto in requested:
+        if proto in supported:
+            return proto
+    return None
+
+
+def encode_batch(protocol: str, batch: List[Tuple[int, Any]], next_seq: int) -> Union[str, bytes]:
+    """
+    One frame per batch: ``{"seq": first, "next": next_seq, "data": [...]}``
+    where each event carries its own ``seq``. ``next`` is the offset the
+    client sends back when it reconnects.
+    """
+    payload = {
+        "seq": batch[0][0],
+        "next": next_seq,
+        "data": [{**item, "seq": seq} for seq, item in batch],
+    }
+    if protocol == MSGPACK_PROTOCOL:
+        # values JSON can't hold go through str() in both encodings
+        return ormsgpack.packb(  # type: ignore
+            payload, default=str, option=ormsgpack.OPT_PASSTHROUGH_DATETIME  # type: ignore
+        )
+    return json.dumps(payload, separators=(",", ":"), default=str)
+
+
+def legacy_frames(batch: List[Tuple[int, Any]]) -> List[str]:
+    """Concatenate runs of plain text chunks, keeping control chunks separate."""
+    frames: List[str] = []
+    run: List[str] = []
+    for _, item in batch:
+        text = as_text(item)
+        if text is None:
+            continue
+        if text.startswith(CONTROL_PREFIXES):
+            if run:
+                frames.append("".join(run))
+                run = []
+            frames.append(text)
+        else:
+            run.append(text)
+    if run:
+        frames.append("".join(run))
+    return frames
+
+
+async def send_stream(
+    websocket: WebSocket,
+    channel: Channel,
+    offset: int,
+    protocol: Optional[str],
+    window: float,
+    max_bytes: int,
+    types: Optional[Set[str]] = None,
+) -> int:
+    """
+    Forward a channel to a websocket in coalesced frames, keeping only the
+    event ``types`` asked for (all when None). Returns frames sent.
+    """
+    frames = 0
+    async for batch in channel.batches(offset, window=window, max_bytes=max_bytes):
+        next_seq = batch[-1][0] + 1
+        if types is not None:
+            batch = [(seq, item) for seq, item in batch if item.get("type") in types]
+            if not batch:
+                continue
+
+        if protocol == MSGPACK_PROTOCOL:
+            await websocket.send_bytes(encode_batch(protocol, batch, next_seq))  # type: ignore
+            frames += 1
+        elif protocol == JSON_PROTOCOL:
+            await websocket.send_text(encode_batch(protocol, batch, next_seq))  # type: ignore
+            frames += 1
+        else:
+            for frame in legacy_frames(batch):
+                await websocket.send_text(frame)
+                frames += 1
+    return frames
@@ -0,0 +1,48 @@
+import os
+import sys
+import tempfile
+
+# config.settings refuses to import without these; tests never reach the services
+for name in ("GOOGLE_API_KEY", "REDDIT_CLIENT_ID", "REDDIT_SECRET", "SERP_DEV_API_KEY", "MONGO_DB_URI"):
+    os.environ.setdefault(name, "test")
+# the process-wide tool cache opens its SQLite file on import
+os.environ.setdefault("MCP_CACHE_PATH", os.path.join(tempfile.mkdtemp(), "tool_cache.sqlite"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import itertools
+
+import pytest
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """
+    The FastAPI app with an in-memory analyses store and a scheduler of its
+    own that is never started, so submitted jobs stay queued. The lifespan
+    (MCP servers, Mongo) does not run.
+    """
+    from fastapi.testclient import TestClient
+
+    import server
+    from jobs.scheduler import JobScheduler
+
+    ids = itertools.count(1)
+    inserted = []
+
+    async def insert_analysis(doc):
+        inserted.append(doc)
+        return f"{next(ids):024x}"
+
+    async def find_reusable(key, analysis_type, limit=5):
+        return []
+
+    monkeypatch.setattr(server.McpState, "tools", [object()])
+    monkeypatch.setattr(server.analyses, "insert_analysis", insert_analysis)
+    monkeypatch.setattr(server.analyses, "find_reusable", find_reusable)
+    monkeypatch.setattr(server, "scheduler", JobScheduler(max_workers=1, max_per_type=1, max_pending=3))
+
+    client = TestClient(server.app)
+    client.inserted = inserted  # type: ignore
+    client.scheduler = server.scheduler  # type: ignore
+    return client
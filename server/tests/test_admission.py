@@ -0,0 +1,52 @@
+import pytest
+
+from jobs.scheduler import Job, JobScheduler, QueueFullError
+
+
+async def idle():
+    pass
+
+
+@pytest.mark.asyncio
+async def test_submissions_beyond_max_pending_are_rejected():
+    scheduler = JobScheduler(max_workers=2, max_per_type=2, max_pending=2, default_job_seconds=60)
+    await scheduler.submit(Job("a", "type", idle))
+    await scheduler.submit(Job("b", "type", idle))
+
+    with pytest.raises(QueueFullError) as exc:
+        await scheduler.submit(Job("c", "type", idle))
+    # three jobs ahead, two workers, 60s each
+    assert exc.value.retry_after == 90
+    assert [j.analysis_id for j in scheduler.pending] == ["a", "b"]
+
+    # forced submissions (restores, admitted batches) skip the check
+    await scheduler.submit(Job("c", "type", idle), force=True)
+    assert len(scheduler.pending) == 3
+
+
+def test_ensure_capacity_counts_the_whole_batch():
+    scheduler = JobScheduler(max_workers=1, max_per_type=1, max_pending=5)
+    scheduler.ensure_capacity(5)
+    with pytest.raises(QueueFullError):
+        scheduler.ensure_capacity(6)
+
+
+def test_retry_after_follows_observed_run_times():
+    scheduler = JobScheduler(max_workers=2, max_per_type=2, max_pending=5)
+    scheduler._run_times.extend([10.0, 30.0])
+    assert scheduler.estimate_wait() == 10  # 1 job ahead * 20s / 2 workers
+    assert scheduler.estimate_wait(extra=4) == 40
+
+
+def test_full_queue_answers_429_with_retry_after(api):
+    body = {"query": "electric bikes", "analysis_type": "Industry Report"}
+    for i in range(3):
+        resp = api.post("/analysis", json={**body, "query": f"market {i}"})
+        assert resp.status_code == 200
+        assert resp.json()["queue_position"] == i + 1
+
+    resp = api.post("/analysis", json=body)
+    assert resp.status_code == 429
+    assert int(resp.headers["Retry-After"]) >= 1
+    # rejected before anything was stored or queued
+    assert len(api.inserted) == 3 and len(api.scheduler.pending) == 3
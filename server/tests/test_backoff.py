@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+from google.api_core.exceptions import ServiceUnavailable
+
+from agents import utils
+from agents.utils import acall_llm_with_backoff
+
+
+class FlakyLLM:
+    """Raises ServiceUnavailable for the first ``failures`` calls."""
+
+    def __init__(self, failures: int, reply: str = "ok"):
+        self.failures = failures
+        self.reply = reply
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ServiceUnavailable("overloaded")
+        return self.reply
+
+
+@pytest.fixture(autouse=True)
+def no_jitter(monkeypatch):
+    monkeypatch.setattr(utils.random, "uniform", lambda a, b: 0.0)
+
+
+@pytest.mark.asyncio
+async def test_backoff_does_not_block_the_event_loop():
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    llm = FlakyLLM(failures=3)
+    try:
+        # 0.1 + 0.2 + 0.4 seconds of backoff
+        result = await acall_llm_with_backoff(llm, [], base_delay=0.1, max_delay=1)
+    finally:
+        task.cancel()
+
+    assert result == "ok"
+    assert llm.calls == 4
+    # a blocking sleep would have starved the ticker for the whole 0.7s
+    assert ticks >= 30
+
+
+@pytest.mark.asyncio
+async def test_fallback_takes_over_after_fallback_after_failures():
+    primary = FlakyLLM(failures=10)
+    fallback = FlakyLLM(failures=0, reply="fallback")
+
+    result = await acall_llm_with_backoff(
+        primary, [], base_delay=0.01, fallback=fallback, fallback_after=2
+    )
+
+    assert result == "fallback"
+    assert primary.calls == 2
+    assert fallback.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_retries():
+    llm = FlakyLLM(failures=10)
+
+    with pytest.raises(ServiceUnavailable):
+        await acall_llm_with_backoff(llm, [], max_retries=3, base_delay=0.01)
+
+    assert llm.calls == 3
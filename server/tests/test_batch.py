@@ -0,0 +1,96 @@
+import asyncio
+from collections import Counter
+
+import pytest
+from langchain_core.tools import StructuredTool
+
+from agents import evidence
+
+QUERIES = ["electric bikes", "plant milk"]
+TYPES = ["Industry Report", "Competitor Report"]
+
+
+def search_tools(calls: Counter):
+    def make(name):
+        async def run(**kwargs) -> str:
+            calls[(name, kwargs["query"])] += 1
+            await asyncio.sleep(0.01)  # the other items arrive while it runs
+            return f"{name} results for {kwargs['query']}"
+
+        return StructuredTool.from_function(coroutine=run, name=name, description=name, args_schema={
+            "type": "object",
+            "properties": {"query": {"type": "string"}, "data_type": {"type": "string"}},
+        })
+
+    return [make(n) for n in ("google_search", "search_google_news", "google_trends_summary")]
+
+
+@pytest.fixture
+def batch_api(api, monkeypatch):
+    import server
+
+    stored = {}
+
+    async def insert_batch(doc):
+        stored["batch"] = doc
+        return "b" * 24
+
+    async def update_batch(batch_id, fields):
+        stored.setdefault("updates", []).append(fields)
+
+    monkeypatch.setattr(server.batches, "insert_batch", insert_batch)
+    monkeypatch.setattr(server.batches, "update_batch", update_batch)
+    api.stored = stored
+    return api
+
+
+@pytest.mark.asyncio
+async def test_one_evidence_pass_per_query(batch_api, monkeypatch):
+    import server
+
+    calls: Counter = Counter()
+    used = {}
+
+    async def create_agent(id, analysisType, user_prompt, tools, out_queue, batch_id, batch_types, **prompts):
+        # the evidence step of the real run
+        shared = await evidence.gather_shared_evidence(batch_id, user_prompt, batch_types, tools)
+        used[id] = evidence.evidence_for(shared, user_prompt, analysisType)
+
+    monkeypatch.setattr(server, "create_agent", create_agent)
+    monkeypatch.setattr(server.McpState, "tools", search_tools(calls))
+    monkeypatch.setattr(batch_api.scheduler, "max_pending", 10)
+
+    resp = batch_api.post("/batch", json={"queries": QUERIES + [" electric bikes "], "analysis_types": TYPES})
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["id"] == "b" * 24
+    assert [(i["query"], i["analysis_type"]) for i in body["items"]] == [(q, t) for q in QUERIES for t in TYPES]
+    assert [i["queue_position"] for i in body["items"]] == [1, 2, 3, 4]
+
+    await asyncio.gather(*(job.run() for job in batch_api.scheduler.pending))
+
+    # every distinct seed call of a query ran once, not once per analysis type
+    assert calls and set(calls.values()) == {1}
+    assert {q for _, q in calls} >= set(QUERIES)
+    for item in body["items"]:
+        names = {e["tool"] for e in used[item["analysis_id"]]}
+        assert {"google_search", "search_google_news", "google_trends_summary"} <= names
+        evidence.release_shared("b" * 24, item["query"])
+
+
+def test_batch_limits(batch_api, monkeypatch):
+    import server
+
+    monkeypatch.setattr(server, "batch_max_items", 3)
+    resp = batch_api.post("/batch", json={"queries": QUERIES, "analysis_types": TYPES})
+    assert resp.status_code == 400
+
+    monkeypatch.setattr(server, "batch_max_items", 24)
+    resp = batch_api.post("/batch", json={"queries": ["a", "b"], "analysis_types": TYPES})
+    assert resp.status_code == 429  # four items, room for three
+    assert "Retry-After" in resp.headers
+    assert "batch" not in batch_api.stored
+
+    assert batch_api.post("/batch", json={"queries": []}).status_code == 400
+    assert batch_api.post("/batch", json={"queries": ["a"], "analysis_types": ["Poetry"]}).status_code == 400
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from streaming.broadcaster import Channel
+
+
+def token(text, node="agent"):
+    return {"type": "token", "text": text, "node": node}
+
+
+async def drain(channel, offset=0):
+    return [entry async for entry in channel.subscribe(offset)]
+
+
+@pytest.mark.asyncio
+async def test_relief_runs_down_to_the_low_water_mark():
+    channel = Channel(max_items=100, max_bytes=10**9, policy=[], low_water=0.5)
+    for i in range(101):
+        await channel.put({"type": "stage", "stage": str(i)})
+
+    assert channel.stats()["items"] == 50
+    # the headroom absorbs the next puts without another pass
+    for i in range(50):
+        await channel.put({"type": "stage", "stage": "more"})
+    assert channel.stats()["evicted"] == 51
+
+
+@pytest.mark.asyncio
+async def test_coalescing_keeps_undelivered_text_intact():
+    channel = Channel(max_items=10, max_bytes=10**9)
+    await channel.put({"type": "stage", "stage": "start"})
+    for i in range(30):
+        await channel.put(token(f"{i},"))
+    await channel.put(None)
+
+    text = "".join(item.get("text", "") for _, item in await drain(channel))
+    assert text == "".join(f"{i}," for i in range(30))
+    assert channel.stats()["coalesced"] > 0
+
+
+@pytest.mark.asyncio
+async def test_delivered_events_are_never_merged():
+    channel = Channel(max_items=6, max_bytes=10**9, low_water=1.0)
+    for i in range(4):
+        await channel.put(token(f"{i},"))
+
+    # a client reads seq 0-3, then disconnects and will resume from offset 2
+    reader = channel.batches(0)
+    first = await reader.__anext__()
+    await reader.aclose()
+    assert [seq for seq, _ in first] == [0, 1, 2, 3]
+
+    for i in range(4, 12):
+        await channel.put(token(f"{i},"))
+    await channel.put(None)
+
+    resumed = await drain(channel, offset=2)
+    text = "".join(item["text"] for _, item in resumed)
+    assert text == "".join(f"{i}," for i in range(2, 12))
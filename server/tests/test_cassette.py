@@ -0,0 +1,40 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, message_to_dict
+
+from agents.cassette import REPLAY, Cassette, ReplayChatModel, current_cassette, messages_key
+
+
+@pytest.fixture
+def cassette(tmp_path):
+    cassette = Cassette(str(tmp_path / "run.json"), REPLAY, zero_latency=True)
+    prompt = [HumanMessage("second")]
+    cassette.llm = [
+        {"node": "merge", "key": "other", "response": message_to_dict(AIMessage("first")), "started": 0, "seconds": 0.5},
+        {"node": "merge", "key": messages_key(prompt), "response": message_to_dict(AIMessage("second")), "started": 1, "seconds": 0.5},
+    ]
+    token = current_cassette.set(cassette)
+    yield cassette
+    current_cassette.reset(token)
+
+
+def test_sync_replay_matches_by_input_then_falls_back_to_next_unused(cassette):
+    model = ReplayChatModel(node="merge")
+
+    assert model.invoke([HumanMessage("second")]).content == "second"
+    assert model.invoke([HumanMessage("changed prompt")]).content == "first"
+    with pytest.raises(LookupError):
+        model.invoke([HumanMessage("one too many")])
+    assert len(cassette.waits) == 2
+
+
+@pytest.mark.asyncio
+async def test_async_replay_uses_the_same_lookup(cassette):
+    model = ReplayChatModel(node="merge")
+
+    assert (await model.ainvoke([HumanMessage("second")])).content == "second"
+    assert model.invoke([HumanMessage("x")]).content == "first"
+
+
+def test_replay_needs_an_active_cassette():
+    with pytest.raises(RuntimeError):
+        ReplayChatModel(node="merge").invoke([HumanMessage("x")])
@@ -0,0 +1,71 @@
+from typing import TypedDict
+
+import pytest
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import END, START, StateGraph
+
+from agents.checkpoint import delete_job, resume_point, thread_config
+
+
+class State(TypedDict):
+    steps: list
+
+
+def build(checkpointer, fail):
+    def first(state):
+        return {"steps": state["steps"] + ["first"]}
+
+    def second(state):
+        if fail:
+            fail.pop()
+            raise ConnectionError("process died")
+        return {"steps": state["steps"] + ["second"]}
+
+    graph = StateGraph(State)
+    graph.add_node("first", first)
+    graph.add_node("second", second)
+    graph.add_edge(START, "first")
+    graph.add_edge("first", "second")
+    graph.add_edge("second", END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+@pytest.mark.asyncio
+async def test_an_interrupted_run_resumes_from_its_last_node():
+    fresh = {"steps": []}
+    graph = build(InMemorySaver(), fail=[True])
+    config = thread_config("job-1", "reflect")
+
+    assert await resume_point(graph, config, fresh) == (fresh, None)
+    with pytest.raises(ConnectionError):
+        await graph.ainvoke(fresh, config)
+
+    # restarted: stream from the checkpoint, not from scratch
+    graph_input, done = await resume_point(graph, config, fresh)
+    assert graph_input is None and done is None
+    result = await graph.ainvoke(graph_input, config)
+    assert result["steps"] == ["first", "second"]
+
+    # finished: the final state is used as-is
+    assert await resume_point(graph, config, fresh) == (None, {"steps": ["first", "second"]})
+
+
+@pytest.mark.asyncio
+async def test_without_a_checkpointer_runs_start_over():
+    graph = build(None, fail=[])
+    assert await resume_point(graph, thread_config("job-1", "init"), {"steps": []}) == ({"steps": []}, None)
+
+
+@pytest.mark.asyncio
+async def test_delete_job_drops_every_stage():
+    saver = InMemorySaver()
+    graph = build(saver, fail=[])
+    for stage in ("init", "reflect"):
+        await graph.ainvoke({"steps": []}, thread_config("job-1", stage))
+    await graph.ainvoke({"steps": []}, thread_config("job-2", "init"))
+
+    await delete_job(saver, "job-1")
+
+    threads = {c.config["configurable"]["thread_id"] async for c in saver.alist(None)}
+    assert threads == {"job-2:init"}
+    await delete_job(None, "job-2")  # checkpointing disabled: nothing to do
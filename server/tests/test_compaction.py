@@ -0,0 +1,67 @@
+from agents.compaction import compact_text, estimate_tokens
+
+FILLER = "The market keeps evolving as brands compete for attention.\n" * 40
+
+
+def test_short_results_are_returned_unchanged():
+    text = "Search Results for 'ev bikes'"
+    assert compact_text(text, 500) is text
+
+
+def test_figures_and_urls_survive_compaction():
+    text = (
+        "Search Results for 'ev bikes':\n"
+        + FILLER
+        + "The Indian e-bike market reached $1.2 billion in 2024.\n"
+        + FILLER
+        + "Link: https://example.com/report?id=7.\n"
+        + "Sales grew 34% year on year (https://news.example.org/ev).\n"
+        + "Link: https://example.com/report?id=7\n"
+        + FILLER
+    )
+
+    short = compact_text(text, 1200)
+
+    assert len(short) < len(text) / 2
+    assert short.startswith("Search Results for 'ev bikes'")
+    assert "compacted" in short
+    assert "- The Indian e-bike market reached $1.2 billion in 2024." in short
+    assert "Sales grew 34% year on year" in short
+    # every distinct URL once, trailing punctuation stripped
+    assert short.count("- https://example.com/report?id=7\n") == 1
+    assert "- https://news.example.org/ev" in short
+
+
+def test_estimate_tokens_is_about_four_chars_each():
+    assert estimate_tokens("x" * 400) == 101
+
+
+def test_savings_are_counted_once_per_message(monkeypatch):
+    from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+    from agents import compaction, usage
+    from agents.rate_limiter import llm_context
+
+    monkeypatch.setattr(compaction, "react_context_token_budget", 1000)
+    monkeypatch.setattr(compaction, "react_keep_recent_tool_results", 1)
+    monkeypatch.setattr(compaction, "react_compacted_tool_chars", 400)
+
+    def step(n):
+        messages = [HumanMessage("research ev bikes", id="h")]
+        for i in range(n):
+            messages.append(AIMessage("", id=f"ai-{i}"))
+            messages.append(ToolMessage(FILLER, tool_call_id=f"call-{i}", id=f"tool-{i}"))
+        return messages
+
+    with llm_context(job_id="job-compact"):
+        compaction.compact_messages({"messages": step(2)})
+        first = usage.tokens_saved("job-compact")
+        # the next steps re-send tool-0 compacted, plus tool-1 once it is old
+        compaction.compact_messages({"messages": step(3)})
+        compaction.compact_messages({"messages": step(3)})
+    try:
+        per_result = estimate_tokens(FILLER) - estimate_tokens(compact_text(FILLER, 400))
+        assert first == per_result
+        assert usage.tokens_saved("job-compact") == 2 * per_result
+    finally:
+        usage.reset("job-compact")
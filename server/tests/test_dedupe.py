@@ -0,0 +1,72 @@
+import datetime
+
+from database.analyses import finished_within, query_key
+
+
+def ago(seconds):
+    return (datetime.datetime.now() - datetime.timedelta(seconds=seconds)).ctime()
+
+
+def test_query_key_ignores_case_whitespace_and_punctuation():
+    assert query_key("  Electric   Bikes, India! ") == "electric bikes india"
+    assert query_key("ELECTRIC bikes india") == query_key("electric-bikes (india)")
+    assert query_key("Ｅｖ ｂｉｋｅｓ") == "ev bikes"  # full-width folded by NFKC
+    assert query_key("ev bikes") != query_key("ev cars")
+
+
+def test_finished_within():
+    assert finished_within({"finished_at": ago(60)}, 3600)
+    assert not finished_within({"finished_at": ago(7200)}, 3600)
+    assert not finished_within({"finished_at": ago(60)}, 0)  # reuse disabled
+    assert not finished_within({}, 3600)
+    assert not finished_within({"finished_at": "yesterday"}, 3600)
+
+
+def reuse(monkeypatch, api, candidates, tmp_path):
+    import server
+
+    async def find_reusable(key, analysis_type, limit=5):
+        assert key == "electric bikes"
+        return candidates
+
+    monkeypatch.setattr(server.analyses, "find_reusable", find_reusable)
+    monkeypatch.setattr(server, "output_dir", str(tmp_path))
+    monkeypatch.setattr(server, "dedupe_window_seconds", 3600)
+    return api.post("/analysis", json={"query": "Electric  Bikes!", "analysis_type": "Industry Report"}).json()
+
+
+def test_a_fresh_report_is_reused(monkeypatch, api, tmp_path):
+    (tmp_path / "a1").mkdir()
+    (tmp_path / "a1" / "report.pdf").write_bytes(b"%PDF")
+    stale = {"_id": "a0", "status": "completed", "report_path": "a0/report.pdf", "finished_at": ago(60)}
+    fresh = {"_id": "a1", "status": "completed", "report_path": "a1/report.pdf", "finished_at": ago(60)}
+
+    body = reuse(monkeypatch, api, [stale, fresh], tmp_path)
+
+    # a0's file is gone, so the next candidate is used
+    assert body["id"] == "a1" and body["status"] == "reused"
+    assert api.inserted == []
+
+
+def test_an_old_report_starts_a_new_run(monkeypatch, api, tmp_path):
+    (tmp_path / "a1").mkdir()
+    (tmp_path / "a1" / "report.pdf").write_bytes(b"%PDF")
+    old = {"_id": "a1", "status": "completed", "report_path": "a1/report.pdf", "finished_at": ago(7200)}
+
+    body = reuse(monkeypatch, api, [old], tmp_path)
+
+    assert body["status"] == "created" and len(api.inserted) == 1
+
+
+def test_a_queued_duplicate_is_attached(monkeypatch, api, tmp_path):
+    first = api.post("/analysis", json={"query": "electric bikes", "analysis_type": "Industry Report"}).json()
+    queued = {"_id": first["id"], "status": "pending", "queue_position": 1}
+    # the same query in a record this process is not running is not attached
+    orphan = {"_id": "f" * 24, "status": "pending", "queue_position": 1}
+
+    assert reuse(monkeypatch, api, [orphan, queued], tmp_path) == {
+        "id": first["id"],
+        "status": "attached",
+        "queue_position": 1,
+    }
+    assert len(api.scheduler.pending) == 1
@@ -0,0 +1,54 @@
+import pytest
+
+from streaming.broadcaster import Channel
+from streaming.events import EventWriter, PROGRESS_TYPES, as_text, parse_types
+
+
+def test_parse_types():
+    assert parse_types("") is None
+    assert parse_types("progress") == set(PROGRESS_TYPES)
+    assert parse_types("token, tool_end,nonsense") == {"token", "tool_end"}
+    assert parse_types("progress,token") == set(PROGRESS_TYPES) | {"token"}
+    assert parse_types("nonsense") is None
+
+
+async def events(channel):
+    await channel.close()
+    return [item async for _, item in channel.subscribe()]
+
+
+@pytest.mark.asyncio
+async def test_event_shapes():
+    channel = Channel()
+    writer = EventWriter(channel)
+
+    await writer.token("Hello", node="agent")
+    await writer.token("")  # empty output is not an event
+    await writer.tool_start("call-1", "google_search", {"query": "ev"})
+    await writer.tool_end("call-1", "google_search", "results")
+    await writer.stage("reflection", "Finding gaps")
+    await writer.progress(40)  # never backwards
+    await writer.artifact("pdf", "id/Industry Report.pdf")
+    await writer.error(ValueError("bad"))
+
+    sent = await events(channel)
+    assert all(isinstance(e.pop("ts"), float) for e in sent)
+    tool_end = sent[2]
+    assert tool_end.pop("seconds") >= 0
+    assert sent == [
+        {"type": "token", "text": "Hello", "node": "agent"},
+        {"type": "tool_start", "call_id": "call-1", "name": "google_search", "args": {"query": "ev"}},
+        {"type": "tool_end", "call_id": "call-1", "name": "google_search", "chars": 7},
+        {"type": "tool_result", "call_id": "call-1", "name": "google_search", "content": "results"},
+        {"type": "stage", "stage": "reflection", "detail": "Finding gaps"},
+        {"type": "progress", "percent": 50},
+        {"type": "artifact", "kind": "pdf", "path": "id/Industry Report.pdf"},
+        {"type": "error", "error": "ValueError", "message": "bad"},
+    ]
+
+
+def test_legacy_text_rendering():
+    assert as_text({"type": "token", "text": "Hi"}) == "Hi"
+    assert as_text({"type": "artifact", "kind": "pdf", "path": "a.pdf"}) == "__OUTPUT_FILE__a.pdf\n"
+    assert as_text({"type": "error", "error": "ValueError", "message": "bad"}) == "__ERROR__ValueError: bad"
+    assert as_text({"type": "progress", "percent": 10}) is None
@@ -0,0 +1,88 @@
+import pytest
+from langchain_core.tools import StructuredTool, ToolException
+
+from agents import evidence
+from agents.cassette import RECORD, Cassette, current_cassette, instrument_tools, tool_key
+from agents.rate_limiter import current_job
+
+
+def make_tools(seen):
+    async def google_search(query: str) -> str:
+        seen.append((current_job.get(), current_cassette.get()))
+        return f"results for {query}"
+
+    return instrument_tools([StructuredTool.from_function(coroutine=google_search, name="google_search", description="search")])
+
+
+@pytest.mark.asyncio
+async def test_shared_pass_is_attributed_to_the_batch(monkeypatch):
+    monkeypatch.setattr(evidence, "cassette_mode", RECORD)
+    seen = []
+    first = Cassette("", meta={"id": "job-1"})
+    current_job.set("job-1")
+    current_cassette.set(first)
+
+    shared = await evidence.gather_shared_evidence("b1", "coffee", ["Industry Analysis"], make_tools(seen))
+
+    assert seen and all(job == "batch:b1" for job, _ in seen)
+    recording = evidence.shared_recording("b1", "coffee")
+    assert all(cassette is recording for _, cassette in seen)
+    assert first.tools == [] and len(recording.tools) == len(shared)
+    # the caller's context is untouched
+    assert current_job.get() == "job-1" and current_cassette.get() is first
+
+    used = {tool_key(e["tool"], e["args"]) for e in shared[:1]}
+    first.copy_tools(recording, used)
+    assert [e["key"] for e in first.tools] == list(used)
+    assert "google_search" in first.tool_specs
+
+    evidence.release_shared("b1", "coffee")
+    assert evidence.shared_recording("b1", "coffee") is None
+
+
+@pytest.mark.asyncio
+async def test_failed_seed_calls_are_not_evidence():
+    def tool(name, fn, **kwargs):
+        return StructuredTool.from_function(coroutine=fn, name=name, description=name, **kwargs)
+
+    async def google_search(query: str) -> str:
+        return f"Search Results for '{query}'"
+
+    async def search_google_news(query: str) -> str:
+        # what the MCP adapter raises for an isError result
+        raise ToolException("Error executing tool search_google_news: HTTP 429")
+
+    async def google_trends_summary(query: str, data_type: str) -> str:
+        return "Analytics Error: Analytics failed: timeout"
+
+    async def get_reddit_post_data(query: str) -> str:
+        return f"No Reddit discussions found for '{query}'"
+
+    async def search_youtube(query: str) -> str:
+        return "An unexpected error occurred: quota"
+
+    tools = [
+        tool("google_search", google_search),
+        tool("search_google_news", search_google_news, handle_tool_error=True),
+        tool("google_trends_summary", google_trends_summary),
+        tool("get_reddit_post_data", get_reddit_post_data),
+        tool("search_youtube", search_youtube),
+    ]
+
+    found = await evidence.gather_evidence("coffee", "", tools)
+
+    assert [e["tool"] for e in found] == ["google_search"]
+    assert found[0]["result"] == "Search Results for 'coffee'"
+
+
+@pytest.mark.asyncio
+async def test_tool_errors_are_raised_for_mcp():
+    from mcp_servers.cache import cached_tool
+    from mcp_servers.errors import ToolError, ToolFailed
+
+    @cached_tool
+    def failing_tool(query: str) -> str:
+        return ToolError("Error searching Google: HTTP 500")
+
+    with pytest.raises(ToolFailed, match="HTTP 500"):
+        await failing_tool("x")
@@ -0,0 +1,37 @@
+import json
+from datetime import datetime
+
+import ormsgpack
+
+from streaming.framing import JSON_PROTOCOL, MSGPACK_PROTOCOL, encode_batch, negotiate
+
+BATCH = [
+    (7, {"type": "token", "text": "héllo", "node": "agent"}),
+    (9, {"type": "stage", "stage": "evidence", "at": datetime(2026, 1, 2)}),
+]
+EXPECTED = {
+    "seq": 7,
+    "next": 10,
+    "data": [
+        {"type": "token", "text": "héllo", "node": "agent", "seq": 7},
+        {"type": "stage", "stage": "evidence", "at": "2026-01-02 00:00:00", "seq": 9},
+    ],
+}
+
+
+def test_negotiate_offers_both_protocols():
+    assert negotiate([MSGPACK_PROTOCOL, JSON_PROTOCOL]) == MSGPACK_PROTOCOL
+    assert negotiate(["research.xml", JSON_PROTOCOL]) == JSON_PROTOCOL
+    assert negotiate(["research.xml"]) is None
+
+
+def test_json_frames_round_trip():
+    frame = encode_batch(negotiate([JSON_PROTOCOL]), BATCH, 10)
+    assert isinstance(frame, str)
+    assert json.loads(frame) == EXPECTED
+
+
+def test_msgpack_frames_round_trip():
+    frame = encode_batch(negotiate([MSGPACK_PROTOCOL]), BATCH, 10)
+    assert isinstance(frame, bytes)
+    assert ormsgpack.unpackb(frame) == EXPECTED
@@ -0,0 +1,49 @@
+from agents.gaps import dedupe_gaps, impact_score, parse_gaps, plan_gaps
+
+
+def gap(section, description, impact=""):
+    return {"section": section, "gap_description": description, "impact": impact}
+
+
+def test_impact_levels_numbers_and_wording():
+    assert impact_score(gap("A", "x", "high")) == 8
+    assert impact_score(gap("A", "x", 3)) == 3
+    missing = impact_score(gap("A", "The pricing section is completely absent"))
+    thin = impact_score(gap("A", "Pricing could use more recent data"))
+    assert missing > thin
+    # longer descriptions only break ties
+    assert impact_score(gap("A", "thin " * 50)) - impact_score(gap("A", "thin")) < 1
+
+
+def test_near_duplicates_in_one_section_are_merged():
+    gaps = [
+        gap("Market Size", "No market size figures for 2024", "low"),
+        gap("Market Size", "No market size figures for 2024 or 2025", "high"),
+        gap("Competitors", "No market size figures for 2024", "low"),
+    ]
+
+    merged = dedupe_gaps(gaps, threshold=0.8)
+
+    assert [g["section"] for g in merged] == ["Market Size", "Competitors"]
+    assert "2025" in merged[0]["gap_description"]
+    assert merged[0]["impact"] == "high"  # the stronger impact wins
+    assert gaps[0]["impact"] == "low"  # inputs are left alone
+
+
+def test_plan_ranks_by_impact_and_caps():
+    gaps = [
+        gap("Trends", "Could be more detailed", "low"),
+        gap("Regulation", "Section is missing", "critical"),
+        gap("Pricing", "Figures are outdated", "medium"),
+    ]
+
+    planned = plan_gaps(gaps, max_gaps=2, dedupe_threshold=0.9)
+
+    assert [p.split("\n")[0] for p in planned] == ["Regulation", "Pricing"]
+    assert planned[0] == "Regulation\nSection is missing\ncritical"
+    assert len(plan_gaps(gaps, max_gaps=0, dedupe_threshold=0.9)) == 3
+
+
+def test_parse_gaps_accepts_a_fenced_array():
+    text = '```json\n[{"section": "Pricing", "gap_description": "x"}, {"gap_description": "no section"}]\n```'
+    assert parse_gaps(text) == [{"section": "Pricing", "gap_description": "x"}]
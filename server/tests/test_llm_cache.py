@@ -0,0 +1,65 @@
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+
+from agents import llm_cache
+from agents.llm_cache import TieredLLMCache, cache_key
+
+LLM = "gemini-2.5-flash temperature=0"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_cache, "time", clock)
+    return clock
+
+
+def answer(text):
+    return [ChatGeneration(message=AIMessage(content=text))]
+
+
+def test_whitespace_only_differences_share_a_key():
+    assert cache_key("Find  the\ngaps", LLM) == cache_key("Find the gaps", LLM)
+    assert cache_key("Find the gaps", LLM) != cache_key("Find the gaps", "another model")
+
+
+def test_entries_expire_after_the_ttl_in_both_tiers(tmp_path, clock):
+    path = str(tmp_path / "llm.sqlite")
+    cache = TieredLLMCache(path, ttl=60)
+    cache.update("prompt", LLM, answer("cached"))
+
+    assert cache.lookup("prompt", LLM)[0].message.content == "cached"
+    # a new process only has the disk tier
+    assert TieredLLMCache(path, ttl=60).lookup("prompt", LLM)[0].message.content == "cached"
+
+    clock.now += 61
+    assert cache.lookup("prompt", LLM) is None
+    assert TieredLLMCache(path, ttl=60).lookup("prompt", LLM) is None
+    assert cache.counters["memory_hits"] == 1 and cache.counters["misses"] == 1
+
+
+def test_pruning_keeps_the_most_recently_used(tmp_path, clock):
+    cache = TieredLLMCache(str(tmp_path / "llm.sqlite"), max_memory_items=2, max_disk_items=3, prune_every=5)
+    for i in range(4):
+        clock.now += 1
+        cache.update(f"prompt {i}", LLM, answer(str(i)))
+    assert cache.stats()["memory_items"] == 2
+
+    clock.now += 1
+    cache.lookup("prompt 0", LLM)  # from disk; now the most recently used
+    clock.now += 1
+    cache.update("prompt 4", LLM, answer("4"))  # fifth write prunes to 3
+
+    fresh = TieredLLMCache(cache.path)
+    kept = [i for i in range(5) if fresh.lookup(f"prompt {i}", LLM) is not None]
+    assert kept == [0, 3, 4]
+    assert cache.counters["evictions"] >= 2
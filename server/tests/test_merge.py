@@ -0,0 +1,56 @@
+from typing import Any, List
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from agents import graph as graph_module
+from agents import routing
+from prompts import ANALYSIS_PROMPTS
+
+REPORT = "# Coffee Market\n\n## Overview\nGrowing.\n\n## Pricing\nUnknown.\n"
+
+
+class RecordingLLM(FakeListChatModel):
+    prompts: List[str] = []
+
+    async def ainvoke(self, input: Any, *args: Any, **kwargs: Any):
+        self.prompts.append(input[0].content)
+        return await super().ainvoke(input, *args, **kwargs)
+
+
+@pytest.fixture
+def merge_node(monkeypatch):
+    llm = RecordingLLM(responses=["# Coffee Market\n\n## Overview\nGrowing fast.\n\n## Regulation\nLicensed.\n"])
+    routing.set_client_factory(lambda node, route, callbacks: llm)
+    monkeypatch.setattr(graph_module, "get_fallback_llm", lambda: None)
+
+    async def build():
+        prompts = ANALYSIS_PROMPTS[list(ANALYSIS_PROMPTS)[0]]
+        graph = await graph_module.make_graph(
+            [],
+            prompts["reflection_instructions_prompt"],
+            prompts["fill_gaps_prompt"],
+            prompts["merge_gaps_prompt"],
+        )
+        return graph.nodes["merge_filled_gaps"].bound, llm
+
+    yield build
+    routing.set_client_factory(None)
+
+
+@pytest.mark.asyncio
+async def test_unmatched_gaps_without_references_merge_the_full_report(merge_node):
+    node, llm = await merge_node()
+    state = {
+        "report": REPORT,
+        "k": 0,
+        "filled_gaps": [{"section": "Regulation", "content": "Licences are required."}],
+    }
+
+    result = await node.ainvoke(state)
+
+    # no section excerpt: the whole report was sent, without the scope note
+    assert len(llm.prompts) == 1
+    assert "## Pricing\nUnknown." in llm.prompts[0]
+    assert "SCOPE:" not in llm.prompts[0]
+    assert "## Regulation" in result["report"]
@@ -0,0 +1,53 @@
+import asyncio
+import time
+
+import pytest
+
+from agents.rate_limiter import Priority, SharedRateLimiter, llm_context
+
+
+def filled(limiter: SharedRateLimiter, requests: float) -> SharedRateLimiter:
+    limiter._requests = requests
+    limiter._last = time.monotonic()
+    return limiter
+
+
+@pytest.mark.asyncio
+async def test_waiting_jobs_are_served_round_robin():
+    limiter = SharedRateLimiter(
+        requests_per_second=200, tokens_per_minute=10**6, max_bucket_size=1, check_every_n_seconds=0.001
+    )
+    order = []
+
+    async def call(job: str, priority: int = Priority.NORMAL):
+        with llm_context(job_id=job, priority=priority):
+            await limiter.aacquire()
+        order.append(job)
+
+    # job a bursts three calls before b and c ask for one each
+    await asyncio.gather(
+        call("a"), call("a"), call("a"), call("b"), call("c"), call("urgent", Priority.INTERACTIVE)
+    )
+
+    assert order[0] == "urgent"  # its lane is served first
+    assert order[1:] == ["a", "b", "c", "a", "a"]
+
+
+def test_token_debits_pause_grants_until_refilled():
+    limiter = filled(SharedRateLimiter(requests_per_second=100, tokens_per_minute=600), 5)
+
+    assert limiter.acquire(blocking=False)
+    limiter.debit_tokens(601)  # one call blew through the whole minute
+    assert limiter.stats()["token_bucket"] <= 0
+    assert not limiter.acquire(blocking=False)
+
+    time.sleep(0.2)  # 10 tokens/s refill
+    assert limiter.acquire(blocking=False)
+
+
+def test_requests_are_capped_by_the_bucket():
+    limiter = filled(SharedRateLimiter(requests_per_second=0.001, tokens_per_minute=600, max_bucket_size=2), 2)
+
+    assert limiter.acquire(blocking=False)
+    assert limiter.acquire(blocking=False)
+    assert not limiter.acquire(blocking=False)
@@ -0,0 +1,37 @@
+import asyncio
+import time
+
+import pytest
+
+from agents import render
+
+
+def slow_render(markdown, title, path):
+    time.sleep(0.5)
+    with open(path, "w") as f:
+        f.write(markdown)
+
+
+@pytest.fixture
+def pool(monkeypatch, tmp_path):
+    monkeypatch.setattr(render, "_render_pdf", slow_render)
+    monkeypatch.setattr(render, "_cache_dir", str(tmp_path / "cache"))
+    monkeypatch.setattr(render, "pdf_render_workers", 1)
+    monkeypatch.setattr(render, "pdf_render_queue_size", 0)
+    monkeypatch.setattr(render, "pdf_render_timeout_seconds", 0.1)
+    yield tmp_path
+    render.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_timed_out_render_keeps_its_slot_until_it_finishes(pool):
+    with pytest.raises(render.RenderTimeout):
+        await render.render_report("# a", "a", str(pool / "a.pdf"))
+
+    # the worker is still busy with the first render, so nothing is admitted
+    assert render._slots.locked()
+    with pytest.raises(render.RenderTimeout):
+        await render.render_report("# b", "b", str(pool / "b.pdf"))
+
+    await asyncio.sleep(0.6)
+    assert not render._slots.locked()
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from jobs.scheduler import Job, JobScheduler
+
+
+@pytest.mark.asyncio
+async def test_positions_are_published_once_per_transition():
+    calls = []
+    release = asyncio.Event()
+
+    async def on_positions(changes):
+        calls.append([(job.analysis_id, position) for job, position in changes])
+
+    scheduler = JobScheduler(max_workers=1, max_per_type=1, on_positions=on_positions)
+    for i in range(4):
+        await scheduler.submit(Job(f"job-{i}", "type", release.wait))
+    assert calls == [[("job-0", 1)], [("job-1", 2)], [("job-2", 3)], [("job-3", 4)]]
+
+    calls.clear()
+    scheduler.start()
+    await asyncio.sleep(0.01)
+    # job-0 started: the three behind it move up in a single call
+    assert calls == [[("job-1", 1), ("job-2", 2), ("job-3", 3)]]
+
+    release.set()
+    await asyncio.sleep(0.01)
+    await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_failing_position_hook_does_not_stop_dispatch():
+    ran = []
+    failures = [True, True, True]
+
+    async def on_positions(changes):
+        if failures and failures.pop():
+            raise ConnectionError("mongo is down")
+
+    def job(name):
+        async def run():
+            ran.append(name)
+        return Job(name, "type", run)
+
+    scheduler = JobScheduler(max_workers=1, max_per_type=1, on_positions=on_positions)
+    # the hook fails, but the job is queued and its position reported
+    assert await scheduler.submit(job("job-0")) == 1
+    assert scheduler.pending[0].position is None
+
+    scheduler.start()
+    await asyncio.sleep(0.01)
+    for i in range(1, 4):
+        await scheduler.submit(job(f"job-{i}"))
+    await asyncio.sleep(0.05)
+
+    assert ran == ["job-0", "job-1", "job-2", "job-3"]
+    await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_unpublished_positions_are_sent_again():
+    calls = []
+    failing = [True]
+
+    async def on_positions(changes):
+        if failing:
+            failing.pop()
+            raise TimeoutError()
+        calls.append([(job.analysis_id, position) for job, position in changes])
+
+    scheduler = JobScheduler(max_workers=1, max_per_type=1, on_positions=on_positions)
+    await scheduler.submit(Job("job-0", "type", asyncio.Event().wait))
+    await scheduler.submit(Job("job-1", "type", asyncio.Event().wait))
+    assert calls == [[("job-0", 1), ("job-1", 2)]]
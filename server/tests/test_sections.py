@@ -0,0 +1,59 @@
+from agents.sections import match_section, section_level, splice_sections, split_sections
+
+REPORT = """# Market Report
+
+Intro.
+
+## A
+
+old a
+
+### A1
+
+old sub
+
+## B
+
+b text
+
+## References
+
+[1] https://example.com
+"""
+
+
+def test_splits_at_top_section_level():
+    assert section_level(REPORT) == 2
+    headings = [h for h, _ in split_sections(REPORT)]
+    assert headings == ["Market Report", "A", "B", "References"]
+    assert "".join(body for _, body in split_sections(REPORT)) == REPORT
+
+
+def test_replacing_a_section_replaces_its_subsections():
+    sections = split_sections(REPORT)
+    merged = split_sections("## A\nnew a\n### A1\nnew sub\n", section_level(REPORT))
+    assert [h for h, _ in merged] == ["A"]
+
+    spliced = splice_sections(sections, {1: merged[0][1]})
+
+    assert spliced.count("### A1") == 1
+    assert "old sub" not in spliced and "new sub" in spliced
+    assert "b text" in spliced
+
+
+def test_unknown_section_is_not_matched_and_is_appended_before_references():
+    headings = [h for h, _ in split_sections(REPORT)]
+    assert match_section("Regulatory Landscape", headings) is None
+    assert match_section("references", headings) == 3
+
+    spliced = splice_sections(
+        split_sections(REPORT), {}, ["## Regulatory Landscape\nnew\n"], before=3
+    )
+
+    assert spliced.index("## Regulatory Landscape") < spliced.index("## References")
+    assert spliced.index("## B") < spliced.index("## Regulatory Landscape")
+
+
+def test_headings_in_code_fences_are_ignored():
+    text = "## A\n```\n## not a heading\n```\n## B\n"
+    assert [h for h, _ in split_sections(text)] == ["A", "B"]
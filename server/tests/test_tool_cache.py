@@ -0,0 +1,62 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from mcp_servers.cache import ToolCache
+from mcp_servers.errors import ToolError
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ToolCache(str(tmp_path / "tools.sqlite"))
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_calls_run_once(cache):
+    calls = []
+
+    def search():
+        calls.append(threading.get_ident())
+        time.sleep(0.1)
+        return "results"
+
+    results = await asyncio.gather(
+        *(cache.call("google_search", {"query": "ev  bikes"}, 60, search) for _ in range(3))
+    )
+
+    assert results == ["results"] * 3
+    assert len(calls) == 1
+    assert calls[0] != threading.get_ident()  # ran off the event loop
+    assert cache.counters["misses"] == 1 and cache.counters["coalesced"] == 2
+
+    # later calls are served from the cache
+    assert await cache.call("google_search", {"query": "ev bikes"}, 60, search) == "results"
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_failures_are_not_cached(cache):
+    results = iter([ToolError("SerpApi Error: quota"), "results"])
+
+    first = await cache.call("search_google_shopping", {"query": "x"}, 60, lambda: next(results))
+    second = await cache.call("search_google_shopping", {"query": "x"}, 60, lambda: next(results))
+
+    assert first == "SerpApi Error: quota"
+    assert second == "results"
+
+
+@pytest.mark.asyncio
+async def test_exceptions_reach_every_waiter_and_are_not_cached(cache):
+    def boom():
+        time.sleep(0.05)
+        raise RuntimeError("upstream down")
+
+    results = await asyncio.gather(
+        *(cache.call("search_youtube", {"query": "x"}, 60, boom) for _ in range(2)),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert await cache.call("search_youtube", {"query": "x"}, 60, lambda: "ok") == "ok"
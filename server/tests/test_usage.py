@@ -0,0 +1,81 @@
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from agents import usage
+from agents.rate_limiter import llm_context
+
+
+def response(model, input_tokens, output_tokens):
+    message = AIMessage(
+        content="ok",
+        response_metadata={"model_name": model} if model else {},
+        usage_metadata={
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        },
+    )
+    return LLMResult(generations=[[ChatGeneration(message=message)]])
+
+
+@pytest.fixture
+def job():
+    yield "job-usage"
+    usage.reset("job-usage")
+
+
+def test_usage_is_split_by_node_and_model(job):
+    react = usage.UsageTracker("react", model="gemini-2.5-flash")
+    merge = usage.UsageTracker("merge", model="gemini-2.5-pro")
+    with llm_context(job_id=job):
+        react.on_llm_end(response("gemini-2.5-flash", 1_000_000, 0))
+        react.on_llm_end(response(None, 0, 100_000))  # falls back to the client's model
+        merge.on_llm_end(response("gemini-2.5-pro", 200_000, 100_000))
+    usage.UsageTracker("react").on_llm_end(response("gemini-2.5-flash", 5, 5))  # no job: ignored
+
+    summary = usage.summary(job)
+
+    assert summary["calls"] == 3
+    assert summary["input_tokens"] == 1_200_000 and summary["output_tokens"] == 200_000
+    assert usage.tokens_used(job) == 1_400_000
+    # flash: 0.30 + 0.25, pro: 0.25 + 1.00
+    assert summary["cost_usd"] == pytest.approx(1.80)
+    assert usage.cost(job) == pytest.approx(1.80)
+    assert summary["by_node"]["react"]["calls"] == 2
+    assert summary["by_node"]["merge"]["cost_usd"] == pytest.approx(1.25)
+    assert summary["by_model"]["gemini-2.5-flash"]["cost_usd"] == pytest.approx(0.55)
+
+
+def test_unknown_models_cost_nothing(job):
+    with llm_context(job_id=job):
+        usage.UsageTracker("react").on_llm_end(response("some-local-model", 1000, 1000))
+    assert usage.is_tracked(job)
+    assert usage.cost(job) == 0.0
+    assert usage.summary(job)["total_tokens"] == 2000
+
+    usage.reset(job)
+    assert not usage.is_tracked(job) and usage.summary(job)["calls"] == 0
+
+
+def test_a_resumed_run_continues_from_the_saved_usage(job):
+    tracker = usage.UsageTracker("react")
+    with llm_context(job_id=job):
+        tracker.on_llm_end(response("gemini-2.5-flash", 1_000_000, 0))
+    usage.record_saved(job, {"tool-1": 300})
+    saved, saved_tokens = usage.summary(job), usage.tokens_saved(job)
+    usage.reset(job)  # the process stopped
+
+    usage.restore(job, saved, saved_tokens)
+    with llm_context(job_id=job):
+        tracker.on_llm_end(response("gemini-2.5-flash", 1_000_000, 0))
+    usage.record_saved(job, {"tool-2": 200})
+
+    summary = usage.summary(job)
+    assert summary["calls"] == 2 and summary["input_tokens"] == 2_000_000
+    assert summary["cost_usd"] == pytest.approx(0.60)
+    assert usage.tokens_used(job) == 2_000_000  # budgets see both attempts
+    assert usage.tokens_saved(job) == 500
+
+    usage.restore("fresh-job", None)
+    assert not usage.is_tracked("fresh-job")